@@ -0,0 +1,196 @@
+# admission.py - 图片命令的准入控制
+# 全局并发上限 + 有界等待队列（队列满时立即拒绝），以及按群/按用户的令牌桶限流
+# 所有方法都在事件循环线程中调用，不需要加锁
+import asyncio
+import time
+
+# 限流桶数量超过这个值时，清理已经回满的桶
+RATE_LIMIT_PRUNE_SIZE = 4096
+
+
+class TokenBucket:
+    """令牌桶：容量为burst，每秒补充rate个令牌"""
+
+    __slots__ = ('rate', 'burst', 'tokens', 'updated')
+
+    def __init__(self, rate: float, burst: int, now: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = now
+
+    def _refill(self, now: float):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, now: float) -> float:
+        """不取令牌，返回0表示有可用令牌，否则返回需要等待的秒数"""
+        self._refill(now)
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def try_acquire(self, now: float) -> float:
+        """取一个令牌，成功返回0，否则返回需要等待的秒数"""
+        wait = self.wait_time(now)
+        if not wait:
+            self.tokens -= 1
+        return wait
+
+    def is_full(self, now: float) -> bool:
+        self._refill(now)
+        return self.tokens >= self.burst
+
+
+class RateLimiter:
+    """
+    按键（群号或用户ID）的令牌桶限流
+    per_minute: 每分钟允许的次数，0表示不限流
+    burst: 允许连续执行的次数
+    """
+
+    def __init__(self, per_minute: float, burst: int):
+        self.rate = per_minute / 60
+        self.burst = max(1, int(burst))
+        self._buckets: dict[str, TokenBucket] = {}
+        self.limited = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.rate > 0
+
+    def _bucket(self, key: str, now: float) -> TokenBucket:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            if len(self._buckets) >= RATE_LIMIT_PRUNE_SIZE:
+                self._prune(now)
+            bucket = self._buckets[key] = TokenBucket(self.rate, self.burst, now)
+        return bucket
+
+    def check(self, key: str) -> float:
+        """消耗key的一个令牌，返回0表示允许，否则返回需要等待的秒数"""
+        if not self.enabled or not key:
+            return 0.0
+
+        now = time.monotonic()
+        wait = self._bucket(key, now).try_acquire(now)
+        if wait:
+            self.limited += 1
+        return wait
+
+    def peek(self, key: str) -> float:
+        """检查key是否有可用令牌但不消耗，返回0表示允许，否则返回需要等待的秒数"""
+        if not self.enabled or not key:
+            return 0.0
+
+        now = time.monotonic()
+        bucket = self._buckets.get(key)
+        return bucket.wait_time(now) if bucket is not None else 0.0
+
+    def reset_stats(self):
+        self.limited = 0
+
+    def _prune(self, now: float):
+        """删除已经回满的桶，它们与新建的桶没有区别"""
+        for key in [key for key, bucket in self._buckets.items() if bucket.is_full(now)]:
+            del self._buckets[key]
+
+
+def acquire_all(requests: list) -> tuple[int, float]:
+    """
+    同时通过多个限流器：先检查全部，都允许时才各消耗一个令牌，被拒绝的请求不消耗任何令牌
+    requests: [(限流器, 键), ...]
+    返回: (拒绝请求的限流器在requests中的序号, 需要等待的秒数)，全部允许时为(-1, 0.0)
+    """
+    for i, (limiter, key) in enumerate(requests):
+        wait = limiter.peek(key)
+        if wait:
+            limiter.limited += 1
+            return i, wait
+    for limiter, key in requests:
+        limiter.check(key)
+    return -1, 0.0
+
+
+class AdmissionController:
+    """
+    图片任务的全局并发控制
+    max_concurrent: 同时执行的任务数，0表示不限制
+    max_queue: 最多排队等待的任务数，队列已满时新任务立即被拒绝
+    queue_timeout: 排队的最长秒数，超时后放弃
+    """
+
+    def __init__(self, max_concurrent: int, max_queue: int, queue_timeout: float):
+        self.max_concurrent = max(0, int(max_concurrent))
+        self.max_queue = max(0, int(max_queue))
+        self.queue_timeout = max(0.0, float(queue_timeout))
+        self._semaphore = asyncio.Semaphore(self.max_concurrent) if self.max_concurrent else None
+        self.active = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.timed_out = 0
+
+    async def acquire(self) -> bool:
+        """申请执行名额，成功返回True；队列已满或排队超时返回False"""
+        if self._semaphore is None:
+            self.active += 1
+            self.admitted += 1
+            return True
+
+        if not self._semaphore.locked():
+            # 有空闲名额时立即取得，不进入队列
+            await self._semaphore.acquire()
+        elif self.waiting >= self.max_queue:
+            self.rejected += 1
+            return False
+        else:
+            # 不用wait_for：Python 3.12之前，超时恰好与取得名额同时发生时名额会丢失，并发上限永久减少
+            self.waiting += 1
+            acquiring = asyncio.ensure_future(self._semaphore.acquire())
+            try:
+                done, _ = await asyncio.wait((acquiring,), timeout=self.queue_timeout or None)
+            except asyncio.CancelledError:
+                self._abandon(acquiring)
+                raise
+            finally:
+                self.waiting -= 1
+            if not done:
+                self._abandon(acquiring)
+                self.timed_out += 1
+                return False
+
+        self.active += 1
+        self.admitted += 1
+        return True
+
+    def _abandon(self, acquiring: asyncio.Future):
+        """放弃排队：还在等待时取消，已经取得（或取消前刚好取得）的名额立即归还"""
+        if not acquiring.done():
+            acquiring.cancel()
+        acquiring.add_done_callback(self._release_if_acquired)
+
+    def _release_if_acquired(self, acquiring: asyncio.Future):
+        if not acquiring.cancelled():
+            self._semaphore.release()
+
+    def release(self):
+        """释放执行名额"""
+        self.active -= 1
+        if self._semaphore is not None:
+            self._semaphore.release()
+
+    def reset_stats(self):
+        """清零累计计数，执行中和排队中的任务数反映当前状态，不清零"""
+        self.admitted = 0
+        self.rejected = 0
+        self.timed_out = 0
+
+    def stats(self) -> dict:
+        return {
+            'active': self.active,
+            'waiting': self.waiting,
+            'admitted': self.admitted,
+            'rejected': self.rejected,
+            'timed_out': self.timed_out,
+        }
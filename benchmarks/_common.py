@@ -0,0 +1,121 @@
+# _common.py - 基准测试公共工具
+# 基准测试离线运行，不依赖AstrBot；插件目录作为包导入，以支持模块间的相对导入
+import importlib
+import sys
+import time
+from io import BytesIO
+from pathlib import Path
+
+PLUGIN_DIR = Path(__file__).resolve().parent.parent
+
+if str(PLUGIN_DIR.parent) not in sys.path:
+    sys.path.insert(0, str(PLUGIN_DIR.parent))
+
+
+def load(module: str):
+    """导入插件目录下的模块，例如 load('imaging')"""
+    return importlib.import_module(f"{PLUGIN_DIR.name}.{module}")
+
+
+def synthetic_image(width: int, height: int, seed: int = 0):
+    """生成带渐变和色块的测试图片，颜色分布接近截图和插画"""
+    import numpy as np
+    from PIL import Image
+
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[0:height, 0:width]
+    arr = np.empty((height, width, 3), dtype=np.uint8)
+    arr[..., 0] = (x * 255 // max(1, width - 1))
+    arr[..., 1] = (y * 255 // max(1, height - 1))
+    arr[..., 2] = ((x + y) * 255 // max(1, width + height - 2))
+    # 随机色块
+    for _ in range(12):
+        x0, y0 = rng.integers(0, width), rng.integers(0, height)
+        w, h = rng.integers(1, max(2, width // 3)), rng.integers(1, max(2, height // 3))
+        arr[y0:y0 + h, x0:x0 + w] = rng.integers(0, 256, 3, dtype=np.uint8)
+    # 轻微噪声，避免PNG压缩得过小
+    arr = np.clip(arr.astype(np.int16) + rng.integers(-6, 7, arr.shape), 0, 255).astype(np.uint8)
+    return Image.fromarray(arr, 'RGB')
+
+
+def encode(image, fmt: str, **params) -> bytes:
+    """将图片编码为指定格式的字节"""
+    bio = BytesIO()
+    if fmt == 'GIF':
+        image = image.convert('P', palette=1, colors=256)  # 1 = Image.Palette.ADAPTIVE
+    image.save(bio, format=fmt, **params)
+    return bio.getvalue()
+
+
+def measure(func, repeat: int = 10, warmup: int = 1) -> list:
+    """重复执行func，返回每次耗时（毫秒）"""
+    for _ in range(warmup):
+        func()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def percentile(samples: list, p: float) -> float:
+    """计算百分位数（线性插值）"""
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    k = (len(ordered) - 1) * p / 100
+    lo = int(k)
+    hi = min(lo + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+
+def summarize(samples: list) -> dict:
+    """汇总耗时样本"""
+    return {
+        'n': len(samples),
+        'p50_ms': round(percentile(samples, 50), 3),
+        'p95_ms': round(percentile(samples, 95), 3),
+        'p99_ms': round(percentile(samples, 99), 3),
+        'min_ms': round(min(samples), 3) if samples else 0.0,
+    }
+
+
+def current_rss_mb() -> float:
+    """当前进程的常驻内存(MB)，无法读取时返回0"""
+    try:
+        with open('/proc/self/status', encoding='ascii') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return 0.0
+
+
+def reset_peak_rss() -> bool:
+    """重置内存峰值统计（Linux 4.0以上写/proc/self/clear_refs），不支持时返回False"""
+    try:
+        with open('/proc/self/clear_refs', 'w', encoding='ascii') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def peak_rss_mb() -> float:
+    """
+    当前进程的内存峰值(MB)
+    Linux上读取/proc/self/status的VmHWM（exec后重新计数）；其他平台退回到ru_maxrss
+    """
+    try:
+        with open('/proc/self/status', encoding='ascii') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS上ru_maxrss单位为字节，Linux上为KB
+    return maxrss / (1024 * 1024) if sys.platform == 'darwin' else maxrss / 1024
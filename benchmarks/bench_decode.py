@@ -0,0 +1,90 @@
+# bench_decode.py - 色板分析解码方式基准测试
+# 对比"完整解码 + LANCZOS缩放"与"按目标尺寸解码(draft/reduce) + 可选重采样"的耗时和内存峰值
+# 用法: python benchmarks/bench_decode.py [--size 6000x4000] [--repeat 5]
+# 测试图片在主进程中生成并写入临时文件，每个方案在独立子进程中运行，分别统计内存峰值
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+import _common  # noqa: E402
+
+VARIANTS = ['legacy', 'nearest', 'box', 'bilinear', 'lanczos']
+FORMATS = ['JPEG', 'PNG']
+
+
+def _legacy_load(image_bytes: bytes, max_dimension: int):
+    """原来的加载方式：完整解码后LANCZOS缩放"""
+    from io import BytesIO
+    from PIL import Image
+
+    image = Image.open(BytesIO(image_bytes)).convert('RGB')
+    width, height = image.size
+    if width > max_dimension or height > max_dimension:
+        scale = max_dimension / max(width, height)
+        image = image.resize((int(width * scale), int(height * scale)), Image.Resampling.LANCZOS)
+    return image
+
+
+def run_variant(variant: str, path: str, repeat: int) -> dict:
+    """在当前进程中运行一个方案"""
+    imaging = _common.load('imaging')
+    data = Path(path).read_bytes()
+    base_rss = _common.peak_rss_mb()
+
+    if variant == 'legacy':
+        def func():
+            _legacy_load(data, 400).load()
+    else:
+        def func():
+            imaging.load_for_analysis(data, 400, variant).load()
+
+    samples = _common.measure(func, repeat=repeat)
+    peak_rss = _common.peak_rss_mb()
+    result = {'variant': variant, 'input_bytes': len(data)}
+    result.update(_common.summarize(samples))
+    result['peak_rss_mb'] = round(peak_rss, 1)
+    result['peak_rss_delta_mb'] = round(peak_rss - base_rss, 1)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--size', default='6000x4000')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--json', help="结果保存路径")
+    parser.add_argument('--child', nargs=2, metavar=('VARIANT', 'PATH'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_variant(args.child[0], args.child[1], args.repeat)))
+        return
+
+    width, height = map(int, args.size.lower().split('x'))
+    image = _common.synthetic_image(width, height)
+    results = []
+    print(f"{'格式':<6}{'方案':<10}{'p50(ms)':>10}{'p95(ms)':>10}{'峰值RSS(MB)':>14}{'RSS增量(MB)':>14}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for fmt in FORMATS:
+            path = Path(tmp) / f"input.{fmt.lower()}"
+            path.write_bytes(_common.encode(image, fmt, **({'quality': 90} if fmt == 'JPEG' else {})))
+            for variant in VARIANTS:
+                out = subprocess.run(
+                    [sys.executable, __file__, '--repeat', str(args.repeat), '--child', variant, str(path)],
+                    check=True, capture_output=True, text=True
+                ).stdout
+                result = json.loads(out)
+                result.update({'format': fmt, 'size': f"{width}x{height}"})
+                results.append(result)
+                print(f"{fmt:<6}{variant:<10}{result['p50_ms']:>10}{result['p95_ms']:>10}"
+                      f"{result['peak_rss_mb']:>14}{result['peak_rss_delta_mb']:>14}")
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, ensure_ascii=False, indent=2), encoding='utf-8')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+# bench_import.py - 插件导入耗时基准测试
+# 每次在新的解释器中用 python -X importtime 导入一个插件模块，取该模块的累计导入耗时，
+# 并检查导入后numpy/Pillow/aiohttp是否已被加载（这些依赖应当在首次使用图片功能时才导入）
+# 另外测量lazy.preload（预加载任务）导入这些依赖的耗时，即首次使用图片功能时需要付出的代价
+# main需要AstrBot才能导入，找不到astrbot时跳过，可以用 --astrbot-path 指定AstrBot所在目录
+# 结果格式与run_suite.py相同，可以用compare.py对比两个版本
+# 用法: python benchmarks/bench_import.py [--repeat 10] [--astrbot-path 路径] [--json 结果文件]
+import argparse
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+import _common  # noqa: E402
+from run_suite import environment  # noqa: E402
+
+MODULES = ('metrics', 'caches', 'admission', 'workers', 'lazy', 'conversion', 'quantizers',
+           'imaging', 'color_names', 'http_client', 'result_store', 'main')
+
+# 导入插件时不应加载的重量级依赖
+HEAVY_MODULES = ('numpy', 'PIL.Image', 'aiohttp')
+
+CHECK_LOADED = "import sys; print(','.join(m for m in {heavy!r} if m in sys.modules))"
+PRELOAD = (
+    "import time, {package}.lazy as lazy; start = time.perf_counter(); lazy.preload(); "
+    "print((time.perf_counter() - start) * 1000)"
+)
+
+
+def run_python(code: str, env: dict, importtime: bool = False) -> subprocess.CompletedProcess:
+    cmd = [sys.executable] + (['-X', 'importtime'] if importtime else []) + ['-c', code]
+    return subprocess.run(cmd, capture_output=True, text=True, env=env, cwd=_common.PLUGIN_DIR.parent)
+
+
+def import_time_ms(stderr: str, module: str) -> float | None:
+    """从 -X importtime 的输出中取出module的累计导入耗时"""
+    for line in stderr.splitlines():
+        # 格式: import time: self [us] | cumulative | imported package
+        parts = line.split('|')
+        if len(parts) == 3 and parts[2].strip() == module:
+            return int(parts[1]) / 1000
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--astrbot-path', help="AstrBot所在目录，用于导入main")
+    parser.add_argument('--json', help="结果保存路径")
+    args = parser.parse_args()
+
+    package = _common.PLUGIN_DIR.name
+    env = dict(os.environ)
+    if args.astrbot_path:
+        env['PYTHONPATH'] = os.pathsep.join(filter(None, [args.astrbot_path, env.get('PYTHONPATH')]))
+
+    results = []
+    print(f"{'测试项':<32}{'p50(ms)':>10}{'p95(ms)':>10}  导入后已加载的重量级依赖")
+    for module in MODULES:
+        name = f"{package}.{module}"
+        code = f"import {name}; " + CHECK_LOADED.format(heavy=HEAVY_MODULES)
+        samples = []
+        loaded = ''
+        for _ in range(args.repeat):
+            proc = run_python(code, env, importtime=True)
+            if proc.returncode != 0:
+                break
+            samples.append(import_time_ms(proc.stderr, name))
+            loaded = proc.stdout.strip()
+        if not samples:
+            error = proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else ''
+            print(f"{'import ' + module:<32}{'跳过':>10}  {error}")
+            continue
+
+        result = {'name': 'import', 'params': {'module': module}}
+        result.update(_common.summarize(samples))
+        result['heavy_loaded'] = loaded.split(',') if loaded else []
+        results.append(result)
+        print(f"{'import ' + module:<32}{result['p50_ms']:>10.2f}{result['p95_ms']:>10.2f}  {loaded or '-'}")
+
+    samples = []
+    for _ in range(args.repeat):
+        proc = run_python(PRELOAD.format(package=package), env)
+        if proc.returncode == 0:
+            samples.append(float(proc.stdout.strip()))
+    if samples:
+        result = {'name': 'preload', 'params': {}}
+        result.update(_common.summarize(samples))
+        results.append(result)
+        print(f"{'preload (' + ', '.join(HEAVY_MODULES) + ')':<32}{result['p50_ms']:>10.2f}{result['p95_ms']:>10.2f}")
+
+    if args.json:
+        report = {'environment': environment(), 'results': results}
+        Path(args.json).write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding='utf-8')
+        print(f"结果已保存到 {args.json}")
+
+
+if __name__ == '__main__':
+    main()
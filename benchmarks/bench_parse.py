@@ -0,0 +1,128 @@
+# bench_parse.py - 颜色值解析基准测试
+# 对比color_parser.parse_color与原来基于正则表达式的解析流程的吞吐量
+# 原来的流程: detect_color_format (两次re.match + split + 逐个int/float) 之后，16进制再用hex_to_rgb的正则校验一次，
+# 这里保留一份原实现作为对照；两者都能识别的输入会先检查解析结果是否一致
+# 用法: python benchmarks/bench_parse.py [--count 20000] [--repeat 10] [--json 结果文件]
+import argparse
+import json
+import re
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+import _common  # noqa: E402
+
+# (名称, 输入)，legacy为False的写法原来的解析器不支持
+INPUTS = [
+    ('hex6', '72C0FF', True),
+    ('hex3_hash', '#F00', True),
+    ('rgb_tuple', '114,192,255', True),
+    ('rgb_tuple_spaces', '114, 192, 255', True),
+    ('cmyk_tuple', '55,35,0,0', True),
+    ('float_tuple', '12.5,50.25,0,0', True),
+    ('invalid', 'not a color', True),
+    ('hex8', '#72C0FF80', False),
+    ('css_rgb', 'rgb(114 192 255 / 50%)', False),
+    ('css_hsl', 'hsl(210deg, 100%, 72%)', False),
+    ('css_cmyk', 'cmyk(55%, 35%, 0%, 0%)', False),
+]
+
+
+def legacy_hex_to_rgb(hex_color):
+    """原来的hex_to_rgb"""
+    hex_color = hex_color.strip().lstrip('#')
+    if len(hex_color) == 3:
+        hex_color = ''.join(c * 2 for c in hex_color)
+    if len(hex_color) != 6 or not re.match(r'^[0-9A-Fa-f]{6}$', hex_color):
+        return None, "无效的16进制颜色值"
+    try:
+        return (int(hex_color[0:2], 16), int(hex_color[2:4], 16), int(hex_color[4:6], 16)), None
+    except ValueError:
+        return None, "无效的16进制颜色值"
+
+
+def legacy_detect_color_format(color_str: str) -> tuple[str, list]:
+    """原来的detect_color_format"""
+    color_str = color_str.strip().replace('，', ',')
+    hex_str = color_str.lstrip('#')
+    if re.match(r'^[0-9A-Fa-f]{3}$', hex_str) or re.match(r'^[0-9A-Fa-f]{6}$', hex_str):
+        return 'hex', [hex_str]
+
+    parts = [p.strip() for p in color_str.split(',') if p.strip()]
+    if not parts:
+        return 'unknown', []
+    try:
+        nums = [float(part) if '.' in part else int(part) for part in parts]
+    except ValueError:
+        return 'unknown', []
+
+    if len(nums) == 3 and all(0 <= n <= 255 for n in nums):
+        return 'rgb', nums
+    if len(nums) == 4 and all(0 <= n <= 100 for n in nums):
+        return 'cmyk', nums
+    return 'unknown', nums
+
+
+def legacy_parse(text: str):
+    """原来convert_color中的解析部分，返回与parse_color可比较的(格式, 数值)"""
+    src_format, nums = legacy_detect_color_format(text)
+    if src_format == 'hex':
+        rgb, error = legacy_hex_to_rgb(nums[0])
+        return None if error else ('hex', rgb)
+    if src_format == 'unknown':
+        return None
+    return src_format, tuple(nums)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--count', type=int, default=20000, help="每次测量解析的次数")
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--json', help="结果保存路径")
+    args = parser.parse_args()
+
+    color_parser = _common.load('color_parser')
+
+    # 先确认两个解析器对原来支持的写法结果一致
+    for name, text, legacy in INPUTS:
+        if legacy:
+            parsed = color_parser.parse_color(text)
+            expected = legacy_parse(text)
+            actual = None if parsed is None else (parsed.format, parsed.values)
+            if actual != expected:
+                raise SystemExit(f"解析结果不一致: {name} {text!r}: 原来 {expected}，现在 {actual}")
+
+    def loop(func, text):
+        def run():
+            for _ in range(args.count):
+                func(text)
+        return run
+
+    results = []
+    print(f"{'输入':<20}{'原来(万次/秒)':>16}{'现在(万次/秒)':>16}{'加速':>8}")
+    for name, text, legacy in INPUTS:
+        row = {}
+        for label, func in (('legacy', legacy_parse), ('parse_color', color_parser.parse_color)):
+            if label == 'legacy' and not legacy:
+                continue
+            samples = _common.measure(loop(func, text), repeat=args.repeat)
+            result = {'name': f"parse {label}", 'params': {'input': name}}
+            result.update(_common.summarize(samples))
+            result['ops_per_s'] = round(args.count / (result['p50_ms'] / 1000))
+            results.append(result)
+            row[label] = result['ops_per_s']
+
+        new = row['parse_color'] / 10000
+        if 'legacy' in row:
+            old = row['legacy'] / 10000
+            print(f"{name:<20}{old:>16.1f}{new:>16.1f}{new / old:>7.2f}x")
+        else:
+            print(f"{name:<20}{'不支持':>16}{new:>16.1f}{'-':>8}")
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, ensure_ascii=False, indent=2), encoding='utf-8')
+        print(f"结果已保存到 {args.json}")
+
+
+if __name__ == '__main__':
+    main()
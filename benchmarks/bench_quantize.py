@@ -0,0 +1,84 @@
+# bench_quantize.py - 色板分析量化算法基准测试
+# 在相同的测试图片上对比各量化算法的耗时和色板质量
+# 质量用每个像素到色板中最近颜色的均方误差(MSE)衡量，越小说明色板越能代表整张图片
+# 用法: python benchmarks/bench_quantize.py [--colors 5 8] [--repeat 10] [--json 结果文件]
+import argparse
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+import _common  # noqa: E402
+
+# (名称, 宽, 高, 随机种子)
+INPUTS = [
+    ('synthetic_1080p', 1920, 1080, 0),
+    ('synthetic_4k', 3840, 2160, 1),
+    ('synthetic_square', 1024, 1024, 2),
+]
+
+
+def palette_mse(pixels, colors: list) -> float:
+    """每个像素到色板中最近颜色的均方误差"""
+    import numpy as np
+
+    flat = pixels.reshape(-1, 3).astype(np.float32)
+    palette = np.array(colors, dtype=np.float32)
+    distances = ((flat[:, None, :] - palette[None, :, :]) ** 2).sum(axis=2)
+    return float(distances.min(axis=1).mean() / 3)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--colors', type=int, nargs='+', default=[5, 8])
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--json', help="结果保存路径")
+    args = parser.parse_args()
+
+    import numpy as np
+
+    imaging = _common.load('imaging')
+    quantizers = _common.load('quantizers')
+    algorithms = quantizers.available_algorithms()
+    skipped = [algo for algo in quantizers.ALGORITHMS if algo not in algorithms]
+    if skipped:
+        print(f"当前环境不可用，跳过: {', '.join(skipped)}")
+
+    results = []
+    print(f"{'输入':<20}{'颜色数':>6}{'算法':>16}{'p50':>12}{'p95':>12}{'MSE':>10}{'覆盖率':>10}")
+    for name, width, height, seed in INPUTS:
+        data = _common.encode(_common.synthetic_image(width, height, seed), 'PNG', compress_level=1)
+        # 所有算法使用同一张缩小后的图片，只比较量化本身
+        image = imaging.load_for_analysis(data)
+        pixels = np.asarray(image)
+
+        for num_colors in args.colors:
+            for algo in algorithms:
+                if algo == 'bucket':
+                    def func():
+                        return imaging.top_buckets(pixels, num_colors)
+                else:
+                    def func():
+                        return quantizers.quantize(image, num_colors, algo)
+
+                samples = _common.measure(func, repeat=args.repeat)
+                colors, percentages = func()
+                result = {
+                    'input': name,
+                    'num_colors': num_colors,
+                    'algorithm': algo,
+                    'mse': round(palette_mse(pixels, colors), 2),
+                    # 返回的颜色覆盖的像素比例，bucket只取前几组，其余像素不计入
+                    'coverage_pct': round(sum(percentages), 2),
+                }
+                result.update(_common.summarize(samples))
+                results.append(result)
+                print(f"{name:<20}{num_colors:>6}{algo:>16}{result['p50_ms']:>10.2f}ms"
+                      f"{result['p95_ms']:>10.2f}ms{result['mse']:>10.1f}{result['coverage_pct']:>9.1f}%")
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, ensure_ascii=False, indent=2), encoding='utf-8')
+
+
+if __name__ == '__main__':
+    main()
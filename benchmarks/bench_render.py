@@ -0,0 +1,94 @@
+# bench_render.py - 色板图渲染基准测试
+# 对比原来的ImageDraw逐块绘制渲染器与当前直接生成调色板图片的渲染器，颜色数量1-10
+# 每次调用都使用新的随机颜色和百分比，结果不受任何缓存影响；最后输出10色时与原来渲染器的对比
+# 用法: python benchmarks/bench_render.py [--repeat 50] [--json 结果文件]
+import argparse
+import itertools
+import json
+import sys
+from io import BytesIO
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+import _common  # noqa: E402
+
+
+def legacy_render_palette(colors: list, percentages: list) -> bytes:
+    """原来的色板渲染器：每个色块用rectangle绘制两次，默认字体，默认PNG参数"""
+    from PIL import Image, ImageDraw
+
+    num_colors = len(colors)
+    color_height = 80
+    padding = 10
+    text_height = 30
+    text_padding = 5
+    image_width = num_colors * color_height + (num_colors + 1) * padding
+    image_height = color_height + text_height + padding
+
+    image = Image.new('RGB', (image_width, image_height), (255, 255, 255))
+    draw = ImageDraw.Draw(image)
+    for i, (color, percentage) in enumerate(zip(colors, percentages)):
+        x1 = padding + i * (color_height + padding)
+        y1 = padding
+        x2 = x1 + color_height
+        y2 = y1 + color_height
+        draw.rectangle([x1, y1, x2, y2], fill=color)
+        draw.rectangle([x1, y1, x2, y2], outline=(200, 200, 200), width=2)
+        r, g, b = color
+        text_color = (255, 255, 255) if (r*0.299 + g*0.587 + b*0.114) < 128 else (0, 0, 0)
+        draw.text((x1 + color_height // 2, y1 + color_height // 2),
+                  f"#{r:02x}{g:02x}{b:02x}".upper(), fill=text_color, anchor="mm")
+        draw.text((x1 + color_height // 2, y2 + text_padding + text_height // 2),
+                  f"{percentage:.1f}%", fill=(0, 0, 0), anchor="mm")
+
+    bio = BytesIO()
+    image.save(bio, format='PNG')
+    return bio.getvalue()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--repeat', type=int, default=50)
+    parser.add_argument('--json', help="结果保存路径")
+    args = parser.parse_args()
+
+    import numpy as np
+    imaging = _common.load('imaging')
+    rng = np.random.default_rng(0)
+
+    variants = {
+        'legacy': lambda c, p: legacy_render_palette(c, p),
+        'current': lambda c, p: imaging.render_palette(c, p),
+        'current_fast_png': lambda c, p: imaging.render_palette(c, p, compress_level=1),
+        'current_level9': lambda c, p: imaging.render_palette(c, p, compress_level=9),
+    }
+
+    results = []
+    print(f"{'颜色数':<8}" + "".join(f"{name:>22}" for name in variants))
+    for n in range(1, 11):
+        inputs = [
+            ([tuple(int(v) for v in rng.integers(0, 256, 3)) for _ in range(n)],
+             sorted(rng.uniform(0, 100, n).tolist(), reverse=True))
+            for _ in range(64)
+        ]
+        row = f"{n:<8}"
+        for name, func in variants.items():
+            fresh = itertools.cycle(inputs)
+            samples = _common.measure(lambda: func(*next(fresh)), repeat=args.repeat)
+            size = len(func(*inputs[0]))
+            result = {'variant': name, 'num_colors': n, 'png_bytes': size}
+            result.update(_common.summarize(samples))
+            results.append(result)
+            row += f"{result['p50_ms']:>12.3f}ms {size:>6}B"
+        print(row)
+
+    p50 = {r['variant']: r['p50_ms'] for r in results if r['num_colors'] == 10}
+    print(f"\n10色 p50: legacy {p50['legacy']:.2f}ms, current {p50['current']:.2f}ms "
+          f"({p50['legacy'] / p50['current']:.2f}x)")
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, ensure_ascii=False, indent=2), encoding='utf-8')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,48 @@
+# compare.py - 对比两次基准测试结果
+# 用法: python benchmarks/compare.py 旧结果.json 新结果.json [--threshold 10]
+# 按测试项和参数匹配，输出p50/p95的变化比例，超过阈值的标记为变慢或变快
+import argparse
+import json
+from pathlib import Path
+
+
+def _key(result: dict) -> str:
+    params = ' '.join(f"{k}={v}" for k, v in sorted(result.get('params', {}).items()) if k != 'input_kb')
+    return f"{result['name']} {params}".strip()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('old')
+    parser.add_argument('new')
+    parser.add_argument('--threshold', type=float, default=10.0, help="变化超过此百分比时标记")
+    args = parser.parse_args()
+
+    old = json.loads(Path(args.old).read_text(encoding='utf-8'))
+    new = json.loads(Path(args.new).read_text(encoding='utf-8'))
+    old_results = {_key(r): r for r in old['results']}
+
+    print(f"旧版本: {old['environment'].get('commit') or '-'}  新版本: {new['environment'].get('commit') or '-'}")
+    print(f"{'测试项':<56}{'旧p50':>10}{'新p50':>10}{'变化':>9}{'旧p95':>10}{'新p95':>10}  ")
+    regressions = 0
+    for result in new['results']:
+        key = _key(result)
+        before = old_results.get(key)
+        if before is None:
+            print(f"{key:<56}{'-':>10}{result['p50_ms']:>10.3f}{'新增':>9}")
+            continue
+        change = (result['p50_ms'] - before['p50_ms']) / before['p50_ms'] * 100 if before['p50_ms'] else 0.0
+        mark = ''
+        if change > args.threshold:
+            mark = '变慢'
+            regressions += 1
+        elif change < -args.threshold:
+            mark = '变快'
+        print(f"{key:<56}{before['p50_ms']:>10.3f}{result['p50_ms']:>10.3f}{change:>8.1f}%"
+              f"{before['p95_ms']:>10.3f}{result['p95_ms']:>10.3f}  {mark}")
+
+    print(f"\n共{regressions}项变慢超过{args.threshold}%")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,183 @@
+# run_suite.py - 插件基准测试套件
+# 离线运行，使用生成的测试图片，覆盖:
+#   - 标量转换函数 (rgb_to_hex / hex_to_rgb / rgb_to_cmyk / cmyk_to_rgb)
+#   - 颜色识别和转换 (detect_color_format / convert_color，即插件的_detect_color_format/_convert_color)
+#   - 取色 (pick_pixels，即_pick_color_from_image在工作池中执行的部分)
+#   - 色板分析 (analyze_palette，即_analyze_image_palette在工作池中执行的部分)，多种尺寸和格式
+#   - 预览图和色板图渲染 (render_preview / render_palette)
+# 每项报告耗时百分位数和内存峰值，结果保存为JSON，可用compare.py对比两个版本
+# 图片相关的测试项各自在独立子进程中运行，内存峰值不受前面测试项的影响
+# 用法: python benchmarks/run_suite.py [--quick] [--repeat 10] [--json results.json]
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+import _common  # noqa: E402
+
+SIZES = {
+    '256': (256, 256),
+    '1080p': (1920, 1080),
+    '4K': (3840, 2160),
+    '8K': (7680, 4320),
+}
+QUICK_SIZES = ('256', '1080p')
+FORMATS = ('PNG', 'JPEG', 'WEBP', 'GIF')
+ENCODE_PARAMS = {'JPEG': {'quality': 90}, 'WEBP': {'quality': 80}}
+
+
+class Suite:
+    def __init__(self, repeat: int):
+        self.repeat = repeat
+        self.results = []
+
+    def bench(self, name: str, func, repeat: int | None = None, **params):
+        """运行一项测试并记录耗时和内存峰值"""
+        self.record(run_case(name, func, repeat or self.repeat, params))
+
+    def record(self, result: dict):
+        """记录并打印一项结果"""
+        self.results.append(result)
+        name, params = result['name'], result['params']
+        label = name + (' ' + ' '.join(f"{k}={v}" for k, v in params.items()) if params else '')
+        print(f"{label:<48}{result['p50_ms']:>10.3f}{result['p95_ms']:>10.3f}{result['p99_ms']:>10.3f}"
+              f"{result['peak_rss_delta_mb']:>10}")
+
+
+def run_case(name: str, func, repeat: int, params: dict) -> dict:
+    """在当前进程中运行一项测试，内存峰值为相对测试开始前常驻内存的增量"""
+    rss_before = _common.current_rss_mb()
+    _common.reset_peak_rss()
+    samples = _common.measure(func, repeat=repeat)
+    result = {'name': name, 'params': params}
+    result.update(_common.summarize(samples))
+    result['peak_rss_delta_mb'] = round(max(0.0, _common.peak_rss_mb() - rss_before), 1)
+    return result
+
+
+def bench_conversion(suite: Suite, conversion):
+    """标量转换和颜色识别，每个样本转换1000次"""
+    def loop(func, *args):
+        return lambda: [func(*args) for _ in range(1000)]
+
+    suite.bench('rgb_to_hex x1000', loop(conversion.rgb_to_hex, 114, 192, 255))
+    suite.bench('hex_to_rgb x1000', loop(conversion.hex_to_rgb, '72C0FF'))
+    suite.bench('rgb_to_cmyk x1000', loop(conversion.rgb_to_cmyk, 114, 192, 255))
+    suite.bench('cmyk_to_rgb x1000', loop(conversion.cmyk_to_rgb, 55, 35, 0, 0))
+    for value in ('72C0FF', '114,192,255', '55,35,0,0'):
+        suite.bench('detect_color_format x1000', loop(conversion.detect_color_format, value), input=value)
+        suite.bench('convert_color x1000', loop(conversion.convert_color, 'rgb', value), input=value)
+
+
+IMAGE_CASES = ('pick_pixels 1pt', 'pick_pixels 10pt', 'analyze_palette')
+
+
+def run_image_case(case: str, path: str, width: int, height: int, repeat: int, params: dict) -> dict:
+    """子进程入口：运行一项图片测试"""
+    imaging = _common.load('imaging')
+    data = Path(path).read_bytes()
+    if case == 'pick_pixels 1pt':
+        points = [(width // 2, height // 2)]
+        func = lambda: imaging.pick_pixels(data, points)  # noqa: E731
+    elif case == 'pick_pixels 10pt':
+        points = [(width * i // 11, height * i // 11) for i in range(1, 11)]
+        func = lambda: imaging.pick_pixels(data, points)  # noqa: E731
+    else:
+        func = lambda: imaging.analyze_palette(data, None)  # noqa: E731
+    return run_case(case, func, repeat, params)
+
+
+def bench_images(suite: Suite, sizes: list):
+    """取色和色板分析，不同尺寸和格式，每项在独立子进程中运行"""
+    with tempfile.TemporaryDirectory() as tmp:
+        for size_name in sizes:
+            width, height = SIZES[size_name]
+            image = _common.synthetic_image(width, height)
+            # 大图减少重复次数
+            repeat = suite.repeat if width * height <= 1920 * 1080 else max(3, suite.repeat // 3)
+            for fmt in FORMATS:
+                path = Path(tmp) / f"{size_name}.{fmt.lower()}"
+                path.write_bytes(_common.encode(image, fmt, **ENCODE_PARAMS.get(fmt, {})))
+                params = {'size': size_name, 'format': fmt, 'input_kb': path.stat().st_size // 1024}
+                for case in IMAGE_CASES:
+                    child = {'case': case, 'path': str(path), 'width': width, 'height': height,
+                             'repeat': repeat, 'params': params}
+                    out = subprocess.run(
+                        [sys.executable, __file__, '--child', json.dumps(child)],
+                        check=True, capture_output=True, text=True
+                    ).stdout
+                    suite.record(json.loads(out))
+            del image
+
+
+def bench_render(suite: Suite, imaging):
+    """预览图和色板图渲染"""
+    suite.bench('render_preview', lambda: imaging.render_preview(114, 192, 255))
+    for n in (1, 5, 10):
+        colors = [(i * 25, 255 - i * 25, 128) for i in range(n)]
+        percentages = [100 / n] * n
+        suite.bench('render_palette', lambda: imaging.render_palette(colors, percentages), colors=n)
+
+
+def environment() -> dict:
+    """记录运行环境，便于对比不同版本的结果"""
+    import numpy
+    import PIL
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=_common.PLUGIN_DIR,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = ''
+    return {
+        'commit': commit,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'pillow': PIL.__version__,
+        'numpy': numpy.__version__,
+        'platform': platform.platform(),
+        'processor': platform.processor() or platform.machine(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--quick', action='store_true', help="只测试小尺寸图片")
+    parser.add_argument('--sizes', help=f"逗号分隔的尺寸，可选: {', '.join(SIZES)}")
+    parser.add_argument('--json', help="结果保存路径")
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_image_case(**json.loads(args.child))))
+        return
+
+    if args.sizes:
+        sizes = [s.strip() for s in args.sizes.split(',') if s.strip() in SIZES]
+    else:
+        sizes = list(QUICK_SIZES if args.quick else SIZES)
+
+    conversion = _common.load('conversion')
+    imaging = _common.load('imaging')
+    suite = Suite(args.repeat)
+
+    print(f"{'测试项':<48}{'p50(ms)':>10}{'p95(ms)':>10}{'p99(ms)':>10}{'内存(MB)':>10}")
+    bench_conversion(suite, conversion)
+    bench_render(suite, imaging)
+    bench_images(suite, sizes)
+
+    if args.json:
+        report = {'environment': environment(), 'results': suite.results}
+        Path(args.json).write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding='utf-8')
+        print(f"结果已保存到 {args.json}")
+
+
+if __name__ == '__main__':
+    main()
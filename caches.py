@@ -0,0 +1,176 @@
+# caches.py - 插件内存缓存
+import time
+import asyncio
+import hashlib
+from collections import OrderedDict
+
+
+def content_hash(data: bytes) -> str:
+    """计算图片内容的哈希，用作结果缓存的键"""
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+class LRUCache:
+    """
+    带容量上限和过期时间的LRU缓存
+    max_entries: 最多缓存的条目数，0表示不限制
+    max_bytes: 缓存内容的总字节数上限，0表示不限制（需要sizeof能计算条目大小）
+    ttl: 条目过期秒数，0表示永不过期
+    两个上限都为0时缓存被禁用
+    """
+
+    def __init__(self, max_entries: int = 0, max_bytes: int = 0, ttl: float = 0, sizeof=len):
+        self.max_entries = max(0, int(max_entries))
+        self.max_bytes = max(0, int(max_bytes))
+        self.ttl = max(0.0, float(ttl))
+        self.sizeof = sizeof
+        self._data: OrderedDict = OrderedDict()  # key -> (value, 大小, 写入时间)
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.max_entries or self.max_bytes)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key) -> bool:
+        return self._lookup(key) is not None
+
+    def _lookup(self, key):
+        """查找条目，过期的条目会被删除"""
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        if self.ttl and time.monotonic() - entry[2] > self.ttl:
+            self._remove(key)
+            return None
+        return entry
+
+    def _remove(self, key):
+        _, size, _ = self._data.pop(key)
+        self.total_bytes -= size
+
+    def get(self, key, default=None):
+        """读取缓存，命中时将条目移到最近使用的位置"""
+        entry = self._lookup(key)
+        if entry is None:
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def put(self, key, value):
+        """写入缓存，超出上限时淘汰最久未使用的条目"""
+        if not self.enabled:
+            return
+        size = self.sizeof(value) if self.max_bytes else 0
+        # 单个条目就超过字节上限时不缓存
+        if self.max_bytes and size > self.max_bytes:
+            return
+
+        if key in self._data:
+            self._remove(key)
+        self._data[key] = (value, size, time.monotonic())
+        self.total_bytes += size
+
+        while self._data and (
+            (self.max_entries and len(self._data) > self.max_entries)
+            or (self.max_bytes and self.total_bytes > self.max_bytes)
+        ):
+            oldest = next(iter(self._data))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def clear(self):
+        self._data.clear()
+        self.total_bytes = 0
+
+    def reset_stats(self):
+        """清零命中、未命中和淘汰次数，缓存内容保留"""
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def stats(self) -> dict:
+        """返回缓存统计信息"""
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._data),
+            'bytes': self.total_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
+
+
+class _Flight:
+    """正在执行的任务和等待它的请求数"""
+    __slots__ = ('task', 'waiters')
+
+    def __init__(self, task: asyncio.Future):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    合并相同键的并发请求：同一个键正在执行时，后来的请求等待同一个任务的结果，不重复执行
+    任务在独立的Task中执行，某个等待方被取消不会影响其他等待方；所有等待方都被取消时任务也被取消
+    """
+
+    def __init__(self):
+        self._inflight: dict = {}
+        self.executed = 0
+        self.coalesced = 0
+
+    def __len__(self) -> int:
+        return len(self._inflight)
+
+    def __contains__(self, key) -> bool:
+        return key in self._inflight
+
+    async def run(self, key, func, *args):
+        """执行 await func(*args)，相同key正在执行时直接等待其结果"""
+        flight = self._inflight.get(key)
+        if flight is not None:
+            self.coalesced += 1
+        else:
+            flight = _Flight(asyncio.ensure_future(func(*args)))
+            self._inflight[key] = flight
+            flight.task.add_done_callback(lambda _: self._discard(key, flight))
+            self.executed += 1
+
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        except asyncio.CancelledError:
+            # 最后一个等待方被取消时结果已经没有人需要，取消任务；
+            # 立即移除，之后相同key的请求重新执行，而不是等待这个正在取消的任务
+            if flight.waiters == 1 and not flight.task.done():
+                flight.task.cancel()
+                self._discard(key, flight)
+            raise
+        finally:
+            flight.waiters -= 1
+
+    def _discard(self, key, flight: _Flight):
+        if self._inflight.get(key) is flight:
+            del self._inflight[key]
+
+    def reset_stats(self):
+        """清零执行和合并次数，不影响进行中的任务"""
+        self.executed = 0
+        self.coalesced = 0
+
+    def stats(self) -> dict:
+        return {
+            'inflight': len(self._inflight),
+            'executed': self.executed,
+            'coalesced': self.coalesced,
+        }
@@ -0,0 +1,247 @@
+# color_names.py - 最接近的颜色名称查询
+# 名称表在Lab空间中建立均匀网格索引，查询时从所在网格向外逐层搜索，
+# 只比较附近网格中的颜色，查询开销与名称表大小基本无关
+from __future__ import annotations
+from functools import lru_cache
+from .conversion import rgb_array_to_lab
+from .lazy import lazy_import
+
+np = lazy_import('numpy')
+
+# CSS Color Module Level 4 的148个命名颜色
+CSS_COLORS = """
+aliceblue F0F8FF antiquewhite FAEBD7 aqua 00FFFF aquamarine 7FFFD4 azure F0FFFF
+beige F5F5DC bisque FFE4C4 black 000000 blanchedalmond FFEBCD blue 0000FF
+blueviolet 8A2BE2 brown A52A2A burlywood DEB887 cadetblue 5F9EA0 chartreuse 7FFF00
+chocolate D2691E coral FF7F50 cornflowerblue 6495ED cornsilk FFF8DC crimson DC143C
+cyan 00FFFF darkblue 00008B darkcyan 008B8B darkgoldenrod B8860B darkgray A9A9A9
+darkgreen 006400 darkgrey A9A9A9 darkkhaki BDB76B darkmagenta 8B008B darkolivegreen 556B2F
+darkorange FF8C00 darkorchid 9932CC darkred 8B0000 darksalmon E9967A darkseagreen 8FBC8F
+darkslateblue 483D8B darkslategray 2F4F4F darkslategrey 2F4F4F darkturquoise 00CED1
+darkviolet 9400D3 deeppink FF1493 deepskyblue 00BFFF dimgray 696969 dimgrey 696969
+dodgerblue 1E90FF firebrick B22222 floralwhite FFFAF0 forestgreen 228B22 fuchsia FF00FF
+gainsboro DCDCDC ghostwhite F8F8FF gold FFD700 goldenrod DAA520 gray 808080 green 008000
+greenyellow ADFF2F grey 808080 honeydew F0FFF0 hotpink FF69B4 indianred CD5C5C
+indigo 4B0082 ivory FFFFF0 khaki F0E68C lavender E6E6FA lavenderblush FFF0F5
+lawngreen 7CFC00 lemonchiffon FFFACD lightblue ADD8E6 lightcoral F08080 lightcyan E0FFFF
+lightgoldenrodyellow FAFAD2 lightgray D3D3D3 lightgreen 90EE90 lightgrey D3D3D3
+lightpink FFB6C1 lightsalmon FFA07A lightseagreen 20B2AA lightskyblue 87CEFA
+lightslategray 778899 lightslategrey 778899 lightsteelblue B0C4DE lightyellow FFFFE0
+lime 00FF00 limegreen 32CD32 linen FAF0E6 magenta FF00FF maroon 800000
+mediumaquamarine 66CDAA mediumblue 0000CD mediumorchid BA55D3 mediumpurple 9370DB
+mediumseagreen 3CB371 mediumslateblue 7B68EE mediumspringgreen 00FA9A
+mediumturquoise 48D1CC mediumvioletred C71585 midnightblue 191970 mintcream F5FFFA
+mistyrose FFE4E1 moccasin FFE4B5 navajowhite FFDEAD navy 000080 oldlace FDF5E6
+olive 808000 olivedrab 6B8E23 orange FFA500 orangered FF4500 orchid DA70D6
+palegoldenrod EEE8AA palegreen 98FB98 paleturquoise AFEEEE palevioletred DB7093
+papayawhip FFEFD5 peachpuff FFDAB9 peru CD853F pink FFC0CB plum DDA0DD
+powderblue B0E0E6 purple 800080 rebeccapurple 663399 red FF0000 rosybrown BC8F8F
+royalblue 4169E1 saddlebrown 8B4513 salmon FA8072 sandybrown F4A460 seagreen 2E8B57
+seashell FFF5EE sienna A0522D silver C0C0C0 skyblue 87CEEB slateblue 6A5ACD
+slategray 708090 slategrey 708090 snow FFFAFA springgreen 00FF7F steelblue 4682B4
+tan D2B48C teal 008080 thistle D8BFD8 tomato FF6347 turquoise 40E0D0 violet EE82EE
+wheat F5DEB3 white FFFFFF whitesmoke F5F5F5 yellow FFFF00 yellowgreen 9ACD32
+"""
+
+# X11 rgb.txt 中与CSS取值不同或CSS没有的颜色，包括编号变体（red1..red4、gray0..gray100等）和web前缀的颜色
+# 名称去掉空格并转为小写；grey拼写的别名与gray取值相同，省略
+X11_COLORS = """
+gray BEBEBE navyblue 000080 lightslateblue 8470FF green 00FF00 lightgoldenrod EEDD82 maroon B03060
+violetred D02090 purple A020F0 snow1 FFFAFA snow2 EEE9E9 snow3 CDC9C9 snow4 8B8989 seashell1 FFF5EE
+seashell2 EEE5DE seashell3 CDC5BF seashell4 8B8682 antiquewhite1 FFEFDB antiquewhite2 EEDFCC
+antiquewhite3 CDC0B0 antiquewhite4 8B8378 bisque1 FFE4C4 bisque2 EED5B7 bisque3 CDB79E
+bisque4 8B7D6B peachpuff1 FFDAB9 peachpuff2 EECBAD peachpuff3 CDAF95 peachpuff4 8B7765
+navajowhite1 FFDEAD navajowhite2 EECFA1 navajowhite3 CDB38B navajowhite4 8B795E lemonchiffon1 FFFACD
+lemonchiffon2 EEE9BF lemonchiffon3 CDC9A5 lemonchiffon4 8B8970 cornsilk1 FFF8DC cornsilk2 EEE8CD
+cornsilk3 CDC8B1 cornsilk4 8B8878 ivory1 FFFFF0 ivory2 EEEEE0 ivory3 CDCDC1 ivory4 8B8B83
+honeydew1 F0FFF0 honeydew2 E0EEE0 honeydew3 C1CDC1 honeydew4 838B83 lavenderblush1 FFF0F5
+lavenderblush2 EEE0E5 lavenderblush3 CDC1C5 lavenderblush4 8B8386 mistyrose1 FFE4E1
+mistyrose2 EED5D2 mistyrose3 CDB7B5 mistyrose4 8B7D7B azure1 F0FFFF azure2 E0EEEE azure3 C1CDCD
+azure4 838B8B slateblue1 836FFF slateblue2 7A67EE slateblue3 6959CD slateblue4 473C8B
+royalblue1 4876FF royalblue2 436EEE royalblue3 3A5FCD royalblue4 27408B blue1 0000FF blue2 0000EE
+blue3 0000CD blue4 00008B dodgerblue1 1E90FF dodgerblue2 1C86EE dodgerblue3 1874CD
+dodgerblue4 104E8B steelblue1 63B8FF steelblue2 5CACEE steelblue3 4F94CD steelblue4 36648B
+deepskyblue1 00BFFF deepskyblue2 00B2EE deepskyblue3 009ACD deepskyblue4 00688B skyblue1 87CEFF
+skyblue2 7EC0EE skyblue3 6CA6CD skyblue4 4A708B lightskyblue1 B0E2FF lightskyblue2 A4D3EE
+lightskyblue3 8DB6CD lightskyblue4 607B8B slategray1 C6E2FF slategray2 B9D3EE slategray3 9FB6CD
+slategray4 6C7B8B lightsteelblue1 CAE1FF lightsteelblue2 BCD2EE lightsteelblue3 A2B5CD
+lightsteelblue4 6E7B8B lightblue1 BFEFFF lightblue2 B2DFEE lightblue3 9AC0CD lightblue4 68838B
+lightcyan1 E0FFFF lightcyan2 D1EEEE lightcyan3 B4CDCD lightcyan4 7A8B8B paleturquoise1 BBFFFF
+paleturquoise2 AEEEEE paleturquoise3 96CDCD paleturquoise4 668B8B cadetblue1 98F5FF
+cadetblue2 8EE5EE cadetblue3 7AC5CD cadetblue4 53868B turquoise1 00F5FF turquoise2 00E5EE
+turquoise3 00C5CD turquoise4 00868B cyan1 00FFFF cyan2 00EEEE cyan3 00CDCD cyan4 008B8B
+darkslategray1 97FFFF darkslategray2 8DEEEE darkslategray3 79CDCD darkslategray4 528B8B
+aquamarine1 7FFFD4 aquamarine2 76EEC6 aquamarine3 66CDAA aquamarine4 458B74 darkseagreen1 C1FFC1
+darkseagreen2 B4EEB4 darkseagreen3 9BCD9B darkseagreen4 698B69 seagreen1 54FF9F seagreen2 4EEE94
+seagreen3 43CD80 seagreen4 2E8B57 palegreen1 9AFF9A palegreen2 90EE90 palegreen3 7CCD7C
+palegreen4 548B54 springgreen1 00FF7F springgreen2 00EE76 springgreen3 00CD66 springgreen4 008B45
+green1 00FF00 green2 00EE00 green3 00CD00 green4 008B00 chartreuse1 7FFF00 chartreuse2 76EE00
+chartreuse3 66CD00 chartreuse4 458B00 olivedrab1 C0FF3E olivedrab2 B3EE3A olivedrab3 9ACD32
+olivedrab4 698B22 darkolivegreen1 CAFF70 darkolivegreen2 BCEE68 darkolivegreen3 A2CD5A
+darkolivegreen4 6E8B3D khaki1 FFF68F khaki2 EEE685 khaki3 CDC673 khaki4 8B864E
+lightgoldenrod1 FFEC8B lightgoldenrod2 EEDC82 lightgoldenrod3 CDBE70 lightgoldenrod4 8B814C
+lightyellow1 FFFFE0 lightyellow2 EEEED1 lightyellow3 CDCDB4 lightyellow4 8B8B7A yellow1 FFFF00
+yellow2 EEEE00 yellow3 CDCD00 yellow4 8B8B00 gold1 FFD700 gold2 EEC900 gold3 CDAD00 gold4 8B7500
+goldenrod1 FFC125 goldenrod2 EEB422 goldenrod3 CD9B1D goldenrod4 8B6914 darkgoldenrod1 FFB90F
+darkgoldenrod2 EEAD0E darkgoldenrod3 CD950C darkgoldenrod4 8B6508 rosybrown1 FFC1C1
+rosybrown2 EEB4B4 rosybrown3 CD9B9B rosybrown4 8B6969 indianred1 FF6A6A indianred2 EE6363
+indianred3 CD5555 indianred4 8B3A3A sienna1 FF8247 sienna2 EE7942 sienna3 CD6839 sienna4 8B4726
+burlywood1 FFD39B burlywood2 EEC591 burlywood3 CDAA7D burlywood4 8B7355 wheat1 FFE7BA wheat2 EED8AE
+wheat3 CDBA96 wheat4 8B7E66 tan1 FFA54F tan2 EE9A49 tan3 CD853F tan4 8B5A2B chocolate1 FF7F24
+chocolate2 EE7621 chocolate3 CD661D chocolate4 8B4513 firebrick1 FF3030 firebrick2 EE2C2C
+firebrick3 CD2626 firebrick4 8B1A1A brown1 FF4040 brown2 EE3B3B brown3 CD3333 brown4 8B2323
+salmon1 FF8C69 salmon2 EE8262 salmon3 CD7054 salmon4 8B4C39 lightsalmon1 FFA07A lightsalmon2 EE9572
+lightsalmon3 CD8162 lightsalmon4 8B5742 orange1 FFA500 orange2 EE9A00 orange3 CD8500 orange4 8B5A00
+darkorange1 FF7F00 darkorange2 EE7600 darkorange3 CD6600 darkorange4 8B4500 coral1 FF7256
+coral2 EE6A50 coral3 CD5B45 coral4 8B3E2F tomato1 FF6347 tomato2 EE5C42 tomato3 CD4F39
+tomato4 8B3626 orangered1 FF4500 orangered2 EE4000 orangered3 CD3700 orangered4 8B2500 red1 FF0000
+red2 EE0000 red3 CD0000 red4 8B0000 debianred D70751 deeppink1 FF1493 deeppink2 EE1289
+deeppink3 CD1076 deeppink4 8B0A50 hotpink1 FF6EB4 hotpink2 EE6AA7 hotpink3 CD6090 hotpink4 8B3A62
+pink1 FFB5C5 pink2 EEA9B8 pink3 CD919E pink4 8B636C lightpink1 FFAEB9 lightpink2 EEA2AD
+lightpink3 CD8C95 lightpink4 8B5F65 palevioletred1 FF82AB palevioletred2 EE799F
+palevioletred3 CD6889 palevioletred4 8B475D maroon1 FF34B3 maroon2 EE30A7 maroon3 CD2990
+maroon4 8B1C62 violetred1 FF3E96 violetred2 EE3A8C violetred3 CD3278 violetred4 8B2252
+magenta1 FF00FF magenta2 EE00EE magenta3 CD00CD magenta4 8B008B orchid1 FF83FA orchid2 EE7AE9
+orchid3 CD69C9 orchid4 8B4789 plum1 FFBBFF plum2 EEAEEE plum3 CD96CD plum4 8B668B
+mediumorchid1 E066FF mediumorchid2 D15FEE mediumorchid3 B452CD mediumorchid4 7A378B
+darkorchid1 BF3EFF darkorchid2 B23AEE darkorchid3 9A32CD darkorchid4 68228B purple1 9B30FF
+purple2 912CEE purple3 7D26CD purple4 551A8B mediumpurple1 AB82FF mediumpurple2 9F79EE
+mediumpurple3 8968CD mediumpurple4 5D478B thistle1 FFE1FF thistle2 EED2EE thistle3 CDB5CD
+thistle4 8B7B8B gray0 000000 gray1 030303 gray2 050505 gray3 080808 gray4 0A0A0A gray5 0D0D0D
+gray6 0F0F0F gray7 121212 gray8 141414 gray9 171717 gray10 1A1A1A gray11 1C1C1C gray12 1F1F1F
+gray13 212121 gray14 242424 gray15 262626 gray16 292929 gray17 2B2B2B gray18 2E2E2E gray19 303030
+gray20 333333 gray21 363636 gray22 383838 gray23 3B3B3B gray24 3D3D3D gray25 404040 gray26 424242
+gray27 454545 gray28 474747 gray29 4A4A4A gray30 4D4D4D gray31 4F4F4F gray32 525252 gray33 545454
+gray34 575757 gray35 595959 gray36 5C5C5C gray37 5E5E5E gray38 616161 gray39 636363 gray40 666666
+gray41 696969 gray42 6B6B6B gray43 6E6E6E gray44 707070 gray45 737373 gray46 757575 gray47 787878
+gray48 7A7A7A gray49 7D7D7D gray50 7F7F7F gray51 828282 gray52 858585 gray53 878787 gray54 8A8A8A
+gray55 8C8C8C gray56 8F8F8F gray57 919191 gray58 949494 gray59 969696 gray60 999999 gray61 9C9C9C
+gray62 9E9E9E gray63 A1A1A1 gray64 A3A3A3 gray65 A6A6A6 gray66 A8A8A8 gray67 ABABAB gray68 ADADAD
+gray69 B0B0B0 gray70 B3B3B3 gray71 B5B5B5 gray72 B8B8B8 gray73 BABABA gray74 BDBDBD gray75 BFBFBF
+gray76 C2C2C2 gray77 C4C4C4 gray78 C7C7C7 gray79 C9C9C9 gray80 CCCCCC gray81 CFCFCF gray82 D1D1D1
+gray83 D4D4D4 gray84 D6D6D6 gray85 D9D9D9 gray86 DBDBDB gray87 DEDEDE gray88 E0E0E0 gray89 E3E3E3
+gray90 E5E5E5 gray91 E8E8E8 gray92 EBEBEB gray93 EDEDED gray94 F0F0F0 gray95 F2F2F2 gray96 F5F5F5
+gray97 F7F7F7 gray98 FAFAFA gray99 FCFCFC gray100 FFFFFF webgray 808080 webgreen 008000
+webmaroon 800000 webpurple 800080
+"""
+
+# 网格边长(Lab单位)
+GRID_CELL_SIZE = 10.0
+
+
+def _parse_table(text: str) -> list:
+    """解析 '名称 RRGGBB' 交替排列的颜色表"""
+    tokens = text.split()
+    return [(tokens[i], tuple(int(tokens[i + 1][j:j + 2], 16) for j in (0, 2, 4)))
+            for i in range(0, len(tokens), 2)]
+
+
+def named_colors() -> list:
+    """
+    CSS和X11命名颜色，RGB相同的别名只保留第一个（如aqua/cyan只保留aqua）
+    X11中与CSS取值不同或CSS没有的颜色加上"(X11)"后缀
+    返回: [(名称, (r, g, b)), ...]
+    """
+    entries = _parse_table(CSS_COLORS)
+    entries += [(f"{name} (X11)", rgb) for name, rgb in _parse_table(X11_COLORS)]
+
+    seen = set()
+    result = []
+    for name, rgb in entries:
+        if rgb not in seen:
+            seen.add(rgb)
+            result.append((name, rgb))
+    return result
+
+
+class ColorNameIndex:
+    """
+    Lab空间的均匀网格索引
+    每个颜色放入边长GRID_CELL_SIZE的网格；查询时按切比雪夫距离逐层检查网格，
+    当前最近距离不超过已搜索范围时即可停止，结果与逐个比较完全相同
+    """
+
+    def __init__(self, entries: list, cell_size: float = GRID_CELL_SIZE):
+        self.names = [name for name, _ in entries]
+        self.rgb = np.array([rgb for _, rgb in entries], dtype=np.intp).reshape(-1, 3)
+        self.lab = rgb_array_to_lab(self.rgb)
+        self.cell_size = cell_size
+
+        cells = np.floor(self.lab / cell_size).astype(np.intp)
+        buckets = {}
+        for i, cell in enumerate(map(tuple, cells)):
+            buckets.setdefault(cell, []).append(i)
+        self._cells = {cell: np.array(indices, dtype=np.intp) for cell, indices in buckets.items()}
+
+        # 最多需要搜索的层数：覆盖所有网格
+        self._low = cells.min(axis=0) if len(cells) else np.zeros(3, dtype=np.intp)
+        self._high = cells.max(axis=0) if len(cells) else np.zeros(3, dtype=np.intp)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def _shell(radius: int) -> tuple:
+        """切比雪夫距离正好为radius的网格偏移"""
+        if radius == 0:
+            return ((0, 0, 0),)
+        span = range(-radius, radius + 1)
+        return tuple(
+            (dx, dy, dz) for dx in span for dy in span for dz in span
+            if max(abs(dx), abs(dy), abs(dz)) == radius
+        )
+
+    def nearest_lab(self, lab: np.ndarray) -> tuple[int, float]:
+        """返回Lab空间中距离最近的颜色索引和色差(CIE76 ΔE)"""
+        if not self.names:
+            return -1, float('inf')
+
+        cx, cy, cz = np.floor(lab / self.cell_size).astype(np.intp)
+        max_radius = int(max(np.abs(self._low - (cx, cy, cz)).max(), np.abs(self._high - (cx, cy, cz)).max()))
+
+        best_index, best_dist = -1, float('inf')
+        for radius in range(max_radius + 1):
+            candidates = [
+                self._cells[cell]
+                for cell in ((cx + dx, cy + dy, cz + dz) for dx, dy, dz in self._shell(radius))
+                if cell in self._cells
+            ]
+            if candidates:
+                indices = np.concatenate(candidates)
+                dist = np.sqrt(((self.lab[indices] - lab) ** 2).sum(axis=1))
+                i = int(dist.argmin())
+                if dist[i] < best_dist or (dist[i] == best_dist and indices[i] < best_index):
+                    best_index, best_dist = int(indices[i]), float(dist[i])
+            # 未搜索的网格中的颜色距离至少为 radius * cell_size
+            if best_dist <= radius * self.cell_size:
+                break
+
+        return best_index, best_dist
+
+    def nearest_many(self, rgb: np.ndarray) -> list:
+        """
+        批量查询最近的颜色，Lab转换一次完成
+        返回: [(名称, '#RRGGBB', ΔE), ...]
+        """
+        labs = rgb_array_to_lab(np.asarray(rgb, dtype=np.intp).reshape(-1, 3))
+        results = []
+        for lab in labs:
+            i, dist = self.nearest_lab(lab)
+            r, g, b = self.rgb[i]
+            results.append((self.names[i], f"#{r:02X}{g:02X}{b:02X}", round(dist, 2)))
+        return results
+
+
+@lru_cache(maxsize=None)
+def get_index() -> ColorNameIndex:
+    """构建（只构建一次）命名颜色的索引"""
+    return ColorNameIndex(named_colors())
+
+
+def lookup_names(rgb_list: list) -> list:
+    """
+    查询一组颜色最接近的命名颜色
+    返回: [(名称, hex, ΔE), ...]
+    """
+    return get_index().nearest_many(np.array(rgb_list, dtype=np.intp).reshape(-1, 3))
@@ -0,0 +1,271 @@
+# color_parser.py - 颜色值解析
+# 手写的解析器，不使用正则表达式：按首字符区分16进制、CSS函数和数值元组，每种写法只扫描一次；
+# 逐字符的检查尽量交给str的内置方法(isdigit/isascii/split等)完成。无法识别时返回None，正常路径上不抛出异常
+# 支持的写法:
+#   - 16进制: 3/4/6/8位，可以带#，4位和8位的最后一组是透明度
+#   - 数值元组: 用逗号（中英文均可）或空格分隔，3个数为RGB(0-255)，4个数为CMYK(0-100，可以带%)
+#   - CSS函数: rgb()/rgba()、hsl()/hsla()、cmyk()/device-cmyk()，参数用逗号或空格分隔，
+#     cmyk()的数值为0-100，device-cmyk()与CSS一致，不带%的数值为0-1，
+#     透明度可以作为第4个参数，也可以写在 / 之后，如 rgb(255 0 0 / 50%)
+from __future__ import annotations
+from typing import NamedTuple
+
+
+class ParsedColor(NamedTuple):
+    """
+    解析结果
+    format: 'hex', 'rgb', 'cmyk' 或 'hsl'
+    values: hex和rgb为(r, g, b)，cmyk为(c, m, y, k)，hsl为(h, s, l)，都已检查过范围
+    alpha: 透明度0-1，没有写透明度时为None
+    """
+    format: str
+    values: tuple
+    alpha: float | None = None
+
+
+_HEX_CHARS = frozenset('0123456789abcdefABCDEF')
+_COMMAS = frozenset(',，')
+
+
+def _scan_hex(text: str) -> ParsedColor | None:
+    """解析不带#的3/4/6/8位16进制数"""
+    length = len(text)
+    if length not in (3, 4, 6, 8) or not _HEX_CHARS.issuperset(text):
+        return None
+
+    if length <= 4:
+        channels = [int(c, 16) * 17 for c in text]
+    else:
+        value = int(text, 16)
+        channels = [(value >> shift) & 0xFF for shift in range((length - 2) * 4, -1, -8)]
+    alpha = round(channels[3] / 255, 3) if length in (4, 8) else None
+    return ParsedColor('hex', tuple(channels[:3]), alpha)
+
+
+def _number(token: str) -> tuple | None:
+    """解析一个带可选单位(%或deg)的数值，如 '255'、'-12.5'、'50%'、'120deg'"""
+    if token.isdigit() and token.isascii():
+        return int(token), ''
+
+    unit = ''
+    if token[-1] == '%':
+        unit = '%'
+        token = token[:-1]
+    elif token[-3:].lower() == 'deg':
+        unit = 'deg'
+        token = token[:-3]
+
+    digits = token[1:] if token[:1] in ('+', '-') else token
+    if digits.isdigit() and digits.isascii():
+        return int(token), unit
+
+    # 小数: 去掉一个小数点后只剩ASCII数字，且至少有一位数字
+    if digits.replace('.', '', 1).isdigit() and digits.isascii():
+        return float(token), unit
+    return None
+
+
+def _scan_numbers(text: str) -> tuple[list, tuple | None] | None:
+    """
+    扫描用逗号或空格分隔的数值，数值可以带%或deg单位，/ 之后的一个数值是透明度
+    返回: ([(数值, 单位), ...], 透明度(数值, 单位)或None)，格式错误时返回None
+    """
+    if '，' in text:
+        text = text.replace('，', ',')
+    text, slash, alpha_text = text.partition('/')
+
+    numbers = []
+    for token in text.replace(',', ' ').split():
+        number = _number(token)
+        if number is None:
+            return None
+        numbers.append(number)
+
+    alpha = None
+    if slash:
+        tokens = alpha_text.replace(',', ' ').split()
+        if not numbers or len(tokens) != 1:
+            return None
+        alpha = _number(tokens[0])
+        if alpha is None:
+            return None
+    return numbers, alpha
+
+
+def _alpha(token: tuple) -> float | None:
+    """把透明度转换为0-1，无效时返回None"""
+    value, unit = token
+    if unit == '%':
+        value = value / 100
+    elif unit:
+        return None
+    return float(value) if 0 <= value <= 1 else None
+
+
+def _build_rgb(numbers: list, alpha: tuple | None, allow_percent: bool = True) -> ParsedColor | None:
+    """3个0-255的数值或0-100%的百分比，第4个数值为透明度"""
+    if len(numbers) == 4 and alpha is None:
+        numbers, alpha = numbers[:3], numbers[3]
+    if len(numbers) != 3:
+        return None
+
+    values = []
+    for value, unit in numbers:
+        if unit == '%' and allow_percent:
+            if not 0 <= value <= 100:
+                return None
+            value = round(value * 255 / 100)
+        elif unit or not 0 <= value <= 255:
+            return None
+        values.append(value)
+
+    if alpha is not None:
+        alpha = _alpha(alpha)
+        if alpha is None:
+            return None
+    return ParsedColor('rgb', tuple(values), alpha)
+
+
+def _build_cmyk(numbers: list, alpha: tuple | None, unitless_scale: int = 1) -> ParsedColor | None:
+    """4个0-100的数值，可以带%；不带%的数值乘以unitless_scale"""
+    if len(numbers) != 4:
+        return None
+
+    values = []
+    for value, unit in numbers:
+        if unit == '':
+            value = value * unitless_scale
+        elif unit != '%':
+            return None
+        if not 0 <= value <= 100:
+            return None
+        values.append(value)
+
+    if alpha is not None:
+        alpha = _alpha(alpha)
+        if alpha is None:
+            return None
+    return ParsedColor('cmyk', tuple(values), alpha)
+
+
+def _build_hsl(numbers: list, alpha: tuple | None) -> ParsedColor | None:
+    """色相(度，可以带deg)、饱和度和亮度(0-100，可以带%)，第4个数值为透明度"""
+    if len(numbers) == 4 and alpha is None:
+        numbers, alpha = numbers[:3], numbers[3]
+    if len(numbers) != 3:
+        return None
+
+    (hue, hue_unit), (saturation, s_unit), (lightness, l_unit) = numbers
+    if hue_unit not in ('', 'deg') or s_unit not in ('', '%') or l_unit not in ('', '%'):
+        return None
+    if not (0 <= saturation <= 100 and 0 <= lightness <= 100):
+        return None
+
+    if alpha is not None:
+        alpha = _alpha(alpha)
+        if alpha is None:
+            return None
+    return ParsedColor('hsl', (hue % 360, saturation, lightness), alpha)
+
+
+def _build_device_cmyk(numbers: list, alpha: tuple | None) -> ParsedColor | None:
+    """CSS的device-cmyk()：不带%的数值为0-1，带%的为0-100%"""
+    return _build_cmyk(numbers, alpha, unitless_scale=100)
+
+
+_FUNCTIONS = {
+    'rgb': _build_rgb,
+    'rgba': _build_rgb,
+    'hsl': _build_hsl,
+    'hsla': _build_hsl,
+    'cmyk': _build_cmyk,
+    'device-cmyk': _build_device_cmyk,
+}
+
+
+def _scan_function(text: str) -> ParsedColor | None:
+    """解析 名称(参数...) 形式的CSS函数"""
+    name, paren, args = text.partition('(')
+    build = _FUNCTIONS.get(name.rstrip().lower())
+    if build is None or not paren or args[-1:] != ')':
+        return None
+
+    scanned = _scan_numbers(args[:-1])
+    if scanned is None:
+        return None
+    return build(*scanned)
+
+
+def _scan_tuple(text: str) -> ParsedColor | None:
+    """解析不带函数名的数值元组：3个数为RGB，4个数为CMYK"""
+    scanned = _scan_numbers(text)
+    if scanned is None:
+        return None
+    numbers, alpha = scanned
+    if alpha is not None:
+        return None
+    if len(numbers) == 3:
+        return _build_rgb(numbers, None, allow_percent=False)
+    if len(numbers) == 4:
+        return _build_cmyk(numbers, None)
+    return None
+
+
+def parse_color(text: str) -> ParsedColor | None:
+    """解析一个颜色值，无法识别或数值超出范围时返回None"""
+    text = text.strip()
+    if not text:
+        return None
+
+    first = text[0]
+    if first == '#':
+        return _scan_hex(text[1:])
+    if first in _HEX_CHARS:
+        color = _scan_hex(text)
+        if color is not None:
+            return color
+    if first.isalpha():
+        return _scan_function(text)
+    return _scan_tuple(text)
+
+
+def parse_hex(text: str) -> ParsedColor | None:
+    """只按16进制解析，可以带#"""
+    text = text.strip()
+    return _scan_hex(text[1:] if text[:1] == '#' else text)
+
+
+def split_colors(text: str) -> list:
+    """
+    把用空白分隔的一组颜色值拆分开
+    括号内和逗号两侧的空白不拆分，如 'rgb(255, 0, 0) 255, 0, 0 F00' 拆分为3个颜色值
+    """
+    values = []
+    depth = 0
+    start = -1
+    last = ''
+    i, n = 0, len(text)
+    while i < n:
+        c = text[i]
+        if c.isspace():
+            j = i
+            while j < n and text[j].isspace():
+                j += 1
+            if start >= 0 and depth == 0 and last not in _COMMAS and (j >= n or text[j] not in _COMMAS):
+                values.append(text[start:i])
+                start = -1
+            i = j
+            continue
+
+        if start < 0:
+            start = i
+        if c == '(':
+            depth += 1
+        elif c == ')' and depth:
+            depth -= 1
+        last = c
+        i += 1
+
+    if start >= 0:
+        values.append(text[start:n].rstrip())
+    return values
@@ -0,0 +1,557 @@
+# conversion.py - 颜色格式转换
+# 标量函数返回 (结果, 错误信息)，与插件原有的静态方法一致；
+# 数组函数一次转换N个颜色，输入输出都是NumPy数组，调用方负责事先校验
+# 标量的rgb/hex/cmyk转换不需要numpy，numpy在首次调用数组函数时才导入
+from __future__ import annotations
+import csv
+from functools import lru_cache
+from itertools import islice
+from .color_parser import parse_color, parse_hex
+from .lazy import lazy_import
+
+np = lazy_import('numpy')
+
+# 批量转换文件时每次转换的行数，内存占用只与这个值有关，与文件大小无关
+FILE_BATCH_LINES = 4096
+
+# 读取文件时每次读取的字符数；没有换行的超长行只保留开头FILE_MAX_LINE_CHARS个字符（颜色值不会这么长）
+FILE_CHUNK_CHARS = 64 * 1024
+FILE_MAX_LINE_CHARS = 256
+
+# 支持的目标格式，hsl/hsv/lab只能作为目标格式，不能作为输入
+TARGET_FORMATS = ('rgb', 'hex', 'cmyk', 'hsl', 'hsv', 'lab')
+
+# 转换结果文件每种目标格式的表头
+FILE_HEADERS = {
+    'hex': ['input', 'hex'],
+    'rgb': ['input', 'r', 'g', 'b'],
+    'cmyk': ['input', 'c', 'm', 'y', 'k'],
+    'hsl': ['input', 'h', 's', 'l'],
+    'hsv': ['input', 'h', 's', 'v'],
+    'lab': ['input', 'L', 'a', 'b'],
+}
+
+# D65白点
+_D65_WHITE = (0.95047, 1.0, 1.08883)
+
+
+@lru_cache(maxsize=None)
+def _lab_tables() -> tuple:
+    """
+    Lab转换用到的查找表（首次调用时构建）
+    返回: (sRGB 8位值到线性值的查找表, 线性sRGB到XYZ的矩阵)
+    查找表使Lab转换时不再逐个计算gamma；矩阵每行已除以白点，白色直接映射为(1, 1, 1)
+    """
+    srgb_to_linear = np.array([
+        c / 12.92 if c <= 0.04045 else ((c + 0.055) / 1.055) ** 2.4
+        for c in (i / 255 for i in range(256))
+    ])
+    rgb_to_xyz = np.array([
+        [0.4124564, 0.3575761, 0.1804375],
+        [0.2126729, 0.7151522, 0.0721750],
+        [0.0193339, 0.1191920, 0.9503041],
+    ]) / np.array(_D65_WHITE)[:, None]
+    return srgb_to_linear, rgb_to_xyz
+
+
+def rgb_to_hex(r, g, b):
+    """RGB转16进制"""
+    # 验证输入值
+    try:
+        r = int(r)
+        g = int(g)
+        b = int(b)
+    except ValueError:
+        return None, "RGB值必须是整数"
+
+    # 检查范围
+    if any(not (0 <= x <= 255) for x in (r, g, b)):
+        return None, "RGB值必须在0-255范围内"
+
+    # 转换为16进制
+    hex_color = f"#{r:02x}{g:02x}{b:02x}".upper()
+    return hex_color, None
+
+
+def hex_to_rgb(hex_color):
+    """16进制转RGB，支持3/4/6/8位（4位和8位的透明度被忽略）"""
+    color = parse_hex(hex_color)
+    if color is None:
+        return None, "无效的16进制颜色值"
+    return color.values, None
+
+
+def rgb_to_cmyk(r, g, b):
+    """RGB转CMYK"""
+    # 验证输入值
+    try:
+        r = int(r)
+        g = int(g)
+        b = int(b)
+    except ValueError:
+        return None, "RGB值必须是整数"
+
+    # 检查范围
+    if any(not (0 <= x <= 255) for x in (r, g, b)):
+        return None, "RGB值必须在0-255范围内"
+
+    # 归一化到0-1
+    r_prime, g_prime, b_prime = r/255.0, g/255.0, b/255.0
+
+    # 计算CMYK
+    k = 1 - max(r_prime, g_prime, b_prime)
+
+    # 使用更清晰的方式检查纯黑色
+    if k > 0.999999:  # 接近1.0时视为纯黑色
+        c = m = y = 0.0
+    else:
+        c = (1 - r_prime - k) / (1 - k)
+        m = (1 - g_prime - k) / (1 - k)
+        y = (1 - b_prime - k) / (1 - k)
+
+    # 返回0-100的百分比值，保留两位小数
+    return (
+        round(c * 100, 2),
+        round(m * 100, 2),
+        round(y * 100, 2),
+        round(k * 100, 2)
+    ), None
+
+
+def cmyk_to_rgb(c, m, y, k):
+    """CMYK转RGB"""
+    # 验证输入值
+    try:
+        c = float(c)
+        m = float(m)
+        y = float(y)
+        k = float(k)
+    except ValueError:
+        return None, "CMYK值必须是数字"
+
+    # 检查范围
+    if any(not (0 <= x <= 100) for x in (c, m, y, k)):
+        return None, "CMYK值必须在0-100范围内"
+
+    # 转换为0-1的小数
+    c, m, y, k = c/100.0, m/100.0, y/100.0, k/100.0
+
+    # 计算RGB
+    r = 255 * (1 - c) * (1 - k)
+    g = 255 * (1 - m) * (1 - k)
+    b = 255 * (1 - y) * (1 - k)
+
+    # 四舍五入并确保在0-255范围内
+    r = max(0, min(255, int(round(r))))
+    g = max(0, min(255, int(round(g))))
+    b = max(0, min(255, int(round(b))))
+
+    return (r, g, b), None
+
+
+def cmyk_to_hex(c, m, y, k):
+    """CMYK转16进制"""
+    rgb_result, error = cmyk_to_rgb(c, m, y, k)
+    if error:
+        return None, error
+
+    hex_result, error = rgb_to_hex(*rgb_result)
+    if error:
+        return None, error
+
+    return hex_result, None
+
+
+def hex_to_cmyk(hex_color):
+    """16进制转CMYK"""
+    rgb_result, error = hex_to_rgb(hex_color)
+    if error:
+        return None, error
+
+    cmyk_result, error = rgb_to_cmyk(*rgb_result)
+    if error:
+        return None, error
+
+    return cmyk_result, None
+
+
+def _rgb_to_table_format(array_func, r, g, b):
+    """用批量转换函数转换单个RGB颜色"""
+    try:
+        rgb = (int(r), int(g), int(b))
+    except ValueError:
+        return None, "RGB值必须是整数"
+
+    if any(not (0 <= x <= 255) for x in rgb):
+        return None, "RGB值必须在0-255范围内"
+
+    return tuple(array_func(np.array([rgb]))[0].tolist()), None
+
+
+def format_color(target_format: str, value) -> str:
+    """将一种格式的颜色值格式化为显示文本，如 HSL(210.0°, 100.0%, 72.35%)"""
+    if target_format == 'hex':
+        return value
+    if target_format == 'rgb':
+        return f"RGB({value[0]}, {value[1]}, {value[2]})"
+    if target_format == 'cmyk':
+        return f"CMYK({value[0]}%, {value[1]}%, {value[2]}%, {value[3]}%)"
+    if target_format in ('hsl', 'hsv'):
+        return f"{target_format.upper()}({value[0]}°, {value[1]}%, {value[2]}%)"
+    if target_format == 'lab':
+        return f"Lab({value[0]}, {value[1]}, {value[2]})"
+    raise ValueError(f"未知的颜色格式: {target_format}")
+
+
+def detect_color_format(color_str: str) -> tuple[str, list]:
+    """
+    智能检测颜色格式，解析由color_parser完成
+    返回: (格式类型, 数值列表)
+    格式类型: 'hex', 'rgb', 'cmyk', 'hsl', 'unknown'；hex的数值列表为['RRGGBB']
+    """
+    color = parse_color(color_str)
+    if color is None:
+        return 'unknown', []
+    if color.format == 'hex':
+        r, g, b = color.values
+        return 'hex', [f"{r:02X}{g:02X}{b:02X}"]
+    return color.format, list(color.values)
+
+
+# 无法识别颜色值时的提示
+UNKNOWN_COLOR_HINT = (
+    "支持的格式:\n"
+    "- 16进制: 3/4/6/8位，可以带#(如 FF0000、#F00)\n"
+    "- RGB: 3个0-255的数字(如 255,0,0 或 rgb(255 0 0))\n"
+    "- CMYK: 4个0-100的数字(如 0,100,100,0 或 cmyk(0%,100%,100%,0%))\n"
+    "- HSL: hsl(色相, 饱和度%, 亮度%)(如 hsl(0, 100%, 50%))"
+)
+
+
+def convert_color(target_format: str, color_str: str) -> tuple[dict, str]:
+    """
+    转换颜色格式
+    返回: (颜色信息字典, 错误信息)
+    """
+    # 识别输入格式，数值范围已由解析器检查
+    color = parse_color(color_str)
+    if color is None:
+        return {}, f"无法识别颜色格式: {color_str}\n\n{UNKNOWN_COLOR_HINT}"
+
+    src_format = color.format
+    color_info = {}
+
+    try:
+        if src_format in ('rgb', 'hex', 'hsl'):
+            if src_format == 'hsl':
+                r, g, b = hsl_array_to_rgb(np.array([color.values]))[0].tolist()
+            else:
+                r, g, b = color.values
+            hex_color, error = rgb_to_hex(r, g, b)
+            if error:
+                return {}, error
+
+            cmyk, error = rgb_to_cmyk(r, g, b)
+            if error:
+                return {}, error
+
+            color_info = {
+                'hex': hex_color,
+                'rgb': (r, g, b),
+                'cmyk': cmyk
+            }
+
+        elif src_format == 'cmyk':
+            c, m, y, k = color.values
+            rgb, error = cmyk_to_rgb(c, m, y, k)
+            if error:
+                return {}, error
+
+            hex_color, error = rgb_to_hex(*rgb)
+            if error:
+                return {}, error
+
+            color_info = {
+                'hex': hex_color,
+                'rgb': rgb,
+                'cmyk': (c, m, y, k)
+            }
+
+        # HSL/HSV/Lab只在作为目标格式时计算
+        if target_format in ('hsl', 'hsv', 'lab'):
+            color_info[target_format], error = _rgb_to_table_format(
+                _TABLE_FORMATS[target_format], *color_info['rgb']
+            )
+            if error:
+                return {}, error
+
+    except Exception as e:
+        return {}, f"转换过程中发生错误: {str(e)}"
+
+    # 根据目标格式返回相应结果
+    result = {}
+    if target_format in TARGET_FORMATS:
+        result = {target_format: color_info[target_format]}
+
+    # 添加源格式信息用于显示
+    result['_src_format'] = src_format
+    result['_full_info'] = color_info
+
+    return result, ""
+
+
+@lru_cache(maxsize=None)
+def _hex_pairs() -> np.ndarray:
+    """0-255到两位大写16进制字符串的查找表（首次调用时构建）"""
+    return np.array([f"{i:02X}" for i in range(256)])
+
+
+def rgb_array_to_hex(rgb: np.ndarray) -> np.ndarray:
+    """
+    批量RGB转16进制
+    rgb: 形状为(N, 3)、取值0-255的整数数组
+    返回: 形状为(N,)的字符串数组，如 '#FF0000'
+    """
+    rgb = np.asarray(rgb, dtype=np.intp)
+    pairs = _hex_pairs()[rgb]
+    return np.char.add(np.char.add(np.char.add('#', pairs[:, 0]), pairs[:, 1]), pairs[:, 2])
+
+
+def rgb_array_to_cmyk(rgb: np.ndarray) -> np.ndarray:
+    """
+    批量RGB转CMYK
+    rgb: 形状为(N, 3)、取值0-255的数组
+    返回: 形状为(N, 4)的数组，取值0-100，保留两位小数
+    """
+    prime = np.asarray(rgb, dtype=np.float64) / 255.0
+    k = 1 - prime.max(axis=1)
+
+    # 接近1.0时视为纯黑色，CMY为0
+    black = k > 0.999999
+    denom = np.where(black, 1.0, 1 - k)
+    cmy = (1 - prime - k[:, None]) / denom[:, None]
+    cmy[black] = 0.0
+
+    # 对全部8位RGB输入，np.round(x, 2)与内置round(x, 2)的结果一致
+    return np.round(np.column_stack([cmy, k]) * 100, 2)
+
+
+def cmyk_array_to_rgb(cmyk: np.ndarray) -> np.ndarray:
+    """
+    批量CMYK转RGB
+    cmyk: 形状为(N, 4)、取值0-100的数组
+    返回: 形状为(N, 3)的uint8数组
+    """
+    cmyk = np.asarray(cmyk, dtype=np.float64) / 100.0
+    k = cmyk[:, 3:4]
+    rgb = 255 * (1 - cmyk[:, :3]) * (1 - k)
+    return np.clip(np.rint(rgb), 0, 255).astype(np.uint8)
+
+
+def hsl_array_to_rgb(hsl: np.ndarray) -> np.ndarray:
+    """
+    批量HSL转RGB
+    hsl: 形状为(N, 3)的数组，H为0-360度，S和L为0-100
+    返回: 形状为(N, 3)的uint8数组
+    """
+    hsl = np.asarray(hsl, dtype=np.float64)
+    hue = hsl[:, 0:1] % 360
+    saturation = hsl[:, 1:2] / 100
+    lightness = hsl[:, 2:3] / 100
+    # CSS Color 4 的hsl转换: f(n) = L - a * max(-1, min(k - 3, 9 - k, 1))，k = (n + H / 30) mod 12
+    k = (np.array([0, 8, 4]) + hue / 30) % 12
+    a = saturation * np.minimum(lightness, 1 - lightness)
+    rgb = lightness - a * np.clip(np.minimum(k - 3, 9 - k), -1, 1)
+    return np.clip(np.rint(rgb * 255), 0, 255).astype(np.uint8)
+
+
+def _hue(rgb: np.ndarray, maxc: np.ndarray, delta: np.ndarray) -> np.ndarray:
+    """批量计算色相(0-360度)，灰色的色相为0"""
+    r, g, b = rgb[:, 0], rgb[:, 1], rgb[:, 2]
+    safe = np.where(delta == 0, 1.0, delta)
+    hue = np.where(
+        maxc == r, ((g - b) / safe) % 6,
+        np.where(maxc == g, (b - r) / safe + 2, (r - g) / safe + 4)
+    )
+    return np.where(delta == 0, 0.0, hue * 60)
+
+
+def _round_table(values: np.ndarray) -> np.ndarray:
+    """保留两位小数，并把-0.0变成0.0"""
+    return np.round(values, 2) + 0.0
+
+
+def rgb_array_to_hsl(rgb: np.ndarray) -> np.ndarray:
+    """
+    批量RGB转HSL
+    rgb: 形状为(N, 3)、取值0-255的数组
+    返回: 形状为(N, 3)的数组，H为0-360度，S和L为0-100，保留两位小数
+    """
+    prime = np.asarray(rgb, dtype=np.float64) / 255.0
+    maxc = prime.max(axis=1)
+    minc = prime.min(axis=1)
+    delta = maxc - minc
+    lightness = (maxc + minc) / 2
+    denom = 1 - np.abs(2 * lightness - 1)
+    saturation = np.where(delta == 0, 0.0, delta / np.where(denom == 0, 1.0, denom))
+    return _round_table(np.column_stack([_hue(prime, maxc, delta), saturation * 100, lightness * 100]))
+
+
+def rgb_array_to_hsv(rgb: np.ndarray) -> np.ndarray:
+    """
+    批量RGB转HSV
+    rgb: 形状为(N, 3)、取值0-255的数组
+    返回: 形状为(N, 3)的数组，H为0-360度，S和V为0-100，保留两位小数
+    """
+    prime = np.asarray(rgb, dtype=np.float64) / 255.0
+    maxc = prime.max(axis=1)
+    delta = maxc - prime.min(axis=1)
+    saturation = np.where(maxc == 0, 0.0, delta / np.where(maxc == 0, 1.0, maxc))
+    return _round_table(np.column_stack([_hue(prime, maxc, delta), saturation * 100, maxc * 100]))
+
+
+def rgb_array_to_lab(rgb: np.ndarray) -> np.ndarray:
+    """
+    批量RGB转CIELAB (D65)
+    gamma线性化使用256项查找表，XYZ转换是一次矩阵乘法
+    rgb: 形状为(N, 3)、取值0-255的整数数组
+    返回: 形状为(N, 3)的数组 (L, a, b)，保留两位小数
+    """
+    srgb_to_linear, rgb_to_xyz = _lab_tables()
+    linear = srgb_to_linear[np.asarray(rgb, dtype=np.intp)]
+    xyz = linear @ rgb_to_xyz.T
+
+    # CIE规定的分段函数，小于(6/29)^3的部分用线性段
+    epsilon = (6 / 29) ** 3
+    f = np.where(xyz > epsilon, np.cbrt(xyz), xyz / (3 * (6 / 29) ** 2) + 4 / 29)
+    lab = np.column_stack([
+        116 * f[:, 1] - 16,
+        500 * (f[:, 0] - f[:, 1]),
+        200 * (f[:, 1] - f[:, 2]),
+    ])
+    return _round_table(lab)
+
+
+# 由RGB数组计算的目标格式
+_TABLE_FORMATS = {
+    'hsl': rgb_array_to_hsl,
+    'hsv': rgb_array_to_hsv,
+    'lab': rgb_array_to_lab,
+}
+
+
+def convert_many(items: list) -> tuple[np.ndarray, np.ndarray]:
+    """
+    批量把已解析的颜色统一转换为RGB，同一种格式的颜色一次性转换
+    items: [ParsedColor或None, ...]，None表示无法识别，数值范围已由解析器检查
+    返回: (形状为(N, 3)的uint8数组, 形状为(N,)的有效标记数组)
+    """
+    n = len(items)
+    rgb = np.zeros((n, 3), dtype=np.uint8)
+    valid = np.array([color is not None for color in items], dtype=bool)
+
+    # 16进制解析后已经是RGB，与RGB输入一起转换
+    groups = {'rgb': [], 'cmyk': [], 'hsl': []}
+    for i, color in enumerate(items):
+        if color is not None:
+            groups['rgb' if color.format == 'hex' else color.format].append(i)
+
+    if groups['rgb']:
+        idx = np.array(groups['rgb'])
+        # 与rgb_to_hex一致，小数按int()截断
+        rgb[idx] = np.array([items[i].values for i in idx], dtype=np.float64).astype(np.uint8)
+
+    if groups['cmyk']:
+        idx = np.array(groups['cmyk'])
+        rgb[idx] = cmyk_array_to_rgb(np.array([items[i].values for i in idx], dtype=np.float64))
+
+    if groups['hsl']:
+        idx = np.array(groups['hsl'])
+        rgb[idx] = hsl_array_to_rgb(np.array([items[i].values for i in idx], dtype=np.float64))
+
+    return rgb, valid
+
+
+def convert_values(values: list, target_format: str) -> tuple[list, list, list]:
+    """
+    识别并批量转换一组颜色值到目标格式
+    返回: (解析结果列表[ParsedColor或None], 有效标记列表, 转换结果列表)
+    转换结果: hex为'#RRGGBB'，rgb为[r, g, b]，cmyk为[c, m, y, k]（CMYK输入保持原值），
+    hsl/hsv/lab为3个数值
+    """
+    items = [parse_color(value) for value in values]
+    rgb, valid = convert_many(items)
+
+    if target_format == 'hex':
+        converted = rgb_array_to_hex(rgb).tolist()
+    elif target_format == 'cmyk':
+        converted = rgb_array_to_cmyk(rgb).tolist()
+        # CMYK输入保持原值，与单个转换一致
+        converted = [list(color.values) if color is not None and color.format == 'cmyk' else result
+                     for color, result in zip(items, converted)]
+    elif target_format in _TABLE_FORMATS:
+        converted = _TABLE_FORMATS[target_format](rgb).tolist()
+    else:
+        converted = rgb.tolist()
+
+    return items, valid.tolist(), converted
+
+
+def _clean_line(line: str) -> str:
+    """去掉行首尾的空白和引号，逗号两侧的空白由解析器处理"""
+    return line.strip().strip('"\'').strip()
+
+
+def _iter_lines(src, chunk_chars: int = FILE_CHUNK_CHARS, max_line_chars: int = FILE_MAX_LINE_CHARS):
+    """
+    按固定字符数分块读取文本，逐行返回（不含换行符），每行最多max_line_chars个字符
+    整个文件没有换行时也只占用一个分块的内存
+    """
+    pending = ''
+    while chunk := src.read(chunk_chars):
+        *lines, tail = chunk.split('\n')
+        if lines:
+            lines[0] = pending + lines[0]
+            pending = ''
+            for line in lines:
+                yield line[:max_line_chars]
+        # 未结束的行只需要保留开头部分，拼上后续内容后截取的结果不变
+        pending = (pending + tail)[:max_line_chars]
+    if pending:
+        yield pending
+
+
+def convert_file(src_path: str, dst_path: str, target_format: str) -> tuple[int, int]:
+    """
+    流式转换颜色列表文件，每行一个颜色值，结果写入CSV文件
+    按FILE_CHUNK_CHARS个字符分块读取，每FILE_BATCH_LINES行转换一次，内存占用不随文件大小和行长度增长
+    返回: (颜色总数, 无法识别的数量)
+    """
+    total = failed = 0
+    with open(src_path, encoding='utf-8-sig', errors='replace') as src, \
+            open(dst_path, 'w', encoding='utf-8', newline='') as dst:
+        writer = csv.writer(dst)
+        writer.writerow(FILE_HEADERS[target_format])
+
+        lines_iter = _iter_lines(src)
+        while True:
+            lines = list(islice(lines_iter, FILE_BATCH_LINES))
+            if not lines:
+                break
+
+            values = [value for value in map(_clean_line, lines) if value]
+            _, valid, converted = convert_values(values, target_format)
+
+            rows = []
+            for value, ok, result in zip(values, valid, converted):
+                if not ok:
+                    rows.append([value, '无法识别'])
+                    failed += 1
+                elif target_format == 'hex':
+                    rows.append([value, result])
+                else:
+                    rows.append([value, *result])
+            writer.writerows(rows)
+            total += len(values)
+
+    return total, failed
@@ -0,0 +1,143 @@
+# http_client.py - 下载图片和文件使用的HTTP连接池
+# 连接池在插件加载时创建，限制总连接数和每个主机的连接数，缓存DNS并复用keep-alive连接；
+# CDN偶发的连接错误和5xx/429响应按指数退避重试有限次数
+from __future__ import annotations
+import asyncio
+import time
+from .lazy import lazy_import
+
+aiohttp = lazy_import('aiohttp')
+
+# 需要重试的HTTP状态码
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+# create_session的默认参数，与配置项的默认值一致
+DEFAULT_OPTIONS = {
+    'limit': 32,
+    'limit_per_host': 8,
+    'dns_cache_ttl': 300,
+    'keepalive_timeout': 30.0,
+    'connect_timeout': 10.0,
+    'read_timeout': 30.0,
+    'total_timeout': 30.0,
+}
+
+
+class PoolStats:
+    """
+    通过aiohttp的TraceConfig统计连接池的使用情况
+    排队等待空闲连接的耗时记录到metrics的http_queue阶段
+    """
+
+    def __init__(self, metrics=None):
+        self.metrics = metrics
+        self.requests = 0
+        self.created = 0
+        self.reused = 0
+        self.queued = 0
+        self.retries = 0
+        self.failures = 0
+
+    def trace_config(self) -> aiohttp.TraceConfig:
+        trace = aiohttp.TraceConfig()
+        trace.on_request_start.append(self._on_request_start)
+        trace.on_connection_create_end.append(self._on_connection_create_end)
+        trace.on_connection_reuseconn.append(self._on_connection_reuseconn)
+        trace.on_connection_queued_start.append(self._on_queued_start)
+        trace.on_connection_queued_end.append(self._on_queued_end)
+        return trace
+
+    async def _on_request_start(self, session, ctx, params):
+        self.requests += 1
+
+    async def _on_connection_create_end(self, session, ctx, params):
+        self.created += 1
+
+    async def _on_connection_reuseconn(self, session, ctx, params):
+        self.reused += 1
+
+    async def _on_queued_start(self, session, ctx, params):
+        self.queued += 1
+        ctx.queued_at = time.perf_counter()
+
+    async def _on_queued_end(self, session, ctx, params):
+        queued_at = getattr(ctx, 'queued_at', None)
+        if self.metrics is not None and queued_at is not None:
+            self.metrics.record('http_queue', (time.perf_counter() - queued_at) * 1000)
+
+    def reset(self):
+        self.requests = 0
+        self.created = 0
+        self.reused = 0
+        self.queued = 0
+        self.retries = 0
+        self.failures = 0
+
+    def snapshot(self, session: aiohttp.ClientSession | None = None) -> dict:
+        """返回统计信息，传入session时同时返回连接池上限"""
+        stats = {
+            'requests': self.requests,
+            'connections_created': self.created,
+            'connections_reused': self.reused,
+            'queued': self.queued,
+            'retries': self.retries,
+            'failures': self.failures,
+        }
+        if session is not None and not session.closed:
+            connector = session.connector
+            stats['limit'] = connector.limit
+            stats['limit_per_host'] = connector.limit_per_host
+        return stats
+
+
+def create_session(limit: int = 32, limit_per_host: int = 8, dns_cache_ttl: int = 300,
+                   keepalive_timeout: float = 30.0, connect_timeout: float = 10.0,
+                   read_timeout: float = 30.0, total_timeout: float = 30.0,
+                   stats: PoolStats | None = None) -> aiohttp.ClientSession:
+    """
+    创建共享的ClientSession，必须在事件循环中调用
+    limit / limit_per_host: 总连接数和每个主机的连接数上限，0表示不限制
+    dns_cache_ttl: DNS解析结果缓存秒数，0表示不缓存
+    connect_timeout: 等待空闲连接和建立连接的总时间；read_timeout: 两次读取数据之间的最长间隔
+    total_timeout: 每次请求从发出到读完响应的总时间，避免服务器缓慢地逐字节发送时长时间占用连接和任务名额
+    """
+    connector = aiohttp.TCPConnector(
+        limit=limit,
+        limit_per_host=limit_per_host,
+        ttl_dns_cache=dns_cache_ttl or None,
+        use_dns_cache=dns_cache_ttl > 0,
+        keepalive_timeout=keepalive_timeout,
+    )
+    timeout = aiohttp.ClientTimeout(total=total_timeout, connect=connect_timeout, sock_read=read_timeout)
+    trace_configs = [stats.trace_config()] if stats is not None else None
+    return aiohttp.ClientSession(connector=connector, timeout=timeout, trace_configs=trace_configs)
+
+
+async def get_with_retry(session: aiohttp.ClientSession, url: str, retries: int = 2,
+                         backoff: float = 0.5, stats: PoolStats | None = None) -> aiohttp.ClientResponse:
+    """
+    发送GET请求，连接错误、超时和RETRY_STATUSES中的状态码最多重试retries次，
+    第n次重试前等待 backoff * 2^(n-1) 秒
+    返回的响应需要由调用方用 async with 释放；重试用尽时返回最后一次的响应或抛出最后一次的异常
+    """
+    for attempt in range(retries + 1):
+        last_attempt = attempt == retries
+        try:
+            resp = await session.get(url)
+        except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+            if last_attempt:
+                if stats is not None:
+                    stats.failures += 1
+                raise
+        else:
+            if resp.status not in RETRY_STATUSES:
+                return resp
+            if last_attempt:
+                if stats is not None:
+                    stats.failures += 1
+                return resp
+            resp.release()
+
+        if stats is not None:
+            stats.retries += 1
+        await asyncio.sleep(backoff * 2 ** attempt)
@@ -0,0 +1,608 @@
+# imaging.py - 图片解码、取色、色板分析与渲染
+# 这里的函数都是纯同步的顶层函数，不依赖插件实例，
+# 以便在线程池或进程池中执行，不阻塞AstrBot的事件循环
+# numpy和Pillow在首次调用图片函数时才导入，导入本模块本身很快
+from __future__ import annotations
+import math
+from io import BytesIO
+from . import quantizers
+from .lazy import lazy_import
+from .metrics import NULL_TIMER
+
+np = lazy_import('numpy')
+Image = lazy_import('PIL.Image')
+ImageDraw = lazy_import('PIL.ImageDraw')
+ImageFont = lazy_import('PIL.ImageFont')
+ImageSequence = lazy_import('PIL.ImageSequence')
+
+# 色板分析使用的颜色组数量 (每通道8级)
+BUCKET_COUNT = 512
+
+# 色板分析缩放时可选的重采样方法，从快到慢、质量从低到高
+RESAMPLE_METHODS = {
+    'nearest': 'NEAREST',
+    'box': 'BOX',
+    'bilinear': 'BILINEAR',
+    'lanczos': 'LANCZOS',
+}
+
+# 动图的采样方式: even 按帧序号均匀采样，每帧权重相同；
+# duration 同样均匀采样，但每个采样帧按它所代表的各帧（到下一个采样帧为止）的显示时长加权
+FRAME_SAMPLING = ('even', 'duration')
+
+# 帧时长缺失或不超过10ms时按100ms计算，与浏览器的处理方式一致
+DEFAULT_FRAME_DURATION = 100
+
+
+# ftyp之后的主品牌，只有这些是图片，其余（isom、mp42、qt等）是视频
+HEIF_BRANDS = frozenset((b'avif', b'avis', b'heic', b'heix', b'mif1', b'msf1'))
+
+# BMP的DIB信息头大小: BITMAPCOREHEADER、BITMAPINFOHEADER、V2、V3、OS/2 V2、V4、V5
+BMP_DIB_HEADER_SIZES = frozenset((12, 40, 52, 56, 64, 108, 124))
+
+
+def _is_bmp_header(head: bytes) -> bool:
+    """检查BMP文件头的DIB信息头大小，以及文件大小字段（0或不小于两个文件头之和）"""
+    if len(head) < 18:
+        return False
+    file_size = int.from_bytes(head[2:6], 'little')
+    dib_size = int.from_bytes(head[14:18], 'little')
+    return dib_size in BMP_DIB_HEADER_SIZES and (file_size == 0 or file_size >= 14 + dib_size)
+
+
+def _is_heif_header(head: bytes) -> bool:
+    """检查ftyp的主品牌是否是AVIF/HEIF图片"""
+    return head[8:12] in HEIF_BRANDS
+
+
+# 常见图片格式的文件头: (偏移, 魔数, 额外检查)，额外检查为None时只比较魔数
+# BMP的"BM"和ISO BMFF的"ftyp"太容易误判（后者也是MP4/MOV的文件头），需要再检查后面的字段
+IMAGE_SIGNATURES = (
+    (0, b'\x89PNG\r\n\x1a\n', None),  # PNG
+    (0, b'\xff\xd8\xff', None),  # JPEG
+    (0, b'GIF87a', None),
+    (0, b'GIF89a', None),
+    (8, b'WEBP', None),  # RIFF....WEBP
+    (0, b'BM', _is_bmp_header),  # BMP
+    (0, b'II*\x00', None),  # TIFF (小端)
+    (0, b'MM\x00*', None),  # TIFF (大端)
+    (0, b'\x00\x00\x01\x00', None),  # ICO
+    (4, b'ftyp', _is_heif_header),  # AVIF/HEIF
+)
+
+
+def sniff_image_header(head: bytes) -> bool:
+    """
+    根据下载到的前几KB判断内容是否是图片
+    先匹配常见格式的魔数，不认识的再交给Pillow只解析文件头
+    """
+    for offset, magic, check in IMAGE_SIGNATURES:
+        if head[offset:offset + len(magic)] == magic:
+            if check is None or check(head):
+                return True
+            break
+    try:
+        Image.open(BytesIO(head))
+        return True
+    except Exception:
+        return False
+
+
+def pick_pixels(image_bytes: bytes, points: list, timer=NULL_TIMER) -> tuple[tuple, list | None]:
+    """
+    一次解码读取图片上多个坐标的颜色
+    先只读取文件头检查坐标范围，再只裁剪并转换包含所有坐标的最小区域
+    返回: (图片尺寸, RGB元组列表)，有坐标超出范围时RGB元组列表为None
+    """
+    image = Image.open(BytesIO(image_bytes))
+    width, height = image.size
+
+    if any(x < 0 or x >= width or y < 0 or y >= height for x, y in points):
+        return (width, height), None
+
+    left = min(x for x, _ in points)
+    top = min(y for _, y in points)
+    right = max(x for x, _ in points) + 1
+    bottom = max(y for _, y in points) + 1
+
+    with timer.stage('decode', len(image_bytes)):
+        region = image.crop((left, top, right, bottom))
+        if region.mode != 'RGB':
+            region = region.convert('RGB')
+
+    return (width, height), [region.getpixel((x - left, y - top)) for x, y in points]
+
+
+def load_for_analysis(image_bytes: bytes, max_dimension: int = 400, resample: str = 'lanczos',
+                      timer=NULL_TIMER, region: tuple | None = None) -> Image.Image:
+    """
+    以接近目标尺寸的分辨率解码图片，返回最长边不超过max_dimension的RGB图片
+    JPEG使用draft在解码时直接按1/2、1/4、1/8缩小；其他格式先整数倍reduce再重采样
+    region: 只分析的矩形(left, top, right, bottom)，调用方需保证在图片范围内。
+    目标尺寸按区域大小计算，JPEG按区域需要的缩小比例draft后再裁剪；
+    其他格式先裁剪再转换和缩放，转换和缩放的开销只与区域大小有关
+    """
+    with timer.stage('decode', len(image_bytes)):
+        image = Image.open(BytesIO(image_bytes))
+        width, height = image.size
+        if region is None:
+            region = (0, 0, width, height)
+        left, top, right, bottom = region
+        region_size = (right - left, bottom - top)
+
+        new_size = _target_size(*region_size, max_dimension)
+        need_resize = new_size != region_size
+        if need_resize and image.format == 'JPEG':
+            # draft保证解码尺寸不小于请求的尺寸，按区域的缩小比例换算整张图片需要的尺寸
+            image.draft('RGB', (math.ceil(width * new_size[0] / region_size[0]),
+                                math.ceil(height * new_size[1] / region_size[1])))
+
+        if region_size != (width, height):
+            # draft之后解码尺寸可能已经缩小，裁剪区域按同样比例换算
+            scale_x, scale_y = image.width / width, image.height / height
+            box = (int(left * scale_x), int(top * scale_y),
+                   max(math.ceil(right * scale_x), int(left * scale_x) + 1),
+                   max(math.ceil(bottom * scale_y), int(top * scale_y) + 1))
+            image = image.crop(box)
+            need_resize = new_size != image.size
+        image.load()
+
+    with timer.stage('resize'):
+        if image.mode != 'RGB':
+            image = image.convert('RGB')
+
+        # 如果图片太大，缩小以加快处理速度
+        if need_resize:
+            # reducing_gap让Pillow先用reduce做整数倍缩小，再用指定方法重采样到目标尺寸
+            image = image.resize(new_size, _resample_filter(resample), reducing_gap=2.0)
+
+    return image
+
+
+def _target_size(width: int, height: int, max_dimension: int) -> tuple[int, int]:
+    """最长边不超过max_dimension时的尺寸，本来就不超过时返回原尺寸"""
+    if width <= max_dimension and height <= max_dimension:
+        return width, height
+    scale = max_dimension / max(width, height)
+    return max(1, int(width * scale)), max(1, int(height * scale))
+
+
+def _resample_filter(resample: str):
+    return getattr(Image.Resampling, RESAMPLE_METHODS.get(resample, 'LANCZOS'))
+
+
+def analyze_palette(image_bytes: bytes, num_colors: int | None = 5, max_dimension: int = 400,
+                    resample: str = 'lanczos', algorithm: str = 'bucket', max_frames: int = 1,
+                    frame_sampling: str = 'even', region: tuple | None = None,
+                    timer=NULL_TIMER) -> tuple[list | None, list | None, tuple, tuple | None]:
+    """
+    分析图片色板，找出比例最高的几种颜色
+    algorithm: 量化算法，见quantizers.ALGORITHMS
+    num_colors为None时，bucket返回全部颜色组（已按占比排序），便于缓存后按需截取；
+    其他算法量化为最多10种颜色
+    max_frames: 动图最多采样的帧数，为1时只分析第一帧；frame_sampling见FRAME_SAMPLING
+    region: 只分析的矩形(left, top, right, bottom)，不包括right和bottom
+    返回: (颜色列表, 百分比列表, 图片尺寸, 动图的(采样帧数, 总帧数)，静态图片为None)
+    图片尺寸总是整张图片解码后的原始尺寸，不是缩小后用于统计的尺寸；区域超出图片范围时颜色列表和百分比列表为None
+    """
+    # 只读取文件头，得到原始尺寸和帧数
+    image = Image.open(BytesIO(image_bytes))
+    size = image.size
+    if region is not None:
+        left, top, right, bottom = region
+        if not (0 <= left < right <= size[0] and 0 <= top < bottom <= size[1]):
+            return None, None, size, None
+    if max_frames > 1 and getattr(image, 'is_animated', False):
+        colors, percentages, _, frames = analyze_frames(
+            image, num_colors, max_dimension, resample, algorithm,
+            max_frames, frame_sampling, len(image_bytes), timer, region
+        )
+        return colors, percentages, size, frames
+
+    image = load_for_analysis(image_bytes, max_dimension, resample, timer, region)
+
+    with timer.stage('quantize'):
+        if algorithm == 'bucket':
+            rgb_colors, percentages = top_buckets(np.asarray(image), num_colors)
+        else:
+            num_colors = max(1, min(num_colors or 10, 10))
+            rgb_colors, percentages = quantizers.quantize(image, num_colors, algorithm)
+    return rgb_colors, percentages, size, None
+
+
+def sample_frame_indices(n_frames: int, max_frames: int) -> list:
+    """在n_frames帧中均匀选取最多max_frames帧（包括第一帧），返回升序的帧序号"""
+    count = max(1, min(max_frames, n_frames))
+    return [i * n_frames // count for i in range(count)]
+
+
+def _frame_duration(frame) -> int:
+    duration = frame.info.get('duration') or 0
+    return int(duration) if duration > 10 else DEFAULT_FRAME_DURATION
+
+
+def analyze_frames(image: Image.Image, num_colors: int | None, max_dimension: int, resample: str,
+                   algorithm: str, max_frames: int, frame_sampling: str, nbytes: int = 0,
+                   timer=NULL_TIMER, region: tuple | None = None) -> tuple[list, list, tuple, tuple]:
+    """
+    按帧流式分析动图（GIF/WebP/APNG）的色板，同一时间只保留一帧
+    bucket: 每个采样帧统计颜色组后按权重累加到总的直方图中，内存占用与帧数无关
+    其他算法: 采样帧缩小后拼成一张总像素数与单帧相当的图片再量化，不按帧时长加权
+    每个采样帧的解码(包括跳过的帧)、缩放和统计耗时分别记录为frame_decode、frame_resize、frame_histogram
+    region: 只分析的矩形，每帧先裁剪再转换和缩放
+    返回: 同analyze_palette，最后一项为(采样帧数, 总帧数)
+    """
+    n_frames = image.n_frames
+    indices = sample_frame_indices(n_frames, max_frames)
+    if region is None:
+        region = (0, 0, *image.size)
+    frame_size = _target_size(region[2] - region[0], region[3] - region[1], max_dimension)
+    resample_filter = _resample_filter(resample)
+    by_duration = frame_sampling == 'duration'
+
+    if algorithm == 'bucket':
+        counts = np.zeros(BUCKET_COUNT, dtype=np.int64)
+        sums = np.zeros((BUCKET_COUNT, 3), dtype=np.int64)
+        first_seen = np.full(BUCKET_COUNT, np.iinfo(np.int64).max, dtype=np.int64)
+        seen_pixels = 0
+        montage = None
+    else:
+        # 拼图中每帧缩小到1/sqrt(采样帧数)，拼图的总像素数与单帧相当
+        scale = 1 / len(indices) ** 0.5
+        tile_size = (max(1, int(frame_size[0] * scale)), max(1, int(frame_size[1] * scale)))
+        montage = Image.new('RGB', (tile_size[0], tile_size[1] * len(indices)))
+
+    # 最近一个采样帧的直方图，它代表的帧都读完（知道总时长）后才累加
+    pending = None
+    pending_weight = 0
+
+    def flush():
+        nonlocal seen_pixels
+        frame_counts, frame_sums, frame_first, pixels = pending
+        weight = pending_weight if by_duration else 1
+        counts[:] += frame_counts * weight
+        sums[:] += frame_sums * weight
+        seen = frame_counts > 0
+        first_seen[seen] = np.minimum(first_seen[seen], frame_first[seen] + seen_pixels)
+        seen_pixels += pixels
+
+    frames = ImageSequence.Iterator(image)
+    position = -1
+    for ordinal, index in enumerate(indices):
+        with timer.stage('frame_decode', nbytes if ordinal == 0 else 0):
+            while position < index:
+                frame = next(frames)
+                position += 1
+                if position < index:
+                    pending_weight += _frame_duration(frame)
+            frame.load()
+
+        with timer.stage('frame_resize'):
+            rgb = frame.crop(region) if region != (0, 0, *frame.size) else frame
+            rgb = rgb.convert('RGB')
+            if montage is not None:
+                rgb = rgb.resize(tile_size, resample_filter, reducing_gap=2.0)
+            elif rgb.size != frame_size:
+                rgb = rgb.resize(frame_size, resample_filter, reducing_gap=2.0)
+
+        with timer.stage('frame_histogram'):
+            if montage is not None:
+                montage.paste(rgb, (0, tile_size[1] * ordinal))
+            else:
+                if pending is not None:
+                    flush()
+                pixels = np.asarray(rgb)
+                pending = (*bucket_histogram(pixels), pixels.shape[0] * pixels.shape[1])
+                pending_weight = _frame_duration(frame)
+
+    with timer.stage('quantize'):
+        if montage is not None:
+            num_colors = max(1, min(num_colors or 10, 10))
+            rgb_colors, percentages = quantizers.quantize(montage, num_colors, algorithm)
+        else:
+            # 按时长加权时读完剩余的帧，最后一个采样帧代表到动图结束为止的所有帧
+            if by_duration:
+                for frame in frames:
+                    pending_weight += _frame_duration(frame)
+            flush()
+            rgb_colors, percentages = top_from_histogram(counts, sums, np.minimum(first_seen, seen_pixels),
+                                                         num_colors)
+    return rgb_colors, percentages, frame_size, (len(indices), n_frames)
+
+
+def bucket_histogram(pixels: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    将像素量化到8x8x8的立方体 (512个颜色组)，批量统计每组的像素数和各通道之和
+    pixels: 形状为(..., 3)的uint8数组
+    返回: (计数数组, 通道和数组(512x3), 首次出现位置数组)
+    """
+    flat = pixels.reshape(-1, 3)
+    n = flat.shape[0]
+
+    # 每通道取高3位，打包成9位的组索引: rrrgggbbb
+    q = flat >> 5
+    idx = (q[:, 0].astype(np.intp) << 6) | (q[:, 1].astype(np.intp) << 3) | q[:, 2]
+
+    counts = np.bincount(idx, minlength=BUCKET_COUNT)
+    sums = np.stack(
+        [np.bincount(idx, weights=flat[:, c], minlength=BUCKET_COUNT) for c in range(3)],
+        axis=1
+    ).astype(np.int64)
+
+    # 记录每组第一次出现的像素位置，用于在数量相同时保持原来按出现顺序排列的结果
+    first_seen = np.full(BUCKET_COUNT, n, dtype=np.int64)
+    np.minimum.at(first_seen, idx, np.arange(n, dtype=np.int64))
+
+    return counts, sums, first_seen
+
+
+def top_buckets(pixels: np.ndarray, num_colors: int | None) -> tuple[list, list]:
+    """
+    统计颜色组并取占比最高的几组，num_colors为None时返回全部非空的组
+    返回: (平均颜色列表, 百分比列表)，数量相同的组按首次出现顺序排列
+    """
+    return top_from_histogram(*bucket_histogram(pixels), num_colors)
+
+
+def top_from_histogram(counts: np.ndarray, sums: np.ndarray, first_seen: np.ndarray,
+                       num_colors: int | None) -> tuple[list, list]:
+    """
+    从bucket_histogram格式的直方图（可以是多帧加权累加的结果）中取占比最高的几组
+    返回: 同top_buckets
+    """
+    total_pixels = int(counts.sum())
+    if total_pixels == 0:
+        return [], []
+
+    # 数量降序，数量相同时首次出现位置升序；空组排在最后
+    used = int(np.count_nonzero(counts))
+    top = np.lexsort((first_seen, -counts))[:used]
+    if num_colors is not None:
+        # 限制返回的颜色数量
+        num_colors = max(1, min(num_colors, 10))  # 限制在1-10之间
+        top = top[:num_colors]
+
+    # 计算每个颜色组的平均颜色和百分比
+    averages = sums[top] // counts[top, None]
+    rgb_colors = [tuple(int(v) for v in avg) for avg in averages]
+    percentages = [(int(counts[i]) / total_pixels) * 100 for i in top]
+
+    return rgb_colors, percentages
+
+
+def encode_png(image: Image.Image, compress_level: int = 6, palette: bool = False,
+               timer=NULL_TIMER) -> bytes:
+    """
+    将渲染结果编码为PNG
+    compress_level: zlib压缩级别0-9，越小编码越快、文件越大
+    palette: 是否先转换为256色调色板图片，色块图颜色很少，转换后文件更小；已经是调色板图片时忽略
+    """
+    with timer.stage('encode'):
+        if palette and image.mode != 'P':
+            image = image.quantize(colors=256, method=Image.Quantize.FASTOCTREE)
+        bio = BytesIO()
+        image.save(bio, format='PNG', compress_level=compress_level)
+    return bio.getvalue()
+
+
+# 色块边框颜色
+BORDER_COLOR = (200, 200, 200)
+
+# 预先加载的默认字体，避免每次绘制文字时重新加载
+_font = None
+
+
+def _get_font():
+    """获取默认字体（首次调用时加载）"""
+    global _font
+    if _font is None:
+        _font = ImageFont.load_default()
+    return _font
+
+
+# 色块图上的16进制值、百分比和坐标标签只用到这些字符
+GLYPH_CHARS = '#0123456789ABCDEF.%(),'
+
+# 预先渲染的字形，见_get_glyphs
+_glyphs = None
+
+
+def _get_glyphs():
+    """
+    预先渲染GLYPH_CHARS中每个字符的灰度字形（首次调用时渲染）
+    返回: ({字符: (字形数组, 相对笔位置的x偏移, 相对基线的y偏移, 步进宽度)}, 基线相对文字中线的y偏移)，
+    字体不是FreeType字体时返回None
+    """
+    global _glyphs
+    if _glyphs is None:
+        font = _get_font()
+        if not isinstance(font, ImageFont.FreeTypeFont):
+            _glyphs = False
+            return None
+        glyphs = {}
+        for char in GLYPH_CHARS:
+            left, top, right, bottom = font.getbbox(char, anchor="ls")
+            tile = Image.new('L', (max(1, right - left), max(1, bottom - top)), 0)
+            ImageDraw.Draw(tile).text((-left, -top), char, fill=255, font=font, anchor="ls")
+            glyphs[char] = (np.asarray(tile, dtype=np.uint16), left, top, font.getlength(char))
+        baseline = font.getbbox("0", anchor="mm")[1] - font.getbbox("0", anchor="ls")[1]
+        _glyphs = (glyphs, baseline)
+    return _glyphs or None
+
+
+def _layout_text(x: int, y: int, text: str):
+    """
+    用预先渲染的字形排版以(x, y)为中心的文字
+    返回: (整段文字的灰度数组, 左上角x, 左上角y)，文字含GLYPH_CHARS以外的字符或字体不支持时返回None
+    """
+    atlas = _get_glyphs()
+    if atlas is None:
+        return None
+    glyphs, baseline = atlas
+    try:
+        chars = [glyphs[char] for char in text]
+    except KeyError:
+        return None
+
+    # 按笔位置逐个放置字形，重叠处取较大的灰度
+    pen = x - sum(advance for *_, advance in chars) / 2
+    base = math.floor(y + baseline)
+    placed = []
+    for mask, dx, dy, advance in chars:
+        placed.append((mask, math.floor(pen) + dx, base + dy))
+        pen += advance
+    left = min(gx for _, gx, _ in placed)
+    top = min(gy for _, _, gy in placed)
+    right = max(gx + mask.shape[1] for mask, gx, _ in placed)
+    bottom = max(gy + mask.shape[0] for mask, _, gy in placed)
+    alpha = np.zeros((bottom - top, right - left), dtype=np.uint16)
+    for mask, gx, gy in placed:
+        tile = alpha[gy - top:gy - top + mask.shape[0], gx - left:gx - left + mask.shape[1]]
+        np.maximum(tile, mask, out=tile)
+    return alpha, left, top
+
+
+# 调色板模式下文字抗锯齿灰度量化的级数，每种(背景, 文字颜色)组合占用这么多个调色板颜色
+TEXT_ALPHA_LEVELS = 15
+
+
+def _render_indexed(width: int, height: int, boxes: list, colors: list, texts: list, layouts: list):
+    """
+    直接在调色板索引画布上绘制色块图，返回P模式图片
+    调色板依次为白色、边框色、各颜色块的颜色，之后每种(背景, 文字颜色)组合占用TEXT_ALPHA_LEVELS个过渡色；
+    颜色块较多、调色板放不下时返回None
+    """
+    palette = [(255, 255, 255), BORDER_COLOR, *(tuple(color) for color in colors)]
+    ramps = {(background, fill) for _, _, _, fill, background in texts}
+    if len(palette) + len(ramps) * TEXT_ALPHA_LEVELS > 256:
+        return None
+
+    canvas = np.zeros((height, width), dtype=np.uint8)
+    for i, (x1, y1, x2, y2, inner) in enumerate(boxes):
+        canvas[y1:y2 + 1, x1:x2 + 1] = 1
+        canvas[y1 + inner:y2 + 1 - inner, x1 + inner:x2 + 1 - inner] = 2 + i
+
+    levels = TEXT_ALPHA_LEVELS
+    ramps = {}
+    for (_, _, _, fill, background), (alpha, left, top) in zip(texts, layouts):
+        start = ramps.get((background, fill))
+        if start is None:
+            # 第k个过渡色是文字颜色以k/levels的不透明度叠加在背景上的结果
+            start = ramps[background, fill] = len(palette)
+            palette.extend(
+                tuple((bg * (levels - k) + fg * k + levels // 2) // levels
+                      for bg, fg in zip(palette[background], fill))
+                for k in range(1, levels + 1)
+            )
+
+        x0, y0 = max(left, 0), max(top, 0)
+        x1, y1 = min(left + alpha.shape[1], width), min(top + alpha.shape[0], height)
+        if x0 < x1 and y0 < y1:
+            level = (alpha[y0 - top:y1 - top, x0 - left:x1 - left] * levels + 127) // 255
+            np.copyto(canvas[y0:y1, x0:x1], level + (start - 1), where=level > 0, casting='unsafe')
+
+    image = Image.fromarray(canvas, 'P')
+    image.putpalette([channel for color in palette for channel in color])
+    return image
+
+
+def _text_color(r: int, g: int, b: int) -> tuple:
+    """根据背景色亮度选择黑色或白色文字"""
+    return (255, 255, 255) if (r*0.299 + g*0.587 + b*0.114) < 128 else (0, 0, 0)
+
+
+def render_preview(r: int, g: int, b: int, timer=NULL_TIMER, **png_options) -> bytes:
+    """创建颜色预览小图，返回PNG字节"""
+    with timer.stage('render'):
+        # 创建100x100的图片
+        size = 100
+        image = Image.new('RGB', (size, size), (r, g, b))
+
+        # 添加边框
+        draw = ImageDraw.Draw(image)
+        border_width = 2
+        draw.rectangle(
+            [0, 0, size-1, size-1],
+            outline=BORDER_COLOR,
+            width=border_width
+        )
+
+        # 添加文本标签
+        draw.text(
+            (size//2, size//2),
+            f"#{r:02x}{g:02x}{b:02x}".upper(),
+            fill=_text_color(r, g, b),
+            font=_get_font(),
+            anchor="mm"
+        )
+
+    return encode_png(image, timer=timer, **png_options)
+
+
+def render_palette(colors: list, percentages: list, timer=NULL_TIMER, **png_options) -> bytes:
+    """创建色板预览图，返回PNG字节"""
+    # 参数检查
+    if not colors or not percentages or len(colors) != len(percentages):
+        raise ValueError("颜色列表和百分比列表必须长度相同且不为空")
+
+    labels = [f"{percentage:.1f}%" for percentage in percentages]
+    return render_swatch_strip(colors, labels, timer=timer, **png_options)
+
+
+def render_swatch_strip(colors: list, labels: list, timer=NULL_TIMER, **png_options) -> bytes:
+    """
+    创建一排颜色块，每个颜色块下方显示对应的标签，返回PNG字节
+    文字都能用预先渲染的字形排版时直接生成调色板图片，编码比RGB图片快得多、文件也更小；
+    否则在RGB画布上按数组切片填充颜色块，再用ImageDraw绘制文字
+    """
+    # 参数检查
+    if not colors or not labels or len(colors) != len(labels):
+        raise ValueError("颜色列表和标签列表必须长度相同且不为空")
+
+    with timer.stage('render'):
+        # 色板参数
+        num_colors = len(colors)
+        color_height = 80  # 每个颜色块的高度
+        padding = 10
+        text_height = 30  # 文字区域高度
+        text_padding = 5
+        border_width = 2
+
+        # 计算图片尺寸
+        image_width = num_colors * color_height + (num_colors + 1) * padding
+        image_height = color_height + text_height + padding
+
+        # 颜色块位置：(x1, y1, x2, y2, 边框宽度)，与rectangle一样包含右下角像素
+        y1 = padding
+        y2 = y1 + color_height
+        boxes = []
+        for i in range(num_colors):
+            x1 = padding + i * (color_height + padding)
+            boxes.append((x1, y1, x1 + color_height, y2, border_width))
+
+        # 文字：(中心x, 中心y, 文字, 颜色, 背景在调色板中的索引)
+        texts = []
+        for i, (color, label) in enumerate(zip(colors, labels)):
+            x_center = boxes[i][0] + color_height // 2
+            r, g, b = color
+            texts.append((x_center, y1 + color_height // 2, f"#{r:02x}{g:02x}{b:02x}".upper(),
+                          _text_color(r, g, b), 2 + i))
+            texts.append((x_center, y2 + text_padding + text_height // 2, label, (0, 0, 0), 0))
+
+        image = None
+        layouts = [_layout_text(x, y, text) for x, y, text, _, _ in texts]
+        if all(layouts):
+            image = _render_indexed(image_width, image_height, boxes, colors, texts, layouts)
+
+        if image is None:
+            canvas = np.full((image_height, image_width, 3), 255, dtype=np.uint8)
+            for color, (x1, y1, x2, y2, inner) in zip(colors, boxes):
+                canvas[y1:y2 + 1, x1:x2 + 1] = BORDER_COLOR
+                canvas[y1 + inner:y2 + 1 - inner, x1 + inner:x2 + 1 - inner] = color
+            image = Image.fromarray(canvas, 'RGB')
+            draw = ImageDraw.Draw(image)
+            font = _get_font()
+            for x, y, text, fill, _ in texts:
+                draw.text((x, y), text, fill=fill, font=font, anchor="mm")
+
+    return encode_png(image, timer=timer, **png_options)
@@ -0,0 +1,58 @@
+# lazy.py - 重量级依赖的延迟导入
+# numpy、Pillow和aiohttp合计需要几百毫秒导入，只做颜色值转换时用不到；
+# 模块中用 np = lazy_import('numpy') 代替 import numpy as np，首次访问属性时才真正导入
+import importlib
+import sys
+import time
+
+
+class LazyModule:
+    """
+    模块代理，首次访问属性时导入模块
+    导入由importlib完成，多个线程同时首次访问时由导入锁保证只导入一次
+    """
+
+    __slots__ = ('_name', '_module')
+
+    def __init__(self, name: str):
+        self._name = name
+        self._module = sys.modules.get(name)
+
+    def __getattr__(self, attr: str):
+        module = self._module
+        if module is None:
+            module = self._module = importlib.import_module(self._name)
+        return getattr(module, attr)
+
+    @property
+    def loaded(self) -> bool:
+        return self._module is not None or self._name in sys.modules
+
+    def __repr__(self) -> str:
+        state = "已导入" if self.loaded else "未导入"
+        return f"<LazyModule {self._name} ({state})>"
+
+
+def lazy_import(name: str) -> LazyModule:
+    """返回模块name的延迟导入代理"""
+    return LazyModule(name)
+
+
+# 图片功能用到的重量级模块，以及下载用到的aiohttp；preload预先导入它们
+IMAGE_MODULES = ('numpy', 'PIL.Image', 'PIL.ImageDraw', 'PIL.ImageFont', 'PIL.features')
+HEAVY_MODULES = IMAGE_MODULES + ('aiohttp',)
+
+
+def preload(modules=HEAVY_MODULES) -> dict:
+    """
+    导入modules中尚未导入的模块，可以在后台线程中调用
+    返回: {模块名: 导入耗时(毫秒)}，已经导入的模块不计入
+    """
+    timings = {}
+    for name in modules:
+        if name in sys.modules:
+            continue
+        start = time.perf_counter()
+        importlib.import_module(name)
+        timings[name] = round((time.perf_counter() - start) * 1000, 1)
+    return timings
@@ -1,13 +1,54 @@
 # main.py - 颜色转换插件完整修复版本（添加色板分析功能）- 修复版
 import re
-import aiohttp
-from PIL import Image, ImageDraw
+import json
+import math
+import time
+import shutil
+import asyncio
+import tempfile
+from functools import partial
 from io import BytesIO
+from pathlib import Path
 from astrbot.api.event import filter, AstrMessageEvent
 from astrbot.api.star import Context, Star, register
+try:
+    from astrbot.api.star import StarTools
+except ImportError:  # 旧版本AstrBot没有StarTools，数据目录使用默认位置
+    StarTools = None
 from astrbot.api import logger, AstrBotConfig
 import astrbot.api.message_components as Comp
 from astrbot.api.message_components import Reply, Image as ImgComponent
+from . import imaging, conversion, quantizers, color_names, color_parser
+from .workers import ImageWorkerPool, BACKENDS as WORKER_BACKENDS
+from .caches import LRUCache, SingleFlight, content_hash
+from .metrics import Metrics, timed_call
+from .admission import AdmissionController, RateLimiter, acquire_all
+from .result_store import ResultStore
+from . import http_client
+from .lazy import IMAGE_MODULES, lazy_import, preload
+
+# numpy和aiohttp在首次使用取色、色板分析或下载功能时才导入，见lazy.py
+np = lazy_import('numpy')
+aiohttp = lazy_import('aiohttp')
+
+# 一条 color pick 命令最多支持的坐标数量
+MAX_PICK_POINTS = 10
+
+# 一条 color batch 命令最多支持的颜色数量
+MAX_BATCH_VALUES = 100
+
+# color file 生成的结果文件保留时间(秒)，超时后在下次转换时清理
+RESULT_FILE_TTL = 600
+
+# 插件名称，用于确定插件数据目录
+PLUGIN_NAME = "astrbot_plugin_color"
+
+# 磁盘缓存每个分析结果最多保存的颜色数量（color analyze 最多显示10种）
+STORED_PALETTE_COLORS = 10
+
+# 下载图片时每次读取的块大小，以及识别文件头前至少读取的字节数
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+DOWNLOAD_SNIFF_BYTES = 4096
 
 @register(
     "ColorConverter",
@@ -26,58 +67,303 @@ class ColorConverterPlugin(Star):
         self.private_whitelist = set()
         self.group_whitelist = set()
         
-        # 初始化HTTP会话
+        # 可以使用 color stats 的用户，为空时只允许机器人管理员
+        self.admin_whitelist = set()
+        
+        # 图片命令的并发上限、等待队列和限流配置（每分钟次数，0表示不限流）
+        self.image_max_concurrent = 4
+        self.image_queue_size = 8
+        self.image_queue_timeout = 30
+        self.group_rate_per_minute = 30
+        self.user_rate_per_minute = 10
+        self.rate_limit_burst = 3
+        
+        # HTTP会话在插件加载时创建，共用一个连接池
         self.session = None
         
+        # HTTP连接池配置：总连接数、每个主机的连接数、DNS缓存秒数、空闲连接保持秒数、
+        # 连接超时和读取超时秒数，以及连接错误/5xx/429时的重试次数
+        self.http_options = dict(http_client.DEFAULT_OPTIONS)
+        self.http_retries = 2
+        
+        # color file 使用的临时目录，首次使用时创建
+        self.file_tmp_dir = None
+        
+        # 图片处理工作池配置
+        self.worker_backend = 'thread'
+        self.worker_count = 2
+        
+        # 色板分析前图片缩放到的最大边长和重采样方法
+        self.analyze_max_dimension = 400
+        self.analyze_resample = 'lanczos'
+        
+        # 色板分析默认使用的量化算法
+        self.analyze_algorithm = 'bucket'
+        
+        # 动图最多采样的帧数(1表示只分析第一帧)和采样方式
+        self.analyze_max_frames = 8
+        self.analyze_frame_sampling = 'even'
+        
+        # 单张图片的下载大小上限(MB)
+        self.download_max_mb = 20
+        
+        # 图片下载缓存配置
+        self.download_cache_mb = 32
+        self.download_cache_ttl = 600
+        
+        # 色板分析结果缓存条目数
+        self.analyze_cache_entries = 256
+        
+        # 色板分析结果磁盘缓存容量(MB)，0表示不使用磁盘缓存
+        self.result_store_mb = 64
+        
+        # 预览图PNG编码参数和缓存条目数
+        self.png_options = {'compress_level': 6, 'palette': False}
+        self.preview_cache_entries = 512
+        
+        # 阶段耗时统计配置，日志间隔为0时不定期输出统计日志
+        self.metrics_enabled = True
+        self.metrics_log_interval = 0
+        self._metrics_log_task = None
+        
+        # 插件加载后是否在后台预先导入图片功能的依赖（numpy、Pillow）；HTTP连接池总是在加载后创建
+        self.warmup_imports = True
+        self._warmup_task = None
+        self._session_task = None
+        
         # 加载配置
         self._load_config()
         
-        # 更新帮助信息，包含取色器和色板分析功能
-        self.help_text = (
-            "=== 颜色值转换插件帮助 ===\n"
-            "【颜色转换命令】\n"
-            "格式: color <目标格式> <颜色值>\n"
-            "  » 示例: color rgb 72C0FF\n"
-            "  » 示例: color cmyk 114,166,255\n"
-            "  » 示例: color hex 55,35,0,0\n\n"
-            
-            "【参数说明】\n"
-            " <目标格式>: 想要转换成的格式，可选值: rgb hex cmyk\n"
-            " <颜色值>: 现有的颜色值，支持以下格式:\n"
-            "   - 16进制: 3位或6位16进制数，不需要#\n"
-            "      示例: F00 (红色) 或 FF0000 (红色)\n"
-            "   - RGB: 3个0-255的数字，用逗号分隔\n"
-            "      示例: 255,0,0 (红色)\n"
-            "   - CMYK: 4个0-100的数字，用逗号分隔\n"
-            "      示例: 0,100,100,0 (红色)\n\n"
-            
-            "【取色器命令】\n"
-            "格式: color pick <坐标> （需要引用一张图片）\n"
-            "  » 示例: （引用图片）color pick 1490,532\n"
-            "  说明: 引用一张图片，回复该图片上指定坐标(x,y)的颜色值\n"
-            "  坐标格式: x,y (例如: 1490,532)\n\n"
-            
-            "【色板分析命令】\n"
-            "格式: color analyze [颜色数量] （需要引用一张图片）\n"
-            "  » 示例: （引用图片）color analyze\n"
-            "  » 示例: （引用图片）color analyze 8\n"
-            "  说明: 分析图片中的主要颜色，生成色板\n"
-            "  颜色数量: 可选，默认5种，范围1-10\n\n"
-            
-            "【帮助命令】colorhelp：显示此帮助信息"
+        # 初始化图片处理工作池（解码、色板分析、PNG编码都在工作池中执行）
+        self.image_workers = ImageWorkerPool(self.worker_backend, self.worker_count)
+        
+        # 已下载图片的缓存（按URL），同一张图片重复取色/分析时不再重新下载
+        self.download_cache = LRUCache(
+            max_bytes=self.download_cache_mb * 1024 * 1024,
+            ttl=self.download_cache_ttl
+        )
+        
+        # 色板分析结果缓存（按图片内容哈希和分析参数），保存全部排序后的颜色组，
+        # 不同的颜色数量直接截取，不再重新量化
+        self.analyze_cache = LRUCache(max_entries=self.analyze_cache_entries)
+        
+        # 色板分析结果的磁盘缓存，插件重启后仍然有效；数据库在首次分析时才打开
+        self.result_store = ResultStore(self._get_data_dir() / "palette_results.db",
+                                        self.result_store_mb * 1024 * 1024)
+        
+        # 取色预览图缓存（按RGB），预览图只与颜色有关
+        self.preview_cache = LRUCache(max_entries=self.preview_cache_entries)
+        
+        # 色板图和色块条缓存（按颜色和标签）
+        self.strip_cache = LRUCache(max_entries=self.preview_cache_entries)
+        
+        # 进行中的下载（按URL）和色板分析（按缓存键），相同请求只执行一次
+        self.download_flight = SingleFlight()
+        self.analyze_flight = SingleFlight()
+        
+        # 图片命令的准入控制和限流
+        self.admission = AdmissionController(
+            self.image_max_concurrent, self.image_queue_size, self.image_queue_timeout
         )
+        self.group_rate_limiter = RateLimiter(self.group_rate_per_minute, self.rate_limit_burst)
+        self.user_rate_limiter = RateLimiter(self.user_rate_per_minute, self.rate_limit_burst)
+        
+        # 各处理阶段的耗时统计（下载、解码、缩放、量化、绘制、编码和整条命令）
+        self.metrics = Metrics(self.metrics_enabled)
+        
+        # HTTP连接池使用情况统计，等待空闲连接的耗时记录到http_queue阶段
+        self.http_stats = http_client.PoolStats(self.metrics)
+        
+        # 帮助信息在首次查看帮助时生成，不在加载插件时生成
+        self._help_text = None
+    
+    @property
+    def help_text(self) -> str:
+        """帮助信息，首次查看帮助时生成"""
+        if self._help_text is None:
+            self._help_text = (
+                "=== 颜色值转换插件帮助 ===\n"
+                "【颜色转换命令】\n"
+                "格式: color <目标格式> <颜色值>\n"
+                "  » 示例: color rgb 72C0FF\n"
+                "  » 示例: color cmyk 114,166,255\n"
+                "  » 示例: color hex 55,35,0,0\n"
+                "  » 示例: color lab 72C0FF\n\n"
+            
+                "【参数说明】\n"
+                " <目标格式>: 想要转换成的格式，可选值: rgb hex cmyk hsl hsv lab\n"
+                " <颜色值>: 现有的颜色值，支持以下格式:\n"
+                "   - 16进制: 3/4/6/8位16进制数，可以带#\n"
+                "      示例: F00 (红色) 或 #FF0000 (红色)\n"
+                "   - RGB: 3个0-255的数字，用逗号或空格分隔，也可以写成rgb()\n"
+                "      示例: 255,0,0 或 rgb(255 0 0) (红色)\n"
+                "   - CMYK: 4个0-100的数字，用逗号或空格分隔，也可以写成cmyk()，或CSS的device-cmyk()（不带%的数值为0-1）\n"
+                "      示例: 0,100,100,0 (红色)\n"
+                "   - HSL: hsl(色相, 饱和度%, 亮度%)\n"
+                "      示例: hsl(0, 100%, 50%) (红色)\n\n"
+            
+                "【取色器命令】\n"
+                "格式: color pick <坐标> [坐标...] （需要引用一张图片）\n"
+                "  » 示例: （引用图片）color pick 1490,532\n"
+                "  » 示例: （引用图片）color pick 10,20 300,40 1490,532\n"
+                "  说明: 引用一张图片，回复该图片上指定坐标(x,y)的颜色值\n"
+                "  坐标格式: x,y (例如: 1490,532)，多个坐标用空格分隔，最多10个\n\n"
+            
+                "【色板分析命令】\n"
+                "格式: color analyze [颜色数量] [x1,y1,x2,y2] [--algo=算法] （需要引用一张图片）\n"
+                "  » 示例: （引用图片）color analyze\n"
+                "  » 示例: （引用图片）color analyze 8\n"
+                "  » 示例: （引用图片）color analyze 8 --algo=octree\n"
+                "  » 示例: （引用图片）color analyze 5 100,50,400,300\n"
+                "  说明: 分析图片中的主要颜色，生成色板；GIF/WebP/APNG动图会采样多帧综合分析\n"
+                "  颜色数量: 可选，默认5种，范围1-10\n"
+                "  区域: 可选，只分析左上角(x1,y1)到右下角(x2,y2)的矩形区域\n"
+                f"  算法: 可选，{'/'.join(quantizers.available_algorithms())}，默认使用配置的算法\n\n"
+            
+                "【批量转换命令】\n"
+                "格式: color batch <目标格式> <颜色值1> <颜色值2> ...\n"
+                "  » 示例: color batch rgb 72C0FF F00 0,100,100,0\n"
+                "  说明: 一次转换多个颜色值，颜色值之间用空格或换行分隔，最多100个\n\n"
+            
+                "【文件转换命令】\n"
+                "格式: color file <目标格式> （需要发送或引用一个txt/csv文件）\n"
+                "  » 示例: （引用文件）color file hex\n"
+                "  说明: 文件中每行一个颜色值，转换结果以CSV文件返回\n\n"
+            
+                "【颜色名称命令】\n"
+                "格式: color name <颜色值>\n"
+                "  » 示例: color name 6495ED\n"
+                "  说明: 查询最接近的CSS/X11命名颜色及色差\n\n"
+            
+                "【统计命令】color stats [reset]：查看或清空各阶段耗时和缓存命中率（仅管理员）\n\n"
+            
+                "【帮助命令】colorhelp：显示此帮助信息"
+            )
+        return self._help_text
+    
+    async def initialize(self):
+        """插件加载完成后在后台创建HTTP连接池，启动定期统计日志，并按配置在后台预加载图片功能的依赖"""
+        self._session_task = asyncio.create_task(self._open_session())
+        if self.warmup_imports:
+            self._warmup_task = asyncio.create_task(self._warmup())
+        if self.metrics.enabled and self.metrics_log_interval > 0:
+            self._metrics_log_task = asyncio.create_task(self._metrics_log_loop())
+    
+    async def _open_session(self):
+        """在后台线程中导入aiohttp，然后创建HTTP连接池，首次下载时不再等待"""
+        try:
+            await asyncio.to_thread(preload, ('aiohttp',))
+            await self._ensure_session()
+        except Exception as e:
+            logger.warning(f"创建HTTP连接池时发生错误: {e}，将在首次下载时重试")
+    
+    async def _warmup(self):
+        """在后台线程中导入numpy/Pillow并构建颜色名称索引"""
+        started = time.perf_counter()
+        try:
+            timings = await asyncio.to_thread(preload, IMAGE_MODULES)
+            await asyncio.to_thread(color_names.get_index)
+        except Exception as e:
+            logger.warning(f"预加载依赖时发生错误: {e}")
+            return
+        logger.info(f"依赖预加载完成，耗时{(time.perf_counter() - started) * 1000:.0f}ms，各模块导入耗时(ms): {timings}")
+    
+    async def _metrics_log_loop(self):
+        """每隔metrics_log_interval秒输出一行JSON格式的统计日志"""
+        while True:
+            await asyncio.sleep(self.metrics_log_interval)
+            try:
+                record = {
+                    'uptime_s': round(time.time() - self.metrics.started_at),
+                    'stages': self.metrics.snapshot(),
+                    'caches': self._cache_stats(),
+                    'admission': self._admission_stats(),
+                    'coalesced': self._flight_stats(),
+                    'http': self.http_stats.snapshot(self.session),
+                }
+                logger.info(f"color_converter metrics {json.dumps(record, ensure_ascii=False)}")
+            except Exception as e:
+                logger.warning(f"输出统计日志时发生错误: {e}")
+    
+    def _cache_stats(self) -> dict:
+        """汇总各缓存的统计信息"""
+        return {
+            'download': self.download_cache.stats(),
+            'analyze': self.analyze_cache.stats(),
+            'analyze_disk': self.result_store.stats(),
+            'preview': self.preview_cache.stats(),
+            'strip': self.strip_cache.stats(),
+        }
+    
+    def _flight_stats(self) -> dict:
+        """汇总进行中请求合并的统计信息"""
+        return {
+            'download': self.download_flight.stats(),
+            'analyze': self.analyze_flight.stats(),
+        }
+    
+    def _admission_stats(self) -> dict:
+        """汇总并发控制和限流的统计信息"""
+        stats = self.admission.stats()
+        stats['group_limited'] = self.group_rate_limiter.limited
+        stats['user_limited'] = self.user_rate_limiter.limited
+        return stats
+    
+    def _reset_stats(self):
+        """清空各阶段耗时和各缓存、请求合并、准入控制、HTTP连接池的计数，缓存内容保留"""
+        self.metrics.reset()
+        for cache in (self.download_cache, self.analyze_cache, self.result_store, self.preview_cache, self.strip_cache):
+            cache.reset_stats()
+        for flight in (self.download_flight, self.analyze_flight):
+            flight.reset_stats()
+        self.admission.reset_stats()
+        self.group_rate_limiter.reset_stats()
+        self.user_rate_limiter.reset_stats()
+        self.http_stats.reset()
+    
+    async def _run_worker(self, func, *args, **kwargs):
+        """在工作池中执行func，启用统计时同时记录各阶段耗时"""
+        if not self.metrics.enabled:
+            return await self.image_workers.run(func, *args, **kwargs)
+        result, stages = await self.image_workers.run(timed_call, func, *args, **kwargs)
+        self.metrics.record_stages(stages)
+        return result
+    
+    async def _run_worker_on_bytes(self, func, image_bytes: bytes, *args):
+        """在工作池中执行func(image_bytes, *args)，启用统计时同时记录各阶段耗时"""
+        if not self.metrics.enabled:
+            return await self.image_workers.run_on_bytes(func, image_bytes, *args)
+        result, stages = await self.image_workers.run_on_bytes(partial(timed_call, func), image_bytes, *args)
+        self.metrics.record_stages(stages)
+        return result
+    
+    def _record_command(self, command: str, started: float):
+        """记录整条命令的耗时"""
+        self.metrics.record(f"command.{command}", (time.perf_counter() - started) * 1000)
     
     async def _ensure_session(self):
-        """确保HTTP会话已创建"""
-        if self.session is None:
-            self.session = aiohttp.ClientSession()
+        """确保HTTP会话已创建（正常情况下在initialize中创建）"""
+        if self.session is None or self.session.closed:
+            self.session = http_client.create_session(stats=self.http_stats, **self.http_options)
     
-    async def _get_image_from_event(self, event: AstrMessageEvent) -> bytes | None:
+    async def _http_get(self, url: str) -> 'aiohttp.ClientResponse':
+        """发送GET请求，CDN偶发的连接错误和5xx/429响应按指数退避重试"""
+        await self._ensure_session()
+        return await http_client.get_with_retry(self.session, url, self.http_retries, stats=self.http_stats)
+    
+    def _collect_image_candidates(self, event: AstrMessageEvent) -> list[tuple[str, str]]:
         """
-        从事件中获取图片
-        参考main1.py的处理方式
+        按消息顺序收集引用消息和当前消息中的图片，不做下载
+        返回: [(来源类型 'url' 或 'file', 地址), ...]
         """
-        img_bytes_list = []
+        candidates = []
+        
+        def add(img: ImgComponent):
+            # 优先使用url，如果url不存在则使用file
+            if img.url:
+                candidates.append(('url', img.url))
+            elif img.file:
+                candidates.append(('file', img.file))
         
         # 检查消息中的每个组件
         for seg in event.message_obj.message:
@@ -85,141 +371,257 @@ class ColorConverterPlugin(Star):
             if isinstance(seg, Reply) and seg.chain:
                 for s_chain in seg.chain:
                     if isinstance(s_chain, ImgComponent):
-                        # 优先使用url，如果url不存在则使用file
-                        if s_chain.url:
-                            img_bytes = await self._download_image(s_chain.url)
-                            if img_bytes:
-                                img_bytes_list.append(img_bytes)
-                        elif s_chain.file:
-                            # 如果是本地文件，读取文件
-                            try:
-                                with open(s_chain.file, 'rb') as f:
-                                    img_bytes_list.append(f.read())
-                            except Exception as e:
-                                logger.error(f"读取图片文件失败: {e}")
+                        add(s_chain)
             
             # 处理当前消息中的图片
             elif isinstance(seg, ImgComponent):
-                if seg.url:
-                    img_bytes = await self._download_image(seg.url)
-                    if img_bytes:
-                        img_bytes_list.append(img_bytes)
-                elif seg.file:
-                    try:
-                        with open(seg.file, 'rb') as f:
-                            img_bytes_list.append(f.read())
-                    except Exception as e:
-                        logger.error(f"读取图片文件失败: {e}")
-        
-        # 返回第一张图片，如果没有图片则返回None
-        return img_bytes_list[0] if img_bytes_list else None
+                add(seg)
+        
+        return candidates
+    
+    async def _load_image_candidate(self, source: str, location: str) -> bytes | None:
+        """下载图片或异步读取本地图片文件"""
+        if source == 'url':
+            return await self._download_image(location)
+        
+        try:
+            return await asyncio.to_thread(Path(location).read_bytes)
+        except Exception as e:
+            logger.error(f"读取图片文件失败: {e}")
+            return None
+    
+    async def _get_image_from_event(self, event: AstrMessageEvent) -> bytes | None:
+        """从事件中获取第一张可用的图片"""
+        img_bytes, _ = await self._get_image_and_url_from_event(event)
+        return img_bytes
+    
+    async def _get_image_and_url_from_event(self, event: AstrMessageEvent) -> tuple[bytes | None, str | None]:
+        """
+        从事件中获取第一张可用的图片，同时返回图片的URL（本地文件为None）
+        只加载第一张图片；失败时并发尝试其余图片，取最先成功的一张并取消其余任务
+        """
+        candidates = self._collect_image_candidates(event)
+        if not candidates:
+            return None, None
+        
+        async def load(source: str, location: str) -> tuple[bytes | None, str | None]:
+            return await self._load_image_candidate(source, location), location if source == 'url' else None
+        
+        img_bytes, url = await load(*candidates[0])
+        if img_bytes or len(candidates) == 1:
+            return img_bytes, url
+        
+        tasks = [asyncio.create_task(load(*c)) for c in candidates[1:]]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                img_bytes, url = await next_done
+                if img_bytes:
+                    return img_bytes, url
+            return None, None
+        finally:
+            for task in tasks:
+                task.cancel()
+    
+    def _first_image_url(self, event: AstrMessageEvent) -> str | None:
+        """事件中第一张图片的URL，第一张图片是本地文件或没有图片时返回None"""
+        candidates = self._collect_image_candidates(event)
+        if candidates and candidates[0][0] == 'url':
+            return candidates[0][1]
+        return None
     
     async def _download_image(self, url: str) -> bytes | None:
-        """下载图片"""
-        await self._ensure_session()
+        """下载图片（优先从缓存读取）"""
+        cached = self.download_cache.get(url)
+        if cached is not None:
+            logger.debug(f"图片缓存命中 (命中{self.download_cache.hits}次/未命中{self.download_cache.misses}次) URL: {url}")
+            return cached
+        
+        # 同一URL正在下载时等待同一个下载任务
+        if url in self.download_flight:
+            logger.info(f"合并进行中的图片下载 (累计合并{self.download_flight.coalesced + 1}次) URL: {url}")
+        return await self.download_flight.run(url, self._fetch_image, url)
+    
+    async def _fetch_image(self, url: str) -> bytes | None:
+        """流式下载图片并写入下载缓存"""
+        max_bytes = self.download_max_mb * 1024 * 1024
+        started = time.perf_counter()
         try:
-            async with self.session.get(url, timeout=30) as resp:
-                if resp.status == 200:
-                    return await resp.read()
-                else:
+            async with await self._http_get(url) as resp:
+                if resp.status != 200:
                     logger.warning(f"无法下载图片 (状态: {resp.status}) URL: {url}")
                     return None
+                
+                # 先根据Content-Length拒绝过大的文件
+                if resp.content_length is not None and resp.content_length > max_bytes:
+                    logger.warning(f"图片过大 ({resp.content_length}字节，上限{max_bytes}字节) URL: {url}")
+                    return None
+                
+                # 分块读取，超出上限立即中止；读到文件头后先确认是图片
+                buffer = bytearray()
+                sniffed = False
+                async for chunk in resp.content.iter_chunked(DOWNLOAD_CHUNK_SIZE):
+                    buffer += chunk
+                    if len(buffer) > max_bytes:
+                        logger.warning(f"图片过大 (超过上限{max_bytes}字节) URL: {url}")
+                        return None
+                    if not sniffed and len(buffer) >= DOWNLOAD_SNIFF_BYTES:
+                        if not imaging.sniff_image_header(bytes(buffer)):
+                            logger.warning(f"下载内容不是图片 URL: {url}")
+                            return None
+                        sniffed = True
+                
+                if not sniffed and not imaging.sniff_image_header(bytes(buffer)):
+                    logger.warning(f"下载内容不是图片 URL: {url}")
+                    return None
+                
+                img_bytes = bytes(buffer)
+                self.metrics.record('download', (time.perf_counter() - started) * 1000, len(img_bytes))
+                self.download_cache.put(url, img_bytes)
+                return img_bytes
+        except asyncio.TimeoutError:
+            logger.warning(f"下载图片超时 URL: {url}")
+            return None
         except Exception as e:
             logger.error(f"下载图片时发生错误: {e}")
             return None
     
-    def _create_color_preview_image(self, r: int, g: int, b: int) -> BytesIO:
-        """创建颜色预览小图"""
-        # 创建100x100的图片
-        size = 100
-        image = Image.new('RGB', (size, size), (r, g, b))
-        
-        # 添加边框
-        draw = ImageDraw.Draw(image)
-        border_width = 2
-        draw.rectangle(
-            [0, 0, size-1, size-1],
-            outline=(200, 200, 200),
-            width=border_width
-        )
-        
-        # 添加文本标签
-        draw.text(
-            (size//2, size//2),
-            f"#{r:02x}{g:02x}{b:02x}".upper(),
-            fill=(255, 255, 255) if (r*0.299 + g*0.587 + b*0.114) < 128 else (0, 0, 0),
-            anchor="mm"
-        )
+    def _find_file_segment(self, event: AstrMessageEvent):
+        """从当前消息或引用消息中找到第一个文件组件"""
+        for seg in event.message_obj.message:
+            if isinstance(seg, Reply) and seg.chain:
+                for s_chain in seg.chain:
+                    if isinstance(s_chain, Comp.File):
+                        return s_chain
+            elif isinstance(seg, Comp.File):
+                return seg
+        return None
+    
+    @staticmethod
+    def _get_data_dir() -> Path:
+        """插件数据目录，AstrBot没有提供StarTools时使用其默认的 data/plugin_data/插件名"""
+        if StarTools is not None:
+            try:
+                return Path(StarTools.get_data_dir(PLUGIN_NAME))
+            except Exception as e:
+                logger.warning(f"获取插件数据目录失败: {e}，使用默认目录")
+        return Path("data") / "plugin_data" / PLUGIN_NAME
+    
+    def _get_file_tmp_dir(self) -> Path:
+        """获取临时目录，并清理过期的结果文件"""
+        if self.file_tmp_dir is None:
+            self.file_tmp_dir = Path(tempfile.mkdtemp(prefix="color_converter_"))
         
-        # 转换为BytesIO
-        bio = BytesIO()
-        image.save(bio, format='PNG')
-        bio.seek(0)
-        return bio
+        now = time.time()
+        for path in self.file_tmp_dir.iterdir():
+            try:
+                if now - path.stat().st_mtime > RESULT_FILE_TTL:
+                    path.unlink()
+            except OSError:
+                pass
+        return self.file_tmp_dir
     
-    def _create_color_palette_image(self, colors: list, percentages: list) -> BytesIO:
-        """创建色板预览图"""
-        # 参数检查
-        if not colors or not percentages or len(colors) != len(percentages):
-            raise ValueError("颜色列表和百分比列表必须长度相同且不为空")
-        
-        # 色板参数
-        num_colors = len(colors)
-        color_height = 80  # 每个颜色块的高度
-        padding = 10
-        text_height = 30  # 文字区域高度
-        text_padding = 5
-        
-        # 计算图片尺寸
-        image_width = num_colors * color_height + (num_colors + 1) * padding
-        image_height = color_height + text_height + padding
-        
-        # 创建新图片
-        image = Image.new('RGB', (image_width, image_height), (255, 255, 255))
-        draw = ImageDraw.Draw(image)
-        
-        # 绘制每个颜色块
-        for i, (color, percentage) in enumerate(zip(colors, percentages)):
-            # 颜色块位置
-            x1 = padding + i * (color_height + padding)
-            y1 = padding
-            x2 = x1 + color_height
-            y2 = y1 + color_height
-            
-            # 绘制颜色块
-            draw.rectangle([x1, y1, x2, y2], fill=color)
-            
-            # 绘制边框
-            draw.rectangle([x1, y1, x2, y2], outline=(200, 200, 200), width=2)
-            
-            # 计算文字颜色（根据背景色自动选择黑色或白色）
-            r, g, b = color
-            text_color = (255, 255, 255) if (r*0.299 + g*0.587 + b*0.114) < 128 else (0, 0, 0)
-            
-            # 绘制16进制值
-            hex_text = f"#{r:02x}{g:02x}{b:02x}".upper()
-            draw.text(
-                (x1 + color_height // 2, y1 + color_height // 2),
-                hex_text,
-                fill=text_color,
-                anchor="mm"
-            )
+    async def _download_to_file(self, url: str, dest: Path) -> bool:
+        """流式下载文件到本地，超过大小上限时中止"""
+        max_bytes = self.download_max_mb * 1024 * 1024
+        try:
+            async with await self._http_get(url) as resp:
+                if resp.status != 200:
+                    logger.warning(f"无法下载文件 (状态: {resp.status}) URL: {url}")
+                    return False
+                if resp.content_length is not None and resp.content_length > max_bytes:
+                    logger.warning(f"文件过大 ({resp.content_length}字节，上限{max_bytes}字节) URL: {url}")
+                    return False
+                
+                size = 0
+                with open(dest, 'wb') as f:
+                    async for chunk in resp.content.iter_chunked(DOWNLOAD_CHUNK_SIZE):
+                        size += len(chunk)
+                        if size > max_bytes:
+                            logger.warning(f"文件过大 (超过上限{max_bytes}字节) URL: {url}")
+                            return False
+                        f.write(chunk)
+                return True
+        except asyncio.TimeoutError:
+            logger.warning(f"下载文件超时 URL: {url}")
+            return False
+        except Exception as e:
+            logger.error(f"下载文件时发生错误: {e}")
+            return False
+    
+    async def _convert_color_file(self, event: AstrMessageEvent, target_format: str) -> tuple[Path | None, str, str]:
+        """
+        转换消息中附带或引用的颜色列表文件
+        返回: (结果文件路径, 摘要文本, 错误信息)
+        """
+        file_seg = self._find_file_segment(event)
+        if file_seg is None:
+            return None, "", "错误：请发送或引用一个颜色列表文件(txt/csv)\n\n用法: 引用文件并发送 color file <目标格式>\n示例: 引用文件后发送 color file hex"
+        
+        tmp_dir = self._get_file_tmp_dir()
+        stamp = f"{int(time.time() * 1000)}_{id(event) & 0xffff:x}"
+        dst_path = tmp_dir / f"colors_{target_format}_{stamp}.csv"
+        src_path = None
+        downloaded = False
+        try:
+            local_file = getattr(file_seg, 'file', None)
+            url = getattr(file_seg, 'url', None)
+            if local_file and Path(local_file).is_file():
+                src_path = Path(local_file)
+                if src_path.stat().st_size > self.download_max_mb * 1024 * 1024:
+                    return None, "", f"错误：文件超过{self.download_max_mb}MB"
+            elif url:
+                src_path = tmp_dir / f"input_{stamp}"
+                downloaded = True
+                if not await self._download_to_file(url, src_path):
+                    return None, "", "错误：下载文件失败或文件过大"
+            else:
+                return None, "", "错误：无法读取文件"
             
-            # 绘制百分比
-            percent_text = f"{percentage:.1f}%"
-            text_y = y2 + text_padding
-            draw.text(
-                (x1 + color_height // 2, text_y + text_height // 2),
-                percent_text,
-                fill=(0, 0, 0),
-                anchor="mm"
+            # 分块读取、批量转换，在工作池中执行
+            with self.metrics.measure('convert_file', src_path.stat().st_size):
+                total, failed = await self.image_workers.run(
+                    conversion.convert_file, str(src_path), str(dst_path), target_format
+                )
+        except Exception as e:
+            logger.error(f"转换颜色文件时发生错误: {e}", exc_info=True)
+            return None, "", f"转换颜色文件时发生错误: {str(e)}"
+        finally:
+            if downloaded and src_path is not None:
+                src_path.unlink(missing_ok=True)
+        
+        if total == 0:
+            dst_path.unlink(missing_ok=True)
+            return None, "", "错误：文件中没有颜色值"
+        
+        summary = f"文件转换完成: 共{total}个颜色 → {target_format.upper()}"
+        if failed:
+            summary += f"，其中{failed}个无法识别"
+        return dst_path, summary, ""
+    
+    async def _create_color_preview_image(self, r: int, g: int, b: int) -> BytesIO:
+        """创建颜色预览小图（优先从缓存读取，未命中时在工作池中绘制和编码）"""
+        png_bytes = self.preview_cache.get((r, g, b))
+        if png_bytes is None:
+            png_bytes = await self._run_worker(imaging.render_preview, r, g, b, **self.png_options)
+            self.preview_cache.put((r, g, b), png_bytes)
+        return BytesIO(png_bytes)
+    
+    async def _create_color_palette_image(self, colors: list, percentages: list) -> BytesIO:
+        """创建色板预览图"""
+        # 图片上的百分比保留一位小数，按显示的标签缓存
+        labels = [f"{percentage:.1f}%" for percentage in percentages]
+        return await self._create_swatch_strip_image(colors, labels)
+    
+    async def _create_swatch_strip_image(self, colors: list, labels: list) -> BytesIO:
+        """创建一排带标签的颜色块（优先从缓存读取，未命中时在工作池中绘制和编码）"""
+        key = (tuple(tuple(color) for color in colors), tuple(labels))
+        png_bytes = self.strip_cache.get(key)
+        if png_bytes is None:
+            png_bytes = await self._run_worker(
+                imaging.render_swatch_strip, colors, labels, **self.png_options
             )
-        
-        # 转换为BytesIO
-        bio = BytesIO()
-        image.save(bio, format='PNG')
-        bio.seek(0)
-        return bio
+            self.strip_cache.put(key, png_bytes)
+        return BytesIO(png_bytes)
     
     def _load_config(self):
         """加载配置文件"""
@@ -242,6 +644,147 @@ class ColorConverterPlugin(Star):
                 logger.warning(f"群聊白名单配置格式错误，期望列表类型，实际: {type(group_list)}")
                 self.group_whitelist = set()
             
+            # 管理员白名单（color stats）
+            admin_list = self.config.get('admin_whitelist', [])
+            if isinstance(admin_list, list):
+                self.admin_whitelist = set(map(str, admin_list))
+            else:
+                logger.warning(f"管理员白名单配置格式错误，期望列表类型，实际: {type(admin_list)}")
+                self.admin_whitelist = set()
+            
+            # 图片命令的并发控制和限流
+            try:
+                self.image_max_concurrent = max(0, int(self.config.get('image_max_concurrent', 4)))
+                self.image_queue_size = max(0, int(self.config.get('image_queue_size', 8)))
+                self.image_queue_timeout = max(0, int(self.config.get('image_queue_timeout', 30)))
+            except (TypeError, ValueError):
+                logger.warning("图片命令并发配置错误，使用默认值: 并发4, 队列8, 排队超时30秒")
+                self.image_max_concurrent, self.image_queue_size, self.image_queue_timeout = 4, 8, 30
+            
+            try:
+                self.group_rate_per_minute = max(0.0, float(self.config.get('group_rate_per_minute', 30)))
+                self.user_rate_per_minute = max(0.0, float(self.config.get('user_rate_per_minute', 10)))
+                self.rate_limit_burst = max(1, int(self.config.get('rate_limit_burst', 3)))
+            except (TypeError, ValueError):
+                logger.warning("限流配置错误，使用默认值: 每群每分钟30次, 每用户每分钟10次, 连续3次")
+                self.group_rate_per_minute, self.user_rate_per_minute, self.rate_limit_burst = 30, 10, 3
+            
+            # 图片处理工作池
+            backend = str(self.config.get('image_worker_backend', 'thread')).lower()
+            if backend in WORKER_BACKENDS:
+                self.worker_backend = backend
+            else:
+                logger.warning(f"图片工作池类型配置错误: {backend}，可选值: {', '.join(WORKER_BACKENDS)}，使用thread")
+            
+            try:
+                self.worker_count = max(1, int(self.config.get('image_worker_count', 2)))
+            except (TypeError, ValueError):
+                logger.warning(f"图片工作池线程/进程数配置错误: {self.config.get('image_worker_count')}，使用默认值2")
+                self.worker_count = 2
+            logger.info(f"图片工作池: {self.worker_backend} x {self.worker_count}")
+            
+            # 图片下载大小上限
+            try:
+                self.download_max_mb = max(1, int(self.config.get('download_max_mb', 20)))
+            except (TypeError, ValueError):
+                logger.warning(f"图片下载大小上限配置错误: {self.config.get('download_max_mb')}，使用默认值20MB")
+                self.download_max_mb = 20
+            
+            # 图片下载缓存
+            try:
+                self.download_cache_mb = max(0, int(self.config.get('download_cache_mb', 32)))
+                self.download_cache_ttl = max(0, int(self.config.get('download_cache_ttl', 600)))
+            except (TypeError, ValueError):
+                logger.warning("图片下载缓存配置错误，使用默认值: 32MB, 600秒")
+                self.download_cache_mb = 32
+                self.download_cache_ttl = 600
+            
+            # HTTP连接池
+            try:
+                self.http_options = {
+                    'limit': max(0, int(self.config.get('http_pool_limit', 32))),
+                    'limit_per_host': max(0, int(self.config.get('http_pool_limit_per_host', 8))),
+                    'dns_cache_ttl': max(0, int(self.config.get('http_dns_cache_ttl', 300))),
+                    'keepalive_timeout': max(0.0, float(self.config.get('http_keepalive_timeout', 30))),
+                    'connect_timeout': max(1.0, float(self.config.get('http_connect_timeout', 10))),
+                    'read_timeout': max(1.0, float(self.config.get('http_read_timeout', 30))),
+                    'total_timeout': max(1.0, float(self.config.get('http_total_timeout', 30))),
+                }
+                self.http_retries = max(0, int(self.config.get('http_retries', 2)))
+            except (TypeError, ValueError):
+                logger.warning("HTTP连接池配置错误，使用默认值")
+                self.http_options = dict(http_client.DEFAULT_OPTIONS)
+                self.http_retries = 2
+            
+            # 色板分析结果缓存
+            try:
+                self.analyze_cache_entries = max(0, int(self.config.get('analyze_cache_entries', 256)))
+            except (TypeError, ValueError):
+                logger.warning(f"色板分析缓存配置错误: {self.config.get('analyze_cache_entries')}，使用默认值256")
+                self.analyze_cache_entries = 256
+            try:
+                self.result_store_mb = max(0, int(self.config.get('result_store_mb', 64)))
+            except (TypeError, ValueError):
+                logger.warning(f"色板分析磁盘缓存配置错误: {self.config.get('result_store_mb')}，使用默认值64")
+                self.result_store_mb = 64
+            
+            # 预览图编码参数和缓存
+            try:
+                compress_level = int(self.config.get('png_compress_level', 6))
+                self.png_options = {
+                    'compress_level': max(0, min(compress_level, 9)),
+                    'palette': bool(self.config.get('png_palette', False))
+                }
+                self.preview_cache_entries = max(0, int(self.config.get('preview_cache_entries', 512)))
+            except (TypeError, ValueError):
+                logger.warning("预览图编码或缓存配置错误，使用默认值")
+                self.png_options = {'compress_level': 6, 'palette': False}
+                self.preview_cache_entries = 512
+            
+            # 色板分析缩放尺寸
+            try:
+                self.analyze_max_dimension = max(16, int(self.config.get('analyze_max_dimension', 400)))
+            except (TypeError, ValueError):
+                logger.warning(f"色板分析缩放尺寸配置错误: {self.config.get('analyze_max_dimension')}，使用默认值400")
+                self.analyze_max_dimension = 400
+            
+            resample = str(self.config.get('analyze_resample', 'lanczos')).lower()
+            if resample in imaging.RESAMPLE_METHODS:
+                self.analyze_resample = resample
+            else:
+                logger.warning(f"色板分析重采样方法配置错误: {resample}，可选值: {', '.join(imaging.RESAMPLE_METHODS)}，使用lanczos")
+            
+            # libimagequant是否可用需要导入Pillow才能检查，留到首次分析时再检查
+            algorithm = str(self.config.get('analyze_algorithm', 'bucket')).lower()
+            if algorithm in quantizers.ALGORITHMS:
+                self.analyze_algorithm = algorithm
+            else:
+                logger.warning(f"色板分析量化算法配置错误: {algorithm}，可选值: {', '.join(quantizers.ALGORITHMS)}，使用bucket")
+            
+            # 动图帧采样
+            try:
+                self.analyze_max_frames = max(1, min(int(self.config.get('analyze_max_frames', 8)), 64))
+            except (TypeError, ValueError):
+                logger.warning(f"动图采样帧数配置错误: {self.config.get('analyze_max_frames')}，使用默认值8")
+                self.analyze_max_frames = 8
+            
+            sampling = str(self.config.get('analyze_frame_sampling', 'even')).lower()
+            if sampling in imaging.FRAME_SAMPLING:
+                self.analyze_frame_sampling = sampling
+            else:
+                logger.warning(f"动图采样方式配置错误: {sampling}，可选值: {', '.join(imaging.FRAME_SAMPLING)}，使用even")
+            
+            # 依赖预加载
+            self.warmup_imports = bool(self.config.get('warmup_imports', True))
+            
+            # 阶段耗时统计
+            self.metrics_enabled = bool(self.config.get('metrics_enabled', True))
+            try:
+                self.metrics_log_interval = max(0, int(self.config.get('metrics_log_interval', 0)))
+            except (TypeError, ValueError):
+                logger.warning(f"统计日志间隔配置错误: {self.config.get('metrics_log_interval')}，不输出统计日志")
+                self.metrics_log_interval = 0
+            
             if not self.private_whitelist and not self.group_whitelist:
                 logger.info("未配置白名单，插件将对所有用户和群组开放")
             else:
@@ -318,278 +861,101 @@ class ColorConverterPlugin(Star):
         # 其他情况默认允许
         return True, ""
     
-    @staticmethod
-    def rgb_to_hex(r, g, b):
-        """RGB转16进制"""
-        # 验证输入值
+    def _check_admin(self, event: AstrMessageEvent) -> bool:
+        """检查用户是否可以查看统计信息：配置了管理员白名单时按白名单，否则只允许机器人管理员"""
+        if self.admin_whitelist:
+            return self._get_user_id(event) in self.admin_whitelist
         try:
-            r = int(r)
-            g = int(g)
-            b = int(b)
-        except ValueError:
-            return None, "RGB值必须是整数"
-        
-        # 检查范围
-        if any(not (0 <= x <= 255) for x in (r, g, b)):
-            return None, "RGB值必须在0-255范围内"
-        
-        # 转换为16进制
-        hex_color = f"#{r:02x}{g:02x}{b:02x}".upper()
-        return hex_color, None
-    
-    @staticmethod
-    def hex_to_rgb(hex_color):
-        """16进制转RGB"""
-        hex_color = hex_color.strip().lstrip('#')
-        
-        # 验证格式
-        if len(hex_color) == 3:
-            # 处理缩写形式如 fff
-            hex_color = ''.join(c * 2 for c in hex_color)
-        
-        if len(hex_color) != 6 or not re.match(r'^[0-9A-Fa-f]{6}$', hex_color):
-            return None, "无效的16进制颜色值"
-        
-        # 解析RGB值
-        try:
-            r = int(hex_color[0:2], 16)
-            g = int(hex_color[2:4], 16)
-            b = int(hex_color[4:6], 16)
-        except ValueError:
-            return None, "无效的16进制颜色值"
-        
-        return (r, g, b), None
-    
-    @staticmethod
-    def rgb_to_cmyk(r, g, b):
-        """RGB转CMYK"""
-        # 验证输入值
-        try:
-            r = int(r)
-            g = int(g)
-            b = int(b)
-        except ValueError:
-            return None, "RGB值必须是整数"
-        
-        # 检查范围
-        if any(not (0 <= x <= 255) for x in (r, g, b)):
-            return None, "RGB值必须在0-255范围内"
-        
-        # 归一化到0-1
-        r_prime, g_prime, b_prime = r/255.0, g/255.0, b/255.0
-        
-        # 计算CMYK
-        k = 1 - max(r_prime, g_prime, b_prime)
-        
-        # 使用更清晰的方式检查纯黑色
-        if k > 0.999999:  # 接近1.0时视为纯黑色
-            c = m = y = 0.0
-        else:
-            c = (1 - r_prime - k) / (1 - k)
-            m = (1 - g_prime - k) / (1 - k)
-            y = (1 - b_prime - k) / (1 - k)
-        
-        # 返回0-100的百分比值，保留两位小数
-        return (
-            round(c * 100, 2),
-            round(m * 100, 2),
-            round(y * 100, 2),
-            round(k * 100, 2)
-        ), None
+            return bool(event.is_admin())
+        except Exception as e:
+            logger.warning(f"检查管理员权限时发生错误: {e}")
+            return False
     
-    @staticmethod
-    def cmyk_to_rgb(c, m, y, k):
-        """CMYK转RGB"""
-        # 验证输入值
-        try:
-            c = float(c)
-            m = float(m)
-            y = float(y)
-            k = float(k)
-        except ValueError:
-            return None, "CMYK值必须是数字"
-        
-        # 检查范围
-        if any(not (0 <= x <= 100) for x in (c, m, y, k)):
-            return None, "CMYK值必须在0-100范围内"
-        
-        # 转换为0-1的小数
-        c, m, y, k = c/100.0, m/100.0, y/100.0, k/100.0
+    def _format_stats(self) -> str:
+        """格式化阶段耗时和缓存统计"""
+        output = [f"=== 颜色转换插件统计 (统计时长: {int(time.time() - self.metrics.started_at)}秒) ==="]
+        
+        output.append("【阶段耗时】(毫秒)")
+        stages = self.metrics.snapshot()
+        if not self.metrics.enabled:
+            output.append("  耗时统计未启用")
+        elif not stages:
+            output.append("  暂无数据")
+        for name, stat in sorted(stages.items()):
+            line = (f"  {name}: {stat['count']}次, 平均{stat['avg_ms']}, p50 {stat['p50_ms']}, "
+                    f"p95 {stat['p95_ms']}, p99 {stat['p99_ms']}, 最大{stat['max_ms']}")
+            if stat['bytes']:
+                line += f", 共{stat['bytes'] / 1024 / 1024:.2f}MB"
+            output.append(line)
         
-        # 计算RGB
-        r = 255 * (1 - c) * (1 - k)
-        g = 255 * (1 - m) * (1 - k)
-        b = 255 * (1 - y) * (1 - k)
-        
-        # 四舍五入并确保在0-255范围内
-        r = max(0, min(255, int(round(r))))
-        g = max(0, min(255, int(round(g))))
-        b = max(0, min(255, int(round(b))))
+        output.append("")
+        output.append("【图片任务】")
+        stat = self._admission_stats()
+        output.append(f"  执行中{stat['active']}个, 排队{stat['waiting']}个, 已执行{stat['admitted']}个")
+        output.append(f"  繁忙拒绝{stat['rejected']}次, 排队超时{stat['timed_out']}次, "
+                      f"群限流{stat['group_limited']}次, 用户限流{stat['user_limited']}次")
         
-        return (r, g, b), None
-    
-    @staticmethod
-    def cmyk_to_hex(c, m, y, k):
-        """CMYK转16进制"""
-        rgb_result, error = ColorConverterPlugin.cmyk_to_rgb(c, m, y, k)
-        if error:
-            return None, error
+        output.append("")
+        output.append("【HTTP连接池】")
+        stat = self.http_stats.snapshot(self.session)
+        if 'limit' in stat:
+            output.append(f"  上限{stat['limit']}个连接, 每个主机{stat['limit_per_host']}个")
+        output.append(f"  请求{stat['requests']}次, 新建连接{stat['connections_created']}次, "
+                      f"复用连接{stat['connections_reused']}次, 等待空闲连接{stat['queued']}次")
+        output.append(f"  重试{stat['retries']}次, 重试后仍失败{stat['failures']}次")
         
-        hex_result, error = ColorConverterPlugin.rgb_to_hex(*rgb_result)
-        if error:
-            return None, error
+        output.append("")
+        output.append("【缓存】")
+        names = {'download': "图片下载", 'analyze': "色板分析", 'analyze_disk': "色板分析(磁盘)",
+                 'preview': "取色预览图", 'strip': "色板图"}
+        for key, stat in self._cache_stats().items():
+            output.append(f"  {names[key]}: 命中率{stat['hit_rate']:.1%} (命中{stat['hits']}次/未命中{stat['misses']}次), "
+                          f"{stat['entries']}条, {stat['bytes'] / 1024 / 1024:.2f}MB, 淘汰{stat['evictions']}次")
+        for key, stat in self._flight_stats().items():
+            output.append(f"  合并{names[key]}请求: 执行{stat['executed']}次, 合并{stat['coalesced']}次")
         
-        return hex_result, None
+        return "\n".join(output)
     
-    @staticmethod
-    def hex_to_cmyk(hex_color):
-        """16进制转CMYK"""
-        rgb_result, error = ColorConverterPlugin.hex_to_rgb(hex_color)
-        if error:
-            return None, error
-        
-        cmyk_result, error = ColorConverterPlugin.rgb_to_cmyk(*rgb_result)
-        if error:
-            return None, error
-        
-        return cmyk_result, None
+    # 标量转换函数已移到conversion模块，保留为静态方法以兼容原有调用方式
+    rgb_to_hex = staticmethod(conversion.rgb_to_hex)
+    hex_to_rgb = staticmethod(conversion.hex_to_rgb)
+    rgb_to_cmyk = staticmethod(conversion.rgb_to_cmyk)
+    cmyk_to_rgb = staticmethod(conversion.cmyk_to_rgb)
+    cmyk_to_hex = staticmethod(conversion.cmyk_to_hex)
+    hex_to_cmyk = staticmethod(conversion.hex_to_cmyk)
     
     def _detect_color_format(self, color_str: str) -> tuple[str, list]:
         """
         智能检测颜色格式
         返回: (格式类型, 数值列表)
-        格式类型: 'hex', 'rgb', 'cmyk', 'unknown'
+        格式类型: 'hex', 'rgb', 'cmyk', 'hsl', 'unknown'
         """
-        color_str = color_str.strip().replace('，', ',')  # 中文逗号转英文逗号
-        
-        # 1. 检测16进制格式 (3位或6位，不需要#)
-        hex_str = color_str.lstrip('#')
-        if re.match(r'^[0-9A-Fa-f]{3}$', hex_str) or re.match(r'^[0-9A-Fa-f]{6}$', hex_str):
-            return 'hex', [hex_str]
-        
-        # 2. 检测逗号分隔的数字格式
-        parts = [p.strip() for p in color_str.split(',') if p.strip()]
-        
-        if not parts:
-            return 'unknown', []
-        
-        # 尝试转换为数字
-        try:
-            nums = []
-            for part in parts:
-                # 检查是否为整数或小数
-                if '.' in part:
-                    nums.append(float(part))
-                else:
-                    nums.append(int(part))
-        except ValueError:
-            return 'unknown', []
-        
-        # 3. 根据数字数量判断格式
-        if len(nums) == 3:
-            # RGB格式：3个值，范围0-255
-            if all(0 <= n <= 255 for n in nums):
-                return 'rgb', nums
-            else:
-                return 'unknown', nums
-        elif len(nums) == 4:
-            # CMYK格式：4个值，范围0-100
-            if all(0 <= n <= 100 for n in nums):
-                return 'cmyk', nums
-            else:
-                return 'unknown', nums
-        else:
-            return 'unknown', nums
+        return conversion.detect_color_format(color_str)
     
     def _convert_color(self, target_format: str, color_str: str) -> tuple[dict, str]:
         """
         转换颜色格式
         返回: (颜色信息字典, 错误信息)
         """
-        # 检测输入格式
-        src_format, nums = self._detect_color_format(color_str)
-        
-        if src_format == 'unknown':
-            return {}, f"无法识别颜色格式: {color_str}\n\n支持的格式:\n- 16进制: 3位或6位(如 FF0000 或 F00)\n- RGB: 3个0-255的数字(如 255,0,0)\n- CMYK: 4个0-100的数字(如 0,100,100,0)"
-        
-        color_info = {}
-        
-        try:
-            if src_format == 'hex':
-                hex_str = nums[0]
-                rgb, error = self.hex_to_rgb(hex_str)
-                if error:
-                    return {}, error
-                
-                cmyk, error = self.rgb_to_cmyk(*rgb)
-                if error:
-                    return {}, error
-                
-                # 生成完整的16进制表示
-                if len(hex_str) == 6:
-                    full_hex = f"#{hex_str.upper()}"
-                else:  # 3位缩写
-                    full_hex = f"#{hex_str.upper()[0]*2}{hex_str.upper()[1]*2}{hex_str.upper()[2]*2}"
-                
-                color_info = {
-                    'hex': full_hex,
-                    'rgb': rgb,
-                    'cmyk': cmyk
-                }
-                
-            elif src_format == 'rgb':
-                r, g, b = nums
-                hex_color, error = self.rgb_to_hex(r, g, b)
-                if error:
-                    return {}, error
-                
-                cmyk, error = self.rgb_to_cmyk(r, g, b)
-                if error:
-                    return {}, error
-                
-                color_info = {
-                    'hex': hex_color,
-                    'rgb': (r, g, b),
-                    'cmyk': cmyk
-                }
-                
-            elif src_format == 'cmyk':
-                # CMYK必须是4个值
-                if len(nums) != 4:
-                    return {}, "CMYK格式需要4个值，用逗号分隔 (如: 0,100,100,0)"
-                
-                c, m, y, k = nums
-                rgb, error = self.cmyk_to_rgb(c, m, y, k)
-                if error:
-                    return {}, error
-                
-                hex_color, error = self.rgb_to_hex(*rgb)
-                if error:
-                    return {}, error
-                
-                color_info = {
-                    'hex': hex_color,
-                    'rgb': rgb,
-                    'cmyk': (c, m, y, k)
-                }
-        
-        except Exception as e:
-            return {}, f"转换过程中发生错误: {str(e)}"
-        
-        # 根据目标格式返回相应结果
-        result = {}
-        if target_format == 'hex':
-            result = {'hex': color_info['hex']}
-        elif target_format == 'rgb':
-            result = {'rgb': color_info['rgb']}
-        elif target_format == 'cmyk':
-            result = {'cmyk': color_info['cmyk']}
-        
-        # 添加源格式信息用于显示
-        result['_src_format'] = src_format
-        result['_full_info'] = color_info
+        return conversion.convert_color(target_format, color_str)
+    
+    def _convert_batch(self, target_format: str, values: list) -> str:
+        """
+        批量转换多个颜色值，同一种格式的颜色一次性转换
+        返回: 格式化后的输出文本
+        """
+        _, valid, converted = conversion.convert_values(values, target_format)
+        
+        output = [f"批量转换结果: 共{len(values)}个颜色 → {target_format.upper()}", ""]
+        for i, (value, ok, result) in enumerate(zip(values, valid, converted), 1):
+            if not ok:
+                output.append(f"{i}. {value} → 无法识别")
+            elif target_format == 'hex':
+                output.append(f"{i}. {value} → {result}")
+            else:
+                output.append(f"{i}. {value} → {conversion.format_color(target_format, result)}")
         
-        return result, ""
+        return "\n".join(output)
     
     def _format_output(self, color_info, target_format: str):
         """格式化输出"""
@@ -608,6 +974,10 @@ class ColorConverterPlugin(Star):
         if color_info.get('cmyk'):
             c, m, y, k = color_info['cmyk']
             output.append(f"CMYK: CMYK({c}%, {m}%, {y}%, {k}%)")
+        for table_format in ('hsl', 'hsv', 'lab'):
+            if color_info.get(table_format):
+                label = 'Lab' if table_format == 'lab' else table_format.upper()
+                output.append(f"{label}: {conversion.format_color(table_format, color_info[table_format])}")
         
         # 添加其他格式信息
         if full_info:
@@ -628,203 +998,480 @@ class ColorConverterPlugin(Star):
         
         return "\n".join(output)
     
-    async def _pick_color_from_image(self, image_bytes: bytes, coord_str: str) -> tuple[dict, str]:
+    @staticmethod
+    def _check_coord_in_image(x: int, y: int, width: int, height: int) -> str:
+        """检查坐标是否在图片范围内，返回错误信息（在范围内时为空字符串）"""
+        if x < 0 or x >= width or y < 0 or y >= height:
+            return f"坐标 ({x},{y}) 超出图片范围 (图片尺寸: {width}x{height})"
+        return ""
+    
+    def _parse_coords(self, coord_str: str) -> tuple[list, str]:
         """
-        从图片中拾取颜色
-        返回: (颜色信息字典, 错误信息)
+        解析一个或多个坐标，坐标之间用空格分隔
+        返回: (坐标列表, 错误信息)
         """
-        try:
-            # 解析坐标
-            coord_str = coord_str.strip().replace('，', ',')  # 中文逗号转英文逗号
-            coord_parts = coord_str.split(',')
-            
+        coord_str = coord_str.strip().replace('，', ',')  # 中文逗号转英文逗号
+        # 允许逗号两侧带空格，如 "10, 20"
+        coord_str = re.sub(r'\s*,\s*', ',', coord_str)
+        
+        points = []
+        for token in coord_str.split():
+            coord_parts = token.split(',')
             if len(coord_parts) != 2:
-                return {}, "坐标格式错误，请输入 x,y 格式的坐标（例如: 1490,532）"
+                return [], "坐标格式错误，请输入 x,y 格式的坐标（例如: 1490,532），多个坐标用空格分隔"
             
             try:
                 x = int(coord_parts[0].strip())
                 y = int(coord_parts[1].strip())
             except ValueError:
-                return {}, "坐标必须是整数"
+                return [], "坐标必须是整数"
             
-            # 加载图片
-            image = Image.open(BytesIO(image_bytes)).convert('RGB')
-            width, height = image.size
-            
-            # 检查坐标是否在图片范围内
-            if x < 0 or x >= width or y < 0 or y >= height:
-                return {}, f"坐标 ({x},{y}) 超出图片范围 (图片尺寸: {width}x{height})"
+            points.append((x, y))
+        
+        if not points:
+            return [], "坐标格式错误，请输入 x,y 格式的坐标（例如: 1490,532）"
+        if len(points) > MAX_PICK_POINTS:
+            return [], f"一次最多取{MAX_PICK_POINTS}个坐标的颜色"
+        
+        return points, ""
+    
+    def _parse_region(self, region_str: str) -> tuple[tuple | None, str]:
+        """
+        解析 x1,y1,x2,y2 格式的矩形区域，两个角可以按任意顺序给出，都包括在区域内
+        返回: ((左, 上, 右, 下), 错误信息)
+        """
+        parts = region_str.replace('，', ',').split(',')
+        if len(parts) != 4:
+            return None, "区域格式错误，请输入 x1,y1,x2,y2 格式的两个对角坐标（例如: 100,50,400,300）"
+        try:
+            x1, y1, x2, y2 = (int(part.strip()) for part in parts)
+        except ValueError:
+            return None, "坐标必须是整数"
+        return (min(x1, x2), min(y1, y2), max(x1, x2), max(y1, y2)), ""
+    
+    def _check_region_in_image(self, region: tuple, width: int, height: int) -> str:
+        """检查区域的两个角是否都在图片范围内，返回错误信息（在范围内时为空字符串）"""
+        left, top, right, bottom = region
+        return (self._check_coord_in_image(left, top, width, height)
+                or self._check_coord_in_image(right, bottom, width, height))
+    
+    async def _pick_color_from_image(self, image_bytes: bytes, coord_str: str) -> tuple[list, str]:
+        """
+        从图片中拾取一个或多个坐标的颜色，所有坐标只解码一次图片
+        返回: (颜色信息字典列表, 错误信息)
+        """
+        try:
+            # 解析坐标
+            points, error = self._parse_coords(coord_str)
+            if error:
+                return [], error
             
-            # 获取颜色
-            pixel = image.getpixel((x, y))
-            r, g, b = pixel
+            # 在工作池中解码图片并读取像素
+            (width, height), pixels = await self._run_worker_on_bytes(
+                imaging.pick_pixels, image_bytes, points
+            )
             
-            # 转换为各种格式
-            hex_color, error = self.rgb_to_hex(r, g, b)
-            if error:
-                return {}, error
+            # 检查坐标是否在图片范围内
+            for x, y in points:
+                error = self._check_coord_in_image(x, y, width, height)
+                if error:
+                    return [], error
             
-            cmyk, error = self.rgb_to_cmyk(r, g, b)
-            if error:
-                return {}, error
+            results = []
+            for (x, y), (r, g, b) in zip(points, pixels):
+                # 转换为各种格式
+                hex_color, error = self.rgb_to_hex(r, g, b)
+                if error:
+                    return [], error
+                
+                cmyk, error = self.rgb_to_cmyk(r, g, b)
+                if error:
+                    return [], error
+                
+                results.append({
+                    'hex': hex_color,
+                    'rgb': (r, g, b),
+                    'cmyk': cmyk,
+                    '_image_size': (width, height),
+                    '_coord': (x, y)
+                })
             
-            return {
-                'hex': hex_color,
-                'rgb': (r, g, b),
-                'cmyk': cmyk,
-                '_image_size': (width, height),
-                '_coord': (x, y)
-            }, ""
+            return results, ""
             
         except Exception as e:
             logger.error(f"取色时发生错误: {e}", exc_info=True)
-            return {}, f"取色时发生错误: {str(e)}"
+            return [], f"取色时发生错误: {str(e)}"
+    
+    def _resolve_algorithm(self, algorithm: str | None) -> str:
+        """algorithm为None时使用配置的默认算法，默认算法在当前环境不可用时改用bucket"""
+        if algorithm is None:
+            algorithm = self.analyze_algorithm
+            if algorithm not in quantizers.available_algorithms():
+                logger.warning(f"配置的量化算法 {algorithm} 在当前环境不可用，使用bucket")
+                algorithm = self.analyze_algorithm = 'bucket'
+        return algorithm
     
-    async def _analyze_image_palette(self, image_bytes: bytes, num_colors: int = 5) -> tuple[list, list, tuple, str]:
+    def _palette_cache_key(self, digest: str, num_colors: int, algorithm: str, region: tuple = None) -> tuple:
         """
-        分析图片色板，找出比例最高的几种颜色
-        返回: (颜色列表, 百分比列表, 图片尺寸, 错误信息)
+        色板分析结果缓存的键。bucket缓存全部颜色组，不同数量直接截取；
+        其他算法的结果与颜色数量有关，数量也作为键的一部分
         """
+        quantize_colors = None if algorithm == 'bucket' else num_colors
+        return (digest, self.analyze_max_dimension, self.analyze_resample, algorithm, quantize_colors,
+                self.analyze_max_frames, self.analyze_frame_sampling, region)
+    
+    @staticmethod
+    def _take_palette_colors(cached: tuple, num_colors: int) -> tuple[list, list, tuple, tuple | None, str]:
+        """从缓存的分析结果中取前num_colors种颜色"""
+        all_colors, all_percentages, image_size, frames = cached
+        
+        # 如果没有颜色数据
+        if not all_colors:
+            return [], [], image_size, frames, "无法分析图片颜色"
+        
+        # 限制返回的颜色数量
+        return all_colors[:num_colors], all_percentages[:num_colors], image_size, frames, ""
+    
+    async def _analyze_image_palette(self, image_bytes: bytes, num_colors: int = 5, algorithm: str = None,
+                                     url: str = None, region: tuple = None) -> tuple[list, list, tuple, tuple | None, str]:
+        """
+        分析图片色板，找出比例最高的几种颜色；动图按配置采样多帧
+        algorithm: 量化算法，为None时使用配置的默认算法
+        url: 图片的URL，结果写入磁盘缓存时同时记录URL对应的内容哈希
+        region: 只分析的矩形区域(左, 上, 右, 下)，包括右下角的像素
+        返回: (颜色列表, 百分比列表, 图片原始尺寸, 动图的(采样帧数, 总帧数)或None, 错误信息)
+        """
+        algorithm = self._resolve_algorithm(algorithm)
+        num_colors = max(1, min(num_colors, 10))  # 限制在1-10之间
         try:
-            # 加载图片
-            image = Image.open(BytesIO(image_bytes)).convert('RGB')
-            width, height = image.size
-            total_pixels = width * height
-            
-            # 如果图片太大，缩小以加快处理速度
-            max_dimension = 400
-            if width > max_dimension or height > max_dimension:
-                scale = max_dimension / max(width, height)
-                new_width = int(width * scale)
-                new_height = int(height * scale)
-                image = image.resize((new_width, new_height), Image.Resampling.LANCZOS)
-                width, height = image.size
-                total_pixels = width * height
-            
-            # 获取所有像素
-            pixels = list(image.getdata())
-            
-            # 使用颜色量化来合并相似颜色
-            # 将颜色空间划分为8x8x8的立方体 (512个颜色组)
-            color_dict = {}
-            
-            for r, g, b in pixels:
-                # 量化到较低精度 (每通道8级)
-                r_idx = r // 32  # 0-7
-                g_idx = g // 32  # 0-7
-                b_idx = b // 32  # 0-7
-                
-                # 使用量化后的颜色作为键
-                color_key = (r_idx, g_idx, b_idx)
-                
-                if color_key not in color_dict:
-                    color_dict[color_key] = {
-                        'count': 0,
-                        'r_sum': 0,
-                        'g_sum': 0,
-                        'b_sum': 0
-                    }
-                
-                # 累加计数和颜色值
-                color_dict[color_key]['count'] += 1
-                color_dict[color_key]['r_sum'] += r
-                color_dict[color_key]['g_sum'] += g
-                color_dict[color_key]['b_sum'] += b
-            
-            # 如果没有颜色数据
-            if not color_dict:
-                return [], [], (width, height), "无法分析图片颜色"
-            
-            # 计算每个颜色组的平均颜色和百分比
-            color_list = []
-            for color_key, data in color_dict.items():
-                count = data['count']
-                avg_r = data['r_sum'] // count
-                avg_g = data['g_sum'] // count
-                avg_b = data['b_sum'] // count
-                
-                percentage = (count / total_pixels) * 100
-                
-                color_list.append({
-                    'rgb': (avg_r, avg_g, avg_b),
-                    'percentage': percentage,
-                    'count': count
-                })
-            
-            # 按百分比降序排序
-            color_list.sort(key=lambda x: x['percentage'], reverse=True)
+            # 先查结果缓存
+            cache_key = self._palette_cache_key(content_hash(image_bytes), num_colors, algorithm, region)
+            cached = self.analyze_cache.get(cache_key)
+            if cached is None:
+                # 相同图片和参数的分析正在进行时等待同一个任务
+                if cache_key in self.analyze_flight:
+                    logger.info(f"合并进行中的色板分析 (累计合并{self.analyze_flight.coalesced + 1}次)")
+                cached = await self.analyze_flight.run(
+                    cache_key, self._run_palette_analysis, cache_key, image_bytes, algorithm, url
+                )
             
-            # 限制返回的颜色数量
-            num_colors = max(1, min(num_colors, 10))  # 限制在1-10之间
-            top_colors = color_list[:num_colors]
-            
-            # 提取RGB颜色和百分比
-            rgb_colors = [color['rgb'] for color in top_colors]
-            percentages = [color['percentage'] for color in top_colors]
-            
-            return rgb_colors, percentages, (width, height), ""
+            # 区域超出图片范围时没有分析结果
+            if cached[0] is None:
+                width, height = cached[2]
+                return [], [], cached[2], None, self._check_region_in_image(region, width, height)
+            return self._take_palette_colors(cached, num_colors)
             
         except Exception as e:
             logger.error(f"分析色板时发生错误: {e}", exc_info=True)
-            return [], [], (0, 0), f"分析色板时发生错误: {str(e)}"
+            return [], [], (0, 0), None, f"分析色板时发生错误: {str(e)}"
     
-    def _format_pick_output(self, color_info: dict) -> tuple[str, BytesIO]:
-        """格式化取色器输出，返回文本和预览图片"""
+    async def _analyze_stored_palette(self, url: str, num_colors: int, algorithm: str = None,
+                                      region: tuple = None) -> tuple[list, list, tuple, tuple | None, str] | None:
+        """
+        图片URL对应的内容哈希已知时，直接从缓存中取分析结果，不需要下载和解码图片
+        返回: 同_analyze_image_palette，未命中时返回None
+        """
+        if not self.result_store.enabled:
+            return None
+        algorithm = self._resolve_algorithm(algorithm)
+        num_colors = max(1, min(num_colors, 10))
+        try:
+            digest = await asyncio.to_thread(self.result_store.lookup_url, url)
+            if digest is None:
+                return None
+            cache_key = self._palette_cache_key(digest, num_colors, algorithm, region)
+            cached = self.analyze_cache.get(cache_key)
+            if cached is None:
+                cached = await self._load_stored_palette(cache_key)
+            if cached is None:
+                return None
+        except Exception as e:
+            logger.warning(f"读取色板分析磁盘缓存失败: {e}")
+            return None
+        logger.debug(f"色板分析磁盘缓存命中，跳过下载 URL: {url}")
+        return self._take_palette_colors(cached, num_colors)
+    
+    async def _load_stored_palette(self, cache_key: tuple) -> tuple | None:
+        """从磁盘缓存读取分析结果，命中时同时写入内存缓存"""
+        if not self.result_store.enabled:
+            return None
+        params = "|".join(map(str, cache_key[1:]))
+        stored = await asyncio.to_thread(self.result_store.get, cache_key[0], params)
+        if stored is None:
+            return None
+        colors, percentages, image_size, frames = stored
+        result = ([tuple(color) for color in colors], percentages, tuple(image_size),
+                  tuple(frames) if frames else None)
+        self.analyze_cache.put(cache_key, result)
+        return result
+    
+    async def _store_palette(self, cache_key: tuple, result: tuple, url: str | None):
+        """把分析结果写入磁盘缓存，只保存前STORED_PALETTE_COLORS种颜色"""
+        if not self.result_store.enabled:
+            return
+        colors, percentages, image_size, frames = result
+        value = [colors[:STORED_PALETTE_COLORS], percentages[:STORED_PALETTE_COLORS], image_size, frames]
+        params = "|".join(map(str, cache_key[1:]))
+        try:
+            await asyncio.to_thread(self.result_store.put, cache_key[0], params, value, url)
+        except Exception as e:
+            logger.warning(f"写入色板分析磁盘缓存失败: {e}")
+    
+    @staticmethod
+    def _format_name(name: tuple) -> str:
+        """格式化颜色名称查询结果，色差为0时只显示名称"""
+        named, _, named_delta = name
+        if named_delta:
+            return f"接近 {named}"
+        return named
+    
+    def _lookup_color_name(self, color_str: str) -> tuple[str, str]:
+        """
+        查询颜色值最接近的命名颜色
+        返回: (输出文本, 错误信息)
+        """
+        color_info, error = self._convert_color('rgb', color_str)
+        if error:
+            return "", error
+        
+        r, g, b = color_info['rgb']
+        name = color_names.lookup_names([(int(r), int(g), int(b))])[0]
+        named, named_hex, named_delta = name
+        
+        output = [f"颜色名称: {color_info['_full_info']['hex']}", ""]
+        output.append(f"命名颜色(CSS/X11): {named} ({named_hex}, 色差ΔE {named_delta})")
+        return "\n".join(output), ""
+    
+    async def _run_palette_analysis(self, cache_key: tuple, image_bytes: bytes,
+                                    algorithm: str, url: str | None) -> tuple:
+        """先查磁盘缓存，未命中时在工作池中解码、缩放和量化，结果写入内存和磁盘缓存"""
+        try:
+            result = await self._load_stored_palette(cache_key)
+        except Exception as e:
+            logger.warning(f"读取色板分析磁盘缓存失败: {e}")
+            result = None
+        if result is not None:
+            if url:
+                try:
+                    await asyncio.to_thread(self.result_store.remember_url, url, cache_key[0])
+                except Exception as e:
+                    logger.warning(f"写入色板分析磁盘缓存失败: {e}")
+            return result
+        
+        num_colors, region = cache_key[4], cache_key[7]
+        # 传给imaging的区域不包括右边和下边，这里的区域包括右下角的像素
+        box = None if region is None else (region[0], region[1], region[2] + 1, region[3] + 1)
+        result = await self._run_worker_on_bytes(
+            imaging.analyze_palette, image_bytes, num_colors,
+            self.analyze_max_dimension, self.analyze_resample, algorithm,
+            self.analyze_max_frames, self.analyze_frame_sampling, box
+        )
+        # 区域超出图片范围时不缓存
+        if result[0] is not None:
+            self.analyze_cache.put(cache_key, result)
+            await self._store_palette(cache_key, result, url)
+        return result
+    
+    async def _format_pick_output(self, color_infos: list) -> tuple[str, BytesIO]:
+        """格式化取色器输出，返回文本和预览图片（多个坐标时为一排色块）"""
         output = []
         
         # 基本信息
-        x, y = color_info.get('_coord', (0, 0))
-        width, height = color_info.get('_image_size', (0, 0))
+        width, height = color_infos[0].get('_image_size', (0, 0))
         
-        output.append(f"图片取色结果 (图片尺寸: {width}x{height}, 坐标: ({x},{y}))")
-        output.append("")
+        if len(color_infos) == 1:
+            color_info = color_infos[0]
+            x, y = color_info.get('_coord', (0, 0))
+            output.append(f"图片取色结果 (图片尺寸: {width}x{height}, 坐标: ({x},{y}))")
+            output.append("")
+            
+            # 颜色值
+            if color_info.get('hex'):
+                output.append(f"16进制: {color_info['hex']}")
+            
+            if color_info.get('rgb'):
+                r, g, b = color_info['rgb']
+                output.append(f"RGB: RGB({r}, {g}, {b})")
+            
+            if color_info.get('cmyk'):
+                c, m, y, k = color_info['cmyk']
+                output.append(f"CMYK: CMYK({c}%, {m}%, {y}%, {k}%)")
+            
+            output.append(f"名称: {self._format_name(color_names.lookup_names([color_info['rgb']])[0])}")
+            
+            # 生成颜色预览图片
+            r, g, b = color_info['rgb']
+            preview_image = await self._create_color_preview_image(r, g, b)
+            
+            return "\n".join(output), preview_image
         
-        # 颜色值
-        if color_info.get('hex'):
-            output.append(f"16进制: {color_info['hex']}")
+        output.append(f"图片取色结果 (图片尺寸: {width}x{height}, 共{len(color_infos)}个坐标)")
+        output.append("")
         
-        if color_info.get('rgb'):
+        names = color_names.lookup_names([color_info['rgb'] for color_info in color_infos])
+        for i, (color_info, name) in enumerate(zip(color_infos, names), 1):
+            x, y = color_info['_coord']
             r, g, b = color_info['rgb']
-            output.append(f"RGB: RGB({r}, {g}, {b})")
-        
-        if color_info.get('cmyk'):
-            c, m, y, k = color_info['cmyk']
-            output.append(f"CMYK: CMYK({c}%, {m}%, {y}%, {k}%)")
+            cmyk = color_info['cmyk']
+            output.append(f"{i}. ({x},{y}) {color_info['hex']}")
+            output.append(f"   RGB: ({r}, {g}, {b})")
+            output.append(f"   CMYK: ({cmyk[0]}%, {cmyk[1]}%, {cmyk[2]}%, {cmyk[3]}%)")
+            output.append(f"   名称: {self._format_name(name)}")
         
-        # 生成颜色预览图片
-        r, g, b = color_info['rgb']
-        preview_image = self._create_color_preview_image(r, g, b)
+        # 生成一排色块，标签为坐标
+        colors = [color_info['rgb'] for color_info in color_infos]
+        labels = ["({},{})".format(*color_info['_coord']) for color_info in color_infos]
+        preview_image = await self._create_swatch_strip_image(colors, labels)
         
         return "\n".join(output), preview_image
     
-    def _format_analyze_output(self, colors: list, percentages: list, image_size: tuple) -> tuple[str, BytesIO]:
-        """格式化色板分析输出，返回文本和色板图片"""
+    async def _format_analyze_output(self, colors: list, percentages: list, image_size: tuple,
+                                     frames: tuple = None, region: tuple = None) -> tuple[str, BytesIO]:
+        """
+        格式化色板分析输出，返回文本和色板图片
+        frames: 动图的(采样帧数, 总帧数)；region: 分析的区域(左, 上, 右, 下)
+        """
         output = []
         width, height = image_size
         
         output.append(f"图片色板分析结果 (图片尺寸: {width}x{height})")
+        if region:
+            left, top, right, bottom = region
+            output.append(f"分析区域: ({left},{top}) - ({right},{bottom})，{right - left + 1}x{bottom - top + 1}")
+        if frames:
+            output.append(f"动图共{frames[1]}帧，综合分析了其中{frames[0]}帧")
         output.append(f"提取了 {len(colors)} 种主要颜色:")
         output.append("")
         
+        # HSL/HSV/Lab对全部颜色一次性批量计算
+        rgb_array = np.array(colors, dtype=np.intp).reshape(-1, 3)
+        hsl_values = conversion.rgb_array_to_hsl(rgb_array).tolist()
+        hsv_values = conversion.rgb_array_to_hsv(rgb_array).tolist()
+        lab_values = conversion.rgb_array_to_lab(rgb_array).tolist()
+        names = color_names.lookup_names(colors)
+        
         # 添加每个颜色的详细信息
         for i, (color, percentage) in enumerate(zip(colors, percentages), 1):
             r, g, b = color
             hex_color, _ = self.rgb_to_hex(r, g, b)
             cmyk, _ = self.rgb_to_cmyk(r, g, b)
+            h, s, l = hsl_values[i - 1]
+            _, sv, v = hsv_values[i - 1]
+            lab_l, lab_a, lab_b = lab_values[i - 1]
             
             output.append(f"{i}. {hex_color}")
             output.append(f"   RGB: ({r}, {g}, {b})")
             output.append(f"   CMYK: ({cmyk[0]}%, {cmyk[1]}%, {cmyk[2]}%, {cmyk[3]}%)")
+            output.append(f"   HSL: ({h}°, {s}%, {l}%)  HSV: ({h}°, {sv}%, {v}%)")
+            output.append(f"   Lab: ({lab_l}, {lab_a}, {lab_b})")
+            output.append(f"   名称: {self._format_name(names[i - 1])}")
             output.append(f"   占比: {percentage:.2f}%")
             output.append("")
         
         output.append("以下是色板预览:")
         
         # 生成色板图片
-        palette_image = self._create_color_palette_image(colors, percentages)
+        palette_image = await self._create_color_palette_image(colors, percentages)
         
         return "\n".join(output), palette_image
     
+    def _check_rate_limit(self, event: AstrMessageEvent) -> str:
+        """
+        检查群和用户的调用频率，返回错误信息（允许时为空字符串）
+        两者都允许时才消耗令牌，超出个人限制的请求不会消耗群的令牌
+        """
+        rejected, wait = acquire_all([
+            (self.group_rate_limiter, self._get_group_id(event)),
+            (self.user_rate_limiter, self._get_user_id(event)),
+        ])
+        if rejected == 0:
+            return f"本群使用太频繁，请{math.ceil(wait)}秒后再试"
+        if rejected == 1:
+            return f"操作太频繁，请{math.ceil(wait)}秒后再试"
+        return ""
+    
+    async def _run_image_command(self, event: AstrMessageEvent, func, *args) -> tuple[list, str]:
+        """
+        经过限流和并发控制后执行图片命令
+        返回: (消息链, 错误信息)
+        """
+        error = self._check_rate_limit(event)
+        if error:
+            return [], error
+        
+        if not await self.admission.acquire():
+            logger.info(f"图片任务被拒绝: 执行中{self.admission.active}个, 排队{self.admission.waiting}个")
+            return [], "机器人正忙，请稍后再试"
+        try:
+            return await func(*args)
+        finally:
+            self.admission.release()
+    
+    async def _run_pick(self, event: AstrMessageEvent, coord_str: str) -> tuple[list, str]:
+        """获取图片并取色，返回: (消息链, 错误信息)"""
+        # 获取图片
+        image_bytes = await self._get_image_from_event(event)
+        if not image_bytes:
+            return [], "错误：请引用一张图片进行取色\n\n用法: 引用一张图片并发送 color pick x,y\n示例: 引用图片后发送 color pick 1490,532"
+        
+        # 取色
+        color_infos, error_msg = await self._pick_color_from_image(image_bytes, coord_str)
+        if error_msg:
+            return [], error_msg
+        
+        # 格式化输出并生成预览图片
+        text_output, preview_image = await self._format_pick_output(color_infos)
+        
+        # 使用消息链发送文本和图片
+        return [
+            Comp.Plain(text_output),
+            Comp.Plain("\n颜色预览:\n"),
+            Comp.Image.fromBytes(preview_image.getvalue())
+        ], ""
+    
+    async def _run_file(self, event: AstrMessageEvent, target_format: str) -> tuple[list, str]:
+        """下载并转换颜色列表文件，返回: (消息链, 错误信息)"""
+        result_path, summary, error_msg = await self._convert_color_file(event, target_format)
+        if error_msg:
+            return [], error_msg
+        
+        return [
+            Comp.Plain(summary),
+            Comp.File(name=f"colors_{target_format}.csv", file=str(result_path))
+        ], ""
+    
+    async def _run_analyze(self, event: AstrMessageEvent, num_colors: int, algorithm: str,
+                           region: tuple = None) -> tuple[list, str]:
+        """获取图片并分析色板（指定region时只分析该区域），返回: (消息链, 错误信息)"""
+        # 图片URL对应的内容哈希已知时（之前分析过），先查缓存，命中时不需要下载图片
+        image_url = self._first_image_url(event)
+        stored = await self._analyze_stored_palette(image_url, num_colors, algorithm, region) if image_url else None
+        if stored is not None:
+            colors, percentages, image_size, frames, error_msg = stored
+        else:
+            # 获取图片
+            image_bytes, image_url = await self._get_image_and_url_from_event(event)
+            if not image_bytes:
+                return [], "错误：请引用一张图片进行色板分析\n\n用法: 引用一张图片并发送 color analyze [数量]\n示例: 引用图片后发送 color analyze 8"
+            
+            # 分析色板
+            colors, percentages, image_size, frames, error_msg = await self._analyze_image_palette(
+                image_bytes, num_colors, algorithm, image_url, region
+            )
+        if error_msg:
+            return [], error_msg
+        
+        # 格式化输出并生成色板图片
+        text_output, palette_image = await self._format_analyze_output(
+            colors, percentages, image_size, frames, region
+        )
+        
+        # 使用消息链发送文本和图片
+        return [
+            Comp.Plain(text_output),
+            Comp.Image.fromBytes(palette_image.getvalue())
+        ], ""
+    
     @filter.command("color")
     async def color_converter(self, event: AstrMessageEvent):
         """
@@ -864,7 +1511,7 @@ class ColorConverterPlugin(Star):
             content = raw_message[len(command_prefix):].strip()
         else:
             # 如果不是以color开头，可能是其他方式触发，使用整个消息
-            content = raw_message
+            content = raw_message.strip()
         
         # 如果没有内容，显示帮助
         if not content:
@@ -872,81 +1519,144 @@ class ColorConverterPlugin(Star):
             return
         
         # 分割命令参数
-        parts = content.strip().split(maxsplit=2)
+        parts = content.split(maxsplit=2)
         
         if len(parts) < 1:
             yield event.plain_result("颜色转换插件\n使用方式: color <目标格式> <颜色值>\n示例: color rgb 72C0FF\n输入 colorhelp 查看详细帮助")
             return
         
         command_type = parts[0].lower()
+        started = time.perf_counter()
+        
+        # 处理stats命令
+        if command_type == 'stats':
+            if not self._check_admin(event):
+                yield event.plain_result("权限不足: 只有管理员可以查看统计信息")
+                return
+            if len(parts) > 1 and parts[1].lower() == 'reset':
+                self._reset_stats()
+                yield event.plain_result("统计数据已清空")
+                return
+            yield event.plain_result(self._format_stats())
+            return
         
         # 处理pick命令
         if command_type == 'pick':
             if len(parts) < 2:
-                yield event.plain_result("错误：请提供坐标\n\n格式: color pick x,y\n示例: color pick 1490,532 (需要引用图片)")
+                yield event.plain_result("错误：请提供坐标\n\n格式: color pick x,y [x,y ...]\n示例: color pick 1490,532 (需要引用图片)")
                 return
             
-            coord_str = parts[1]
+            # 剩余部分都是坐标，多个坐标用空格分隔
+            coord_str = content.strip()[len(command_type):]
             
-            # 获取图片
-            image_bytes = await self._get_image_from_event(event)
-            if not image_bytes:
-                yield event.plain_result("错误：请引用一张图片进行取色\n\n用法: 引用一张图片并发送 color pick x,y\n示例: 引用图片后发送 color pick 1490,532")
-                return
-            
-            # 取色
-            color_info, error_msg = await self._pick_color_from_image(image_bytes, coord_str)
+            chain, error_msg = await self._run_image_command(event, self._run_pick, event, coord_str)
             if error_msg:
                 yield event.plain_result(error_msg)
                 return
             
-            # 格式化输出并生成预览图片
-            text_output, preview_image = self._format_pick_output(color_info)
-            
-            # 使用消息链发送文本和图片
-            chain = [
-                Comp.Plain(text_output),
-                Comp.Plain("\n颜色预览:\n"),
-                Comp.Image.fromBytes(preview_image.getvalue())
-            ]
-            
+            self._record_command('pick', started)
             yield event.chain_result(chain)
             return
         
         # 处理analyze命令
         elif command_type == 'analyze':
-            # 解析可选的颜色数量参数
+            # 解析可选的颜色数量、x1,y1,x2,y2 区域和 --algo=算法 参数
             num_colors = 5  # 默认5种颜色
-            if len(parts) > 1:
+            algorithm = None
+            region = None
+            # 允许区域的逗号两侧带空格，如 "100, 50, 400, 300"
+            args_str = re.sub(r'\s*[,，]\s*', ',', content.strip()[len(command_type):])
+            usage = "格式: color analyze [颜色数量] [x1,y1,x2,y2] [--algo=算法]"
+            given = set()  # 已经指定过的参数，每种只能指定一次
+            for arg in args_str.split():
+                kind = 'region' if ',' in arg else 'algo' if arg.lower().startswith('--algo=') else 'count'
+                if kind in given:
+                    names = {'region': "分析区域", 'algo': "量化算法", 'count': "颜色数量"}
+                    yield event.plain_result(f"错误：{names[kind]}只能指定一次\n\n{usage}")
+                    return
+                given.add(kind)
+                if kind == 'region':
+                    region, error = self._parse_region(arg)
+                    if error:
+                        yield event.plain_result(f"错误：{error}\n\n{usage}")
+                        return
+                    continue
+                if kind == 'algo':
+                    algorithm = arg[len('--algo='):].lower()
+                    if algorithm not in quantizers.available_algorithms():
+                        yield event.plain_result(f"错误：未知或不可用的量化算法 '{algorithm}'，可选值: {', '.join(quantizers.available_algorithms())}")
+                        return
+                    continue
                 try:
-                    num_colors = int(parts[1])
+                    num_colors = int(arg)
                     # 限制在1-10之间
                     num_colors = max(1, min(num_colors, 10))
                 except ValueError:
-                    yield event.plain_result("错误：颜色数量必须是整数\n\n格式: color analyze [颜色数量]\n示例: color analyze 8 (默认5)")
+                    yield event.plain_result(f"错误：颜色数量必须是整数\n\n{usage}\n示例: color analyze 8 (默认5)")
                     return
             
-            # 获取图片
-            image_bytes = await self._get_image_from_event(event)
-            if not image_bytes:
-                yield event.plain_result("错误：请引用一张图片进行色板分析\n\n用法: 引用一张图片并发送 color analyze [数量]\n示例: 引用图片后发送 color analyze 8")
+            chain, error_msg = await self._run_image_command(
+                event, self._run_analyze, event, num_colors, algorithm, region
+            )
+            if error_msg:
+                yield event.plain_result(error_msg)
                 return
             
-            # 分析色板
-            colors, percentages, image_size, error_msg = await self._analyze_image_palette(image_bytes, num_colors)
+            self._record_command('analyze', started)
+            yield event.chain_result(chain)
+            return
+        
+        # 处理name命令
+        elif command_type == 'name':
+            color_str = content.strip()[len(command_type):].strip()
+            if not color_str:
+                yield event.plain_result("错误：请提供颜色值\n\n格式: color name <颜色值>\n示例: color name 6495ED")
+                return
+            
+            output, error_msg = self._lookup_color_name(color_str)
             if error_msg:
                 yield event.plain_result(error_msg)
                 return
             
-            # 格式化输出并生成色板图片
-            text_output, palette_image = self._format_analyze_output(colors, percentages, image_size)
+            self._record_command('name', started)
+            yield event.plain_result(output)
+            return
+        
+        # 处理batch命令
+        elif command_type == 'batch':
+            if len(parts) < 3:
+                yield event.plain_result("错误：请提供目标格式和颜色值\n\n格式: color batch <目标格式> <颜色值1> <颜色值2> ...\n示例: color batch rgb 72C0FF F00 0,100,100,0")
+                return
+            
+            target_format = parts[1].lower()
+            if target_format not in conversion.TARGET_FORMATS:
+                yield event.plain_result(f"错误：未知的目标格式 '{target_format}'，必须是 {', '.join(conversion.TARGET_FORMATS)} 之一\n\n输入 colorhelp 查看帮助")
+                return
+            
+            # 颜色值之间用空格或换行分隔，逗号两侧和括号内的空格不分隔
+            values = color_parser.split_colors(parts[2])
+            if len(values) > MAX_BATCH_VALUES:
+                yield event.plain_result(f"错误：一次最多转换{MAX_BATCH_VALUES}个颜色值")
+                return
+            
+            output = self._convert_batch(target_format, values)
+            self._record_command('batch', started)
+            yield event.plain_result(output)
+            return
+        
+        # 处理file命令
+        elif command_type == 'file':
+            target_format = parts[1].lower() if len(parts) > 1 else ''
+            if target_format not in conversion.TARGET_FORMATS:
+                yield event.plain_result(f"错误：请提供目标格式({', '.join(conversion.TARGET_FORMATS)})\n\n格式: color file <目标格式> （需要发送或引用颜色列表文件）\n示例: color file hex")
+                return
             
-            # 使用消息链发送文本和图片
-            chain = [
-                Comp.Plain(text_output),
-                Comp.Image.fromBytes(palette_image.getvalue())
-            ]
+            chain, error_msg = await self._run_image_command(event, self._run_file, event, target_format)
+            if error_msg:
+                yield event.plain_result(error_msg)
+                return
             
+            self._record_command('file', started)
             yield event.chain_result(chain)
             return
         
@@ -955,19 +1665,19 @@ class ColorConverterPlugin(Star):
         # 需要将整个剩余部分重新按maxsplit=1分割
         if len(parts) < 2:
             # 如果没有第二个参数，说明命令格式不正确
-            if command_type in ['rgb', 'hex', 'cmyk']:
+            if command_type in conversion.TARGET_FORMATS:
                 yield event.plain_result(f"错误：请提供颜色值\n\n示例: color {command_type} 72C0FF")
             else:
-                yield event.plain_result("错误：命令格式不正确\n\n正确格式:\n1. color <目标格式> <颜色值>\n2. color pick <坐标> (引用图片)\n3. color analyze [颜色数量] (引用图片)\n\n输入 colorhelp 查看详细帮助")
+                yield event.plain_result("错误：命令格式不正确\n\n正确格式:\n1. color <目标格式> <颜色值>\n2. color pick <坐标> (引用图片)\n3. color analyze [颜色数量] (引用图片)\n4. color batch <目标格式> <颜色值1> <颜色值2> ...\n5. color file <目标格式> (引用颜色列表文件)\n6. color name <颜色值>\n\n输入 colorhelp 查看详细帮助")
             return
         
         # 重新解析：第一个参数是目标格式，剩余部分是颜色值
         target_format = command_type
-        color_str = content.strip()[len(command_type):].strip()
+        color_str = content[len(parts[0]):].strip()
         
         # 验证目标格式
-        if target_format not in ['rgb', 'hex', 'cmyk']:
-            yield event.plain_result(f"错误：未知的目标格式 '{target_format}'，必须是 rgb, hex 或 cmyk\n\n输入 colorhelp 查看帮助")
+        if target_format not in conversion.TARGET_FORMATS:
+            yield event.plain_result(f"错误：未知的目标格式 '{target_format}'，必须是 {', '.join(conversion.TARGET_FORMATS)} 之一\n\n输入 colorhelp 查看帮助")
             return
         
         # 转换颜色
@@ -979,6 +1689,7 @@ class ColorConverterPlugin(Star):
         # 格式化输出
         output = self._format_output(color_info, target_format)
         
+        self._record_command('convert', started)
         yield event.plain_result(output)
     
     @filter.command("colorhelp")
@@ -990,6 +1701,34 @@ class ColorConverterPlugin(Star):
     async def terminate(self):
         """清理资源"""
         logger.info("颜色转换插件正在关闭...")
+        if self._metrics_log_task is not None:
+            self._metrics_log_task.cancel()
+            self._metrics_log_task = None
+        if self._warmup_task is not None and not self._warmup_task.done():
+            self._warmup_task.cancel()
+        if self._session_task is not None and not self._session_task.done():
+            self._session_task.cancel()
+        stats = self.download_cache.stats()
+        logger.info(f"图片下载缓存: 命中{stats['hits']}次, 未命中{stats['misses']}次, 合并进行中的下载{self.download_flight.coalesced}次")
+        self.download_cache.clear()
+        stats = self.analyze_cache.stats()
+        logger.info(f"色板分析缓存: 命中{stats['hits']}次, 未命中{stats['misses']}次, 合并进行中的分析{self.analyze_flight.coalesced}次")
+        self.analyze_cache.clear()
+        stats = self.result_store.stats()
+        logger.info(f"色板分析磁盘缓存: 命中{stats['hits']}次, 未命中{stats['misses']}次, "
+                    f"{stats['entries']}条, {stats['bytes'] / 1024 / 1024:.2f}MB")
+        await asyncio.to_thread(self.result_store.close)
+        stats = self.preview_cache.stats()
+        logger.info(f"取色预览图缓存: 命中{stats['hits']}次, 未命中{stats['misses']}次, 命中率{stats['hit_rate']:.1%}")
+        self.preview_cache.clear()
+        stats = self.strip_cache.stats()
+        logger.info(f"色板图缓存: 命中{stats['hits']}次, 未命中{stats['misses']}次, 命中率{stats['hit_rate']:.1%}")
+        self.strip_cache.clear()
         if self.session:
             await self.session.close()
-            logger.info("HTTP会话已关闭")
\ No newline at end of file
+            logger.info("HTTP会话已关闭")
+        # 关闭图片处理工作池，避免阻塞事件循环
+        await asyncio.to_thread(self.image_workers.shutdown)
+        logger.info("图片处理工作池已关闭")
+        if self.file_tmp_dir is not None:
+            shutil.rmtree(self.file_tmp_dir, ignore_errors=True)
\ No newline at end of file
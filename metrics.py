@@ -0,0 +1,140 @@
+# metrics.py - 各处理阶段的耗时统计
+# 每个阶段用固定的对数分桶直方图记录耗时，内存占用固定，记录一次只需O(1)
+import bisect
+import math
+import time
+from contextlib import contextmanager, nullcontext
+
+# 直方图分桶上界(毫秒): 0.05ms起，每桶扩大1.25倍，到约60秒
+_BUCKET_BOUNDS = [0.05 * 1.25 ** i for i in range(64)]
+
+_NULL_CONTEXT = nullcontext()
+
+
+class StageHistogram:
+    """单个阶段的耗时直方图"""
+
+    __slots__ = ('count', 'total_ms', 'max_ms', 'total_bytes', 'buckets')
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.total_bytes = 0
+        self.buckets = [0] * (len(_BUCKET_BOUNDS) + 1)
+
+    def record(self, ms: float, nbytes: int = 0):
+        self.count += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+        self.total_bytes += nbytes
+        self.buckets[bisect.bisect_left(_BUCKET_BOUNDS, ms)] += 1
+
+    def percentile(self, p: float) -> float:
+        """估算百分位数，返回所在分桶的上界（最后一个桶返回最大值）"""
+        if not self.count:
+            return 0.0
+        target = math.ceil(self.count * p / 100)
+        cumulative = 0
+        for i, n in enumerate(self.buckets):
+            cumulative += n
+            if cumulative >= target:
+                return min(_BUCKET_BOUNDS[i], self.max_ms) if i < len(_BUCKET_BOUNDS) else self.max_ms
+        return self.max_ms
+
+    def snapshot(self) -> dict:
+        return {
+            'count': self.count,
+            'avg_ms': round(self.total_ms / self.count, 2) if self.count else 0.0,
+            'p50_ms': round(self.percentile(50), 2),
+            'p95_ms': round(self.percentile(95), 2),
+            'p99_ms': round(self.percentile(99), 2),
+            'max_ms': round(self.max_ms, 2),
+            'bytes': self.total_bytes,
+        }
+
+
+class StageTimer:
+    """
+    在工作池中收集一次任务各阶段的耗时
+    结果保存在stages中: [(阶段名, 毫秒, 字节数), ...]，由主进程汇总到Metrics；
+    同一阶段执行多次时（如动图的每一帧）每次单独记录
+    """
+
+    __slots__ = ('stages',)
+
+    def __init__(self):
+        self.stages = []
+
+    @contextmanager
+    def stage(self, name: str, nbytes: int = 0):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages.append((name, (time.perf_counter() - start) * 1000, nbytes))
+
+
+class _NullTimer:
+    """不统计耗时时使用的空计时器"""
+
+    __slots__ = ()
+
+    def stage(self, name: str, nbytes: int = 0):
+        return _NULL_CONTEXT
+
+
+NULL_TIMER = _NullTimer()
+
+
+def timed_call(func, *args, **kwargs):
+    """在工作池中执行func并统计各阶段耗时，返回(结果, 阶段耗时)"""
+    timer = StageTimer()
+    result = func(*args, timer=timer, **kwargs)
+    return result, timer.stages
+
+
+class Metrics:
+    """
+    插件内的阶段耗时汇总
+    禁用时measure返回空上下文、record直接返回，几乎没有开销
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self.started_at = time.time()
+        self._stages: dict[str, StageHistogram] = {}
+
+    def record(self, stage: str, ms: float, nbytes: int = 0):
+        if not self.enabled:
+            return
+        hist = self._stages.get(stage)
+        if hist is None:
+            hist = self._stages[stage] = StageHistogram()
+        hist.record(ms, nbytes)
+
+    def record_stages(self, stages: list):
+        """汇总工作池返回的阶段耗时"""
+        for stage, ms, nbytes in stages:
+            self.record(stage, ms, nbytes)
+
+    def measure(self, stage: str, nbytes: int = 0):
+        """统计一段代码的耗时: with metrics.measure('download'): ..."""
+        if not self.enabled:
+            return _NULL_CONTEXT
+        return self._measure(stage, nbytes)
+
+    @contextmanager
+    def _measure(self, stage: str, nbytes: int):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, (time.perf_counter() - start) * 1000, nbytes)
+
+    def snapshot(self) -> dict:
+        return {name: hist.snapshot() for name, hist in self._stages.items()}
+
+    def reset(self):
+        self._stages.clear()
+        self.started_at = time.time()
@@ -0,0 +1,123 @@
+# quantizers.py - 色板分析的颜色量化算法
+# bucket以外的算法都把图片量化为正好num_colors种颜色，再按像素数排序
+from __future__ import annotations
+from functools import lru_cache
+from .lazy import lazy_import
+
+np = lazy_import('numpy')
+Image = lazy_import('PIL.Image')
+features = lazy_import('PIL.features')
+
+# Pillow内置的量化方法(Image.Quantize的成员名)，libimagequant需要Pillow编译时启用
+PILLOW_METHODS = {
+    'octree': 'FASTOCTREE',
+    'mediancut': 'MEDIANCUT',
+    'libimagequant': 'LIBIMAGEQUANT',
+}
+
+# 可选的量化算法，bucket为原来的8x8x8颜色分组
+ALGORITHMS = ('bucket', 'octree', 'mediancut', 'libimagequant', 'kmeans')
+
+# mini-batch k-means参数：固定迭代次数和每批像素数，随机种子固定以保证结果可复现
+KMEANS_ITERATIONS = 20
+KMEANS_BATCH_SIZE = 2048
+KMEANS_SEED = 0
+
+
+@lru_cache(maxsize=None)
+def _has_libimagequant() -> bool:
+    return bool(features.check_feature('libimagequant'))
+
+
+def available_algorithms() -> list:
+    """返回当前环境可用的量化算法（首次调用时导入Pillow检查libimagequant）"""
+    return [algo for algo in ALGORITHMS if algo != 'libimagequant' or _has_libimagequant()]
+
+
+def _sorted_palette(colors: np.ndarray, counts: np.ndarray) -> tuple[list, list]:
+    """丢弃空的颜色，按像素数降序排列（数量相同时保持原顺序），返回(颜色列表, 百分比列表)"""
+    total = int(counts.sum())
+    if total == 0:
+        return [], []
+    order = np.argsort(-counts, kind='stable')
+    order = order[counts[order] > 0]
+    rgb_colors = [tuple(int(v) for v in colors[i]) for i in order]
+    percentages = [int(counts[i]) / total * 100 for i in order]
+    return rgb_colors, percentages
+
+
+def pillow_quantize(image: Image.Image, num_colors: int, algo: str) -> tuple[list, list]:
+    """使用Pillow的C实现量化图片"""
+    if algo == 'libimagequant' and not _has_libimagequant():
+        raise ValueError("当前Pillow未启用libimagequant")
+
+    quantized = image.quantize(colors=num_colors, method=getattr(Image.Quantize, PILLOW_METHODS[algo]))
+    palette = np.array(quantized.getpalette()[:num_colors * 3], dtype=np.int64).reshape(-1, 3)
+    counts = np.bincount(np.asarray(quantized).ravel(), minlength=len(palette))[:len(palette)]
+    return _sorted_palette(palette, counts)
+
+
+def _nearest(pixels: np.ndarray, centers: np.ndarray) -> np.ndarray:
+    """返回每个像素最近的中心索引，pixels和centers都是float32"""
+    # |p - c|^2 = |p|^2 - 2p·c + |c|^2，|p|^2对所有中心相同，可以省略
+    distances = (centers * centers).sum(axis=1) - 2 * pixels @ centers.T
+    return distances.argmin(axis=1)
+
+
+def _kmeans_init(pixels: np.ndarray, k: int, rng: np.random.Generator) -> np.ndarray:
+    """k-means++初始化：在一批采样像素上依次选择离已选中心较远的像素"""
+    sample = pixels[rng.integers(0, len(pixels), min(len(pixels), KMEANS_BATCH_SIZE * 4))]
+    centers = [sample[rng.integers(0, len(sample))]]
+    min_dist = ((sample - centers[0]) ** 2).sum(axis=1)
+    for _ in range(1, k):
+        total = min_dist.sum()
+        if total == 0:
+            break
+        centers.append(sample[rng.choice(len(sample), p=min_dist / total)])
+        min_dist = np.minimum(min_dist, ((sample - centers[-1]) ** 2).sum(axis=1))
+    return np.array(centers, dtype=np.float32)
+
+
+def kmeans_quantize(image: Image.Image, num_colors: int) -> tuple[list, list]:
+    """
+    向量化的mini-batch k-means
+    每次迭代随机取一批像素，按中心累计分到的像素数作为学习率更新中心，
+    迭代次数固定，耗时与图片内容无关；最后对全部像素分配一次并用平均颜色作为结果
+    """
+    pixels = np.asarray(image, dtype=np.float32).reshape(-1, 3)
+    if len(pixels) == 0:
+        return [], []
+
+    rng = np.random.default_rng(KMEANS_SEED)
+    centers = _kmeans_init(pixels, num_colors, rng)
+    k = len(centers)
+    seen = np.zeros(k, dtype=np.float32)
+
+    for _ in range(KMEANS_ITERATIONS):
+        batch = pixels[rng.integers(0, len(pixels), KMEANS_BATCH_SIZE)]
+        labels = _nearest(batch, centers)
+        batch_counts = np.bincount(labels, minlength=k).astype(np.float32)
+        batch_sums = np.stack([np.bincount(labels, weights=batch[:, c], minlength=k) for c in range(3)], axis=1)
+        assigned = batch_counts > 0
+        seen += batch_counts
+        # 中心向本批平均值移动，步长为本批数量/累计数量
+        rate = batch_counts[assigned, None] / seen[assigned, None]
+        centers[assigned] += rate * (batch_sums[assigned] / batch_counts[assigned, None] - centers[assigned])
+
+    labels = _nearest(pixels, centers)
+    counts = np.bincount(labels, minlength=k)
+    sums = np.stack([np.bincount(labels, weights=pixels[:, c], minlength=k) for c in range(3)], axis=1)
+    averages = sums // np.maximum(counts, 1)[:, None]
+    return _sorted_palette(averages.astype(np.int64), counts)
+
+
+def quantize(image: Image.Image, num_colors: int, algo: str) -> tuple[list, list]:
+    """
+    将RGB图片量化为num_colors种颜色（不包括bucket）
+    返回: (颜色列表, 百分比列表)，按占比降序排列
+    """
+    if algo == 'kmeans':
+        return kmeans_quantize(image, num_colors)
+    if algo in PILLOW_METHODS:
+        return pillow_quantize(image, num_colors, algo)
+    raise ValueError(f"未知的量化算法: {algo}，可选值: {', '.join(ALGORITHMS)}")
@@ -0,0 +1,189 @@
+# result_store.py - 色板分析结果的磁盘缓存
+# 插件每次部署都会重启，内存中的分析缓存随之清空；这里把分析结果保存到插件数据目录下的SQLite数据库，
+# 以图片内容哈希和分析参数为键，重启后同一张图片不需要重新分析
+# 另外记录图片URL到内容哈希的对应关系，已知哈希时可以在下载图片之前直接查到结果
+# 数据库在首次读写时才打开，不影响插件加载速度；方法都是同步的，由调用方放到线程中执行
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+# 表结构或结果格式变化时增加版本号，打开旧版本的数据库时清空重建
+SCHEMA_VERSION = 3
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS results ("
+    " hash TEXT NOT NULL, params TEXT NOT NULL, value TEXT NOT NULL,"
+    " size INTEGER NOT NULL, accessed REAL NOT NULL, PRIMARY KEY (hash, params))",
+    "CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed)",
+    "CREATE TABLE IF NOT EXISTS urls (url TEXT PRIMARY KEY, hash TEXT NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS urls_hash ON urls (hash)",
+)
+
+# 超出容量时一直淘汰到容量的这个比例以下，避免每次写入都触发淘汰
+_EVICT_TARGET = 0.9
+
+
+class ResultStore:
+    """
+    基于SQLite的分析结果缓存，按最近访问时间淘汰
+    path: 数据库文件路径，父目录不存在时自动创建
+    max_bytes: 结果数据的总字节数上限，0表示禁用
+    可以在多个线程中调用，内部用锁串行化
+    """
+
+    def __init__(self, path, max_bytes: int):
+        self.path = Path(path)
+        self.max_bytes = max(0, int(max_bytes))
+        self._conn = None
+        self._lock = threading.Lock()
+        self.total_bytes = 0
+        self.entries = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def _connect(self) -> sqlite3.Connection:
+        """首次使用时打开数据库，版本不一致或文件损坏时重建"""
+        if self._conn is not None:
+            return self._conn
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            conn = self._open()
+        except sqlite3.DatabaseError:
+            # 连同WAL和共享内存文件一起删除，否则旧的WAL会被回放到新数据库上
+            for suffix in ('', '-wal', '-shm'):
+                Path(f"{self.path}{suffix}").unlink(missing_ok=True)
+            conn = self._open()
+
+        self.entries, self.total_bytes = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results"
+        ).fetchone()
+        self._conn = conn
+        return conn
+
+    def _open(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            if conn.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+                conn.execute("DROP TABLE IF EXISTS results")
+                conn.execute("DROP TABLE IF EXISTS urls")
+                conn.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+            for statement in _SCHEMA:
+                conn.execute(statement)
+        except sqlite3.DatabaseError:
+            conn.close()
+            raise
+        return conn
+
+    def get(self, digest: str, params: str):
+        """读取结果并更新访问时间，不存在时返回None"""
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute(
+                "SELECT value FROM results WHERE hash = ? AND params = ?", (digest, params)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            with conn:
+                conn.execute(
+                    "UPDATE results SET accessed = ? WHERE hash = ? AND params = ?", (time.time(), digest, params)
+                )
+            self.hits += 1
+            return json.loads(row[0])
+
+    def put(self, digest: str, params: str, value, url: str | None = None):
+        """
+        写入结果，value需要能序列化为JSON；传入url时同时记录URL对应的内容哈希
+        超出容量时按最近访问时间淘汰
+        """
+        data = json.dumps(value, separators=(',', ':'))
+        size = len(data)
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                old = conn.execute(
+                    "SELECT size FROM results WHERE hash = ? AND params = ?", (digest, params)
+                ).fetchone()
+                conn.execute(
+                    "INSERT OR REPLACE INTO results (hash, params, value, size, accessed) VALUES (?, ?, ?, ?, ?)",
+                    (digest, params, data, size, time.time())
+                )
+                if url:
+                    conn.execute("INSERT OR REPLACE INTO urls (url, hash) VALUES (?, ?)", (url, digest))
+            if old is None:
+                self.entries += 1
+                self.total_bytes += size
+            else:
+                self.total_bytes += size - old[0]
+
+            if self.total_bytes > self.max_bytes:
+                self._evict(conn)
+
+    def _evict(self, conn: sqlite3.Connection):
+        """删除最久未访问的结果，直到总大小低于上限的_EVICT_TARGET，并删除不再有结果的URL"""
+        target = self.max_bytes * _EVICT_TARGET
+        with conn:
+            while self.total_bytes > target:
+                rows = conn.execute(
+                    "SELECT hash, params, size FROM results ORDER BY accessed LIMIT 64"
+                ).fetchall()
+                if not rows:
+                    break
+                conn.executemany(
+                    "DELETE FROM results WHERE hash = ? AND params = ?", [row[:2] for row in rows]
+                )
+                self.entries -= len(rows)
+                self.total_bytes -= sum(row[2] for row in rows)
+                self.evictions += len(rows)
+            conn.execute("DELETE FROM urls WHERE hash NOT IN (SELECT hash FROM results)")
+
+    def remember_url(self, url: str, digest: str):
+        """记录URL对应的图片内容哈希"""
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.execute("INSERT OR REPLACE INTO urls (url, hash) VALUES (?, ?)", (url, digest))
+
+    def lookup_url(self, url: str) -> str | None:
+        """查询URL对应的图片内容哈希"""
+        with self._lock:
+            row = self._connect().execute("SELECT hash FROM urls WHERE url = ?", (url,)).fetchone()
+        return row[0] if row else None
+
+    def reset_stats(self):
+        """清零命中、未命中和淘汰次数，条目数和大小反映数据库的实际内容，不清零"""
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def stats(self) -> dict:
+        """返回统计信息，数据库尚未打开时条目数和大小为0"""
+        lookups = self.hits + self.misses
+        return {
+            'entries': self.entries,
+            'bytes': self.total_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
@@ -0,0 +1,73 @@
+# workers.py - 图片处理工作池
+# 将解码、量化、PNG编码等CPU密集型任务放到线程池或进程池中执行
+import asyncio
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from multiprocessing import shared_memory
+
+BACKENDS = ('thread', 'process')
+
+
+def _call_with_shared_bytes(func, shm_name: str, size: int, args: tuple):
+    """工作进程入口：从共享内存读取图片字节后调用实际的处理函数"""
+    # 工作进程与主进程共用同一个resource_tracker，共享内存由主进程负责unlink
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        data = bytes(shm.buf[:size])
+    finally:
+        shm.close()
+    return func(data, *args)
+
+
+class ImageWorkerPool:
+    """
+    图片处理工作池
+    backend为'thread'时使用线程池（Pillow在解码和缩放时会释放GIL）；
+    为'process'时使用进程池，图片字节通过共享内存传给工作进程，不经过pickle
+    """
+
+    def __init__(self, backend: str = 'thread', max_workers: int = 2):
+        if backend not in BACKENDS:
+            raise ValueError(f"未知的工作池类型: {backend}，可选值: {', '.join(BACKENDS)}")
+        self.backend = backend
+        self.max_workers = max(1, int(max_workers))
+        self._executor: Executor | None = None
+
+    def _get_executor(self) -> Executor:
+        """按需创建执行器"""
+        if self._executor is None:
+            if self.backend == 'process':
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix="color_converter"
+                )
+        return self._executor
+
+    async def run(self, func, *args, **kwargs):
+        """在工作池中执行func(*args, **kwargs)，参数和返回值需要可pickle"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._get_executor(), partial(func, *args, **kwargs))
+
+    async def run_on_bytes(self, func, image_bytes: bytes, *args):
+        """
+        在工作池中执行func(image_bytes, *args)
+        进程池模式下图片字节写入共享内存，工作进程直接从共享内存读取
+        """
+        if self.backend != 'process' or not image_bytes:
+            return await self.run(func, image_bytes, *args)
+
+        shm = shared_memory.SharedMemory(create=True, size=len(image_bytes))
+        try:
+            shm.buf[:len(image_bytes)] = image_bytes
+            return await self.run(_call_with_shared_bytes, func, shm.name, len(image_bytes), args)
+        finally:
+            shm.close()
+            shm.unlink()
+
+    def shutdown(self):
+        """关闭工作池，等待正在执行的任务完成，丢弃排队中的任务"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None